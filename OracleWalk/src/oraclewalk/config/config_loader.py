@@ -63,6 +63,18 @@ class AppConfig:
     reoptimize_interval_days: int = 7
     use_futures: bool = False
     dry_run: bool = True
+    dashboard_mode: str = "thread"  # thread | process
+    dashboard_backend: str = "auto"  # auto | waitress | werkzeug
+    dashboard_threads: int = 16
+    trade_journal_dir: str = ""  # vazio = desativado (requer pyarrow)
+    single_position_mode: bool = True  # False = várias posições abertas ao mesmo tempo
+    max_open_positions: int = 0  # limite quando single_position_mode=False (0 = sem limite)
+    trailing_distance: float = 0.0  # trailing stop padrão, em preço (0 = desligado)
+    binance_rest_url: str = ""  # vazio = produção (spot ou futures conforme use_futures)
+    binance_stream_url: str = ""  # idem para o user data stream (websocket)
+    synthetic_depth_notional: float = 0.0  # livro sintético: notional por nível (0 = slippage fixo)
+    synthetic_depth_step: float = 0.01  # distância entre níveis sintéticos, em %
+    synthetic_depth_levels: int = 50
 
     @classmethod
     def from_sources(cls, config_path: str | None = None) -> "AppConfig":
@@ -75,7 +87,8 @@ class AppConfig:
         TELEGRAM_CHAT_ID, SYMBOLS, TIMEFRAME, MODE, INITIAL_BALANCE, RISK_PER_TRADE,
         SLIPPAGE, COMMISSION_MAKER, COMMISSION_TAKER, MA_SHORT_PERIOD, MA_LONG_PERIOD,
         RSI_PERIOD, RSI_BUY_THRESHOLD, RSI_SELL_THRESHOLD, OPTIMIZATION_WINDOW_DAYS,
-        REOPTIMIZE_INTERVAL_DAYS, USE_FUTURES, DRY_RUN, LEVERAGE.
+        REOPTIMIZE_INTERVAL_DAYS, USE_FUTURES, DRY_RUN, LEVERAGE, DASHBOARD_MODE,
+        DASHBOARD_BACKEND, DASHBOARD_THREADS, TRADE_JOURNAL_DIR.
         """
         load_dotenv()
 
@@ -133,6 +146,18 @@ class AppConfig:
             reoptimize_interval_days=get_int("reoptimize_interval_days", 7),
             use_futures=get_bool("use_futures", False),
             dry_run=get_bool("dry_run", True),
+            dashboard_mode=get_str("dashboard_mode", "thread").lower(),
+            dashboard_backend=get_str("dashboard_backend", "auto").lower(),
+            dashboard_threads=get_int("dashboard_threads", 16),
+            trade_journal_dir=get_str("trade_journal_dir", ""),
+            single_position_mode=get_bool("single_position_mode", True),
+            max_open_positions=get_int("max_open_positions", 0),
+            trailing_distance=get_float("trailing_distance", 0.0),
+            binance_rest_url=get_str("binance_rest_url", ""),
+            binance_stream_url=get_str("binance_stream_url", ""),
+            synthetic_depth_notional=get_float("synthetic_depth_notional", 0.0),
+            synthetic_depth_step=get_float("synthetic_depth_step", 0.01),
+            synthetic_depth_levels=get_int("synthetic_depth_levels", 50),
         )
 
     @staticmethod
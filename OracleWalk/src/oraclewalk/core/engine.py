@@ -9,49 +9,71 @@ import pandas as pd
 from oraclewalk.config.config_loader import AppConfig
 from oraclewalk.data.data_handler import HistoricalDataHandler
 from oraclewalk.data.live_data import LiveDataHandler
+from oraclewalk.execution.execution_price_model import ExecutionPriceModel, SyntheticDepth
 from oraclewalk.execution.risk_manager import RiskManager
 from oraclewalk.execution.trade_executor import TradeExecutor
 from oraclewalk.notifications.telegram_notifier import TelegramNotifier
 from oraclewalk.optimization.backtester import Backtester
-from oraclewalk.storage.database import DatabaseManager
+from oraclewalk.storage.database import DatabaseManager, trade_key
 from oraclewalk.strategy.inner_circle_trader import InnerCircleTrader
 from oraclewalk.data.indicators import calc_rsi
+from oraclewalk.data.resampler import timeframe_to_seconds
 from oraclewalk.utils.logger import setup_logger
+from oraclewalk.dashboard.ipc import DashboardPublisher
 from oraclewalk.dashboard.server import DashboardServer
 from oraclewalk.data.orderbook_data import OrderBookHandler
 
 logger = setup_logger(__name__)
 
 
-def _pnl_from_csv(path: str) -> float:
-    """Soma PnL realizado do trades.csv (pnl_exec se existir, senão calcula)."""
-    if not os.path.exists(path):
-        return 0.0
-    pnl_total = 0.0
+LEDGER_CSV_CHECKPOINT = "ledger_csv_bootstrap"
+
+
+def _csv_row_pnl(row) -> float:
+    """PnL realizado de uma linha do trades.csv (pnl_exec se existir, senão calcula)."""
     try:
-        with open(path, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    if row.get("pnl_exec") not in (None, ""):
-                        pnl_total += float(row["pnl_exec"])
-                        continue
-                except Exception:
-                    pass
-                try:
-                    entry = float(row.get("entry_exec") or row.get("entry_raw") or 0.0)
-                    exit_p = float(row.get("close_exec") or row.get("close_raw") or 0.0)
-                    qty = float(row.get("quantity") or 0.0) if row.get("quantity") not in (None, "") else 1.0
-                    side = (row.get("side") or "").lower()
-                    if side in ("buy", "long"):
-                        pnl_total += (exit_p - entry) * qty
-                    else:
-                        pnl_total += (entry - exit_p) * qty
-                except Exception:
-                    continue
+        if row.get("pnl_exec") not in (None, ""):
+            return float(row["pnl_exec"])
     except Exception:
-        return 0.0
-    return pnl_total
+        pass
+    entry = float(row.get("entry_exec") or row.get("entry_raw") or 0.0)
+    exit_p = float(row.get("close_exec") or row.get("close_raw") or 0.0)
+    qty = float(row.get("quantity") or 0.0) if row.get("quantity") not in (None, "") else 1.0
+    side = (row.get("side") or "").lower()
+    if side in ("buy", "long"):
+        return (exit_p - entry) * qty
+    return (entry - exit_p) * qty
+
+
+def _bootstrap_ledger_from_csv(db: DatabaseManager, path: str) -> int:
+    """
+    Migração única: copia o PnL realizado do trades.csv para o ledger do banco.
+    Depois do checkpoint gravado, o CSV não é mais lido no startup (só exportação).
+    Trades já no ledger (mesma chave símbolo:open_time) não são contados de novo.
+    """
+    if db.get_meta(LEDGER_CSV_CHECKPOINT) is not None:
+        return 0
+    count = 0
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        pnl = _csv_row_pnl(row)
+                    except Exception:
+                        continue
+                    symbol = row.get("symbol") or ""
+                    opened_at = row.get("open_time") or ""
+                    key = trade_key(symbol, opened_at) if opened_at else None
+                    db.append_ledger(symbol, pnl, row.get("close_time") or "", key)
+                    count += 1
+        except Exception as e:
+            logger.warning(f"[ENGINE] Falha ao migrar {path} para o ledger: {e}")
+            return 0
+    db.set_meta(LEDGER_CSV_CHECKPOINT, f"{path}:{count}")
+    db.flush()
+    logger.info(f"[ENGINE] Ledger de PnL inicializado com {count} trade(s) de {path}.")
+    return count
 
 
 def run_backtest(cfg: AppConfig):
@@ -67,7 +89,18 @@ def run_backtest(cfg: AppConfig):
     risk = RiskManager(cfg, db)
     strategy = InnerCircleTrader(cfg)
 
-    backtester = Backtester(risk)
+    # mesmos custos do executor live (slippage/depth sintético + comissão), aplicados em arrays
+    price_model = ExecutionPriceModel(
+        slippage_pct=cfg.slippage,
+        commission_maker=cfg.commission_maker,
+        commission_taker=cfg.commission_taker,
+        depth=SyntheticDepth(
+            cfg.synthetic_depth_notional,
+            step_pct=cfg.synthetic_depth_step,
+            levels=cfg.synthetic_depth_levels,
+        ) if cfg.synthetic_depth_notional > 0 else None,
+    )
+    backtester = Backtester(risk, price_model=price_model)
     result = backtester.run(df, strategy)
 
     notifier = TelegramNotifier(cfg.telegram_token, cfg.telegram_chat_id)
@@ -75,8 +108,11 @@ def run_backtest(cfg: AppConfig):
         f"📊 Backtest {cfg.symbols[0]}\n"
         f"Equity: {result['equity_final']:.2f}\n"
         f"PnL: {result['pnl']:.2f}\n"
+        f"Taxas: {result['fees']:.2f}\n"
         f"Win rate: {result['win_rate']*100:.2f}%"
     )
+    notifier.close()
+    db.close()
 
     logger.info("Backtest concluído. Equity salva em backtest_equity.csv")
 
@@ -87,11 +123,13 @@ def run_live(cfg: AppConfig):
     notifier = TelegramNotifier(cfg.telegram_token, cfg.telegram_chat_id)
     db = DatabaseManager()
     risk = RiskManager(cfg, db)
-    # Ajusta saldo inicial com PnL já realizado do CSV para não resetar equity após carregar candles
-    pnl_csv = _pnl_from_csv("trades.csv")
-    if pnl_csv != 0:
-        risk.current_balance += pnl_csv
-        logger.info(f"[ENGINE] Ajustando saldo inicial com PnL do CSV: {pnl_csv:.4f} → balance={risk.current_balance:.4f}")
+    # Ajusta saldo inicial com PnL já realizado para não resetar equity após carregar candles.
+    # Fonte: ledger do banco (última linha = total acumulado); o trades.csv só é lido uma vez, na migração.
+    _bootstrap_ledger_from_csv(db, "trades.csv")
+    pnl_realized = db.realized_total()
+    if pnl_realized != 0:
+        risk.current_balance += pnl_realized
+        logger.info(f"[ENGINE] Ajustando saldo inicial com PnL realizado: {pnl_realized:.4f} → balance={risk.current_balance:.4f}")
 
     # Estratégia exemplo
     strategy = InnerCircleTrader(cfg)
@@ -110,8 +148,14 @@ def run_live(cfg: AppConfig):
     print("\n" + "="*70, flush=True)
     print("📊 INICIANDO DASHBOARD", flush=True)
     print("="*70, flush=True)
-    print("[ENGINE] Criando DashboardServer...", flush=True)
-    dashboard = DashboardServer(max_points=10000, port=8000)
+    dashboard_cls = DashboardPublisher if cfg.dashboard_mode == "process" else DashboardServer
+    print(f"[ENGINE] Criando {dashboard_cls.__name__}...", flush=True)
+    dashboard = dashboard_cls(
+        max_points=10000,
+        port=8000,
+        backend=cfg.dashboard_backend,
+        threads=cfg.dashboard_threads,
+    )
     print("[ENGINE] DashboardServer criado, chamando start()...", flush=True)
     dashboard.start()
     print("[ENGINE] ✅ Dashboard iniciado em http://127.0.0.1:8000", flush=True)
@@ -180,7 +224,7 @@ def run_live(cfg: AppConfig):
         logger.error("Thread do WebSocket não está ativa!")
 
     # Executor agora recebe o dashboard (pra desenhar trades etc.)
-    executor = TradeExecutor(cfg, risk, db, notifier, dashboard=dashboard)
+    executor = TradeExecutor(cfg, risk, db, notifier, dashboard=dashboard, order_book=ob_handler.get_book)
 
     notifier.send("🚀 OracleWalk LIVE iniciado!")
 
@@ -192,15 +236,12 @@ def run_live(cfg: AppConfig):
 
     # Calcula start baseado em N candles (2000) para garantir histórico suficiente
     # independente do timeframe
-    tf_str = cfg.timeframe
-    minutes = 1
-    if tf_str.endswith("m"):
-        minutes = int(tf_str[:-1])
-    elif tf_str.endswith("h"):
-        minutes = int(tf_str[:-1]) * 60
-    elif tf_str.endswith("d"):
-        minutes = int(tf_str[:-1]) * 1440
-    
+    try:
+        minutes = timeframe_to_seconds(cfg.timeframe) // 60
+    except ValueError as e:
+        logger.warning(f"{e}; assumindo 1 minuto por candle para o histórico.")
+        minutes = 1
+
     needed_candles = 10000 
     duration_min = minutes * needed_candles
     
@@ -225,24 +266,7 @@ def run_live(cfg: AppConfig):
 
     # Envia histórico para o dashboard
     print(f"\n[ENGINE] Enviando histórico inicial ({len(df_hist)} candles) para o dashboard...", flush=True)
-    candles_sent = 0
-    for idx, row in df_hist.iterrows():
-        dashboard.push_candle(
-            {
-                "time": int(idx.timestamp()),
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "volume": float(row["volume"]),
-                "rsi": float(row["rsi"]) if not pd.isna(row["rsi"]) else None,
-                "is_closed": True,
-            }
-        )
-        candles_sent += 1
-        if candles_sent % 100 == 0:
-            print(f"[ENGINE] Enviados {candles_sent}/{len(df_hist)} candles...", flush=True)
-    
+    candles_sent = dashboard.load_history(df_hist[["open", "high", "low", "close", "volume", "rsi"]])
     print(f"[ENGINE] ✅ {candles_sent} candles históricos enviados ao dashboard", flush=True)
     print(f"[ENGINE] Buffer do dashboard agora tem {dashboard.get_buffer_size()} candles", flush=True)
 
@@ -322,6 +346,7 @@ def run_live(cfg: AppConfig):
             strategy_result = strategy.process_live_candle(candle)
             
             # Compatibilidade com versões antigas que retornavam int
+            trailing = getattr(cfg, "trailing_distance", 0.0)
             if isinstance(strategy_result, int):
                 signal = strategy_result
                 sl = 0.0
@@ -331,6 +356,7 @@ def run_live(cfg: AppConfig):
                 signal = strategy_result.get('signal', 0)
                 sl = strategy_result.get('sl', 0.0)
                 tp = strategy_result.get('tp', 0.0)
+                trailing = strategy_result.get('trailing_distance', trailing)
                 fvg_updated = strategy_result.get('fvg_updated', False)
 
             # 1.1) Atualiza FVGs no dashboard (Apenas se candle fechou, para não pesar no front)
@@ -382,27 +408,17 @@ def run_live(cfg: AppConfig):
             )
 
             # 3.1) Atualiza equity/saldo/pnl aberto no dashboard
-            if hasattr(dashboard, "set_equity") and hasattr(executor, "current_position"):
+            if hasattr(dashboard, "set_equity") and hasattr(executor, "book"):
                 balance = risk.current_balance if hasattr(risk, "current_balance") else None
-                open_pnl = 0.0
-                if executor.current_position is not None:
-                    pos = executor.current_position
-                    qty = getattr(pos, "quantity", 0.0) or 0.0
-                    entry = getattr(pos, "entry_price", 0.0) or 0.0
-                    side_pos = getattr(pos, "side", "").lower()
-                    last_price = float(candle["close"])
-                    if side_pos in ("buy", "long"):
-                        open_pnl = (last_price - entry) * qty
-                    elif side_pos in ("sell", "short"):
-                        open_pnl = (entry - last_price) * qty
+                # soma vetorizada sobre todas as posições abertas do símbolo
+                open_pnl = executor.book.open_pnl(cfg.symbols[0], float(candle["close"]))
                 equity = balance + open_pnl if balance is not None else None
                 dashboard.set_equity(balance, equity, open_pnl, ts=time.time())
 
             # 4) Atualiza orderbook no dashboard (a cada ~0.5s) SEM quebrar o loop
             if hasattr(dashboard, "set_orderbook") and now - last_ob_update > 0.5:
                 try:
-                    book_snapshot = ob_handler.get_snapshot()
-                    dashboard.set_orderbook(book_snapshot)
+                    dashboard.set_orderbook(ob_handler.get_book())
                 except Exception as e:
                     logger.warning(f"Falha ao atualizar orderbook no dashboard: {e}")
                 finally:
@@ -422,70 +438,25 @@ def run_live(cfg: AppConfig):
                 
                 last_status_check = now
 
-            # 4.2) VERIFICAR STOPS E TAKES (NOVO)
-            if executor.current_position is not None:
-                pos = executor.current_position
-                sl = pos.stop_loss
-                tp = pos.take_profit
-                
-                # LONG
-                if pos.side == "buy":
-                    # Checa SL (Low <= SL)
-                    if sl and sl > 0 and candle["low"] <= sl:
-                        logger.info(f"🛑 STOP LOSS atingido no LONG! Low={candle['low']} <= SL={sl}")
-                        executor.close_position(
-                            cfg.symbols[0],
-                            sl, # Executa no preço do SL
-                            candle["datetime"],
-                            reason="Stop Loss 🛑"
-                        )
-                    # Checa TP (High >= TP)
-                    elif tp and tp > 0 and candle["high"] >= tp:
-                        logger.info(f"💰 TAKE PROFIT atingido no LONG! High={candle['high']} >= TP={tp}")
-                        executor.close_position(
-                            cfg.symbols[0],
-                            tp, # Executa no preço do TP
-                            candle["datetime"],
-                            reason="Take Profit 💰"
-                        )
-
-                # SHORT
-                elif pos.side == "sell":
-                    # Checa SL (High >= SL)
-                    if sl and sl > 0 and candle["high"] >= sl:
-                        logger.info(f"🛑 STOP LOSS atingido no SHORT! High={candle['high']} >= SL={sl}")
-                        executor.close_position(
-                            cfg.symbols[0],
-                            sl,
-                            candle["datetime"],
-                            reason="Stop Loss 🛑"
-                        )
-                    # Checa TP (Low <= TP)
-                    elif tp and tp > 0 and candle["low"] <= tp:
-                        logger.info(f"💰 TAKE PROFIT atingido no SHORT! Low={candle['low']} <= TP={tp}")
-                        executor.close_position(
-                            cfg.symbols[0],
-                            tp,
-                            candle["datetime"],
-                            reason="Take Profit 💰"
-                        )
+            # 4.2) VERIFICAR STOPS E TAKES: busca binária nos níveis vigentes, depois trailing no close
+            executor.check_stops(cfg.symbols[0], candle)
 
             # 5) Execução de trades (fora da parte do orderbook)
             if signal == 1:
                 notifier.send("📈 Sinal de COMPRA detectado")
 
-                # Se estiver vendido, fecha
-                if executor.current_position and executor.current_position.side.lower() == "sell":
-                    executor.close_position(
-                        cfg.symbols[0],
-                        candle["close"],
-                        candle["datetime"],
-                        bid=candle.get("bid"),
-                        ask=candle.get("ask"),
-                        reason="Signal Reversal 🔄"
-                    )
-
-                # Tenta abrir compra
+                # Se estiver vendido, fecha todas as vendas
+                executor.close_all(
+                    cfg.symbols[0],
+                    candle["close"],
+                    candle["datetime"],
+                    bid=candle.get("bid"),
+                    ask=candle.get("ask"),
+                    reason="Signal Reversal 🔄",
+                    side="sell",
+                )
+
+                # Tenta abrir compra (em single_position_mode recusa se já estiver comprado)
                 executor.open_long(
                     cfg.symbols[0],
                     candle["close"],
@@ -493,22 +464,23 @@ def run_live(cfg: AppConfig):
                     bid=candle.get("bid"),
                     ask=candle.get("ask"),
                     sl=sl,
-                    tp=tp
+                    tp=tp,
+                    trailing=trailing,
                 )
 
             elif signal == -1:
                 notifier.send("📉 Sinal de VENDA detectado")
 
-                # Se estiver comprado, fecha
-                if executor.current_position and executor.current_position.side.lower() == "buy":
-                    executor.close_position(
-                        cfg.symbols[0],
-                        candle["close"],
-                        candle["datetime"],
-                        bid=candle.get("bid"),
-                        ask=candle.get("ask"),
-                        reason="Signal Reversal 🔄"
-                    )
+                # Se estiver comprado, fecha todas as compras
+                executor.close_all(
+                    cfg.symbols[0],
+                    candle["close"],
+                    candle["datetime"],
+                    bid=candle.get("bid"),
+                    ask=candle.get("ask"),
+                    reason="Signal Reversal 🔄",
+                    side="buy",
+                )
 
                 # Tenta abrir venda
                 executor.open_short(
@@ -518,7 +490,8 @@ def run_live(cfg: AppConfig):
                     bid=candle.get("bid"),
                     ask=candle.get("ask"),
                     sl=sl,
-                    tp=tp
+                    tp=tp,
+                    trailing=trailing,
                 )
 
             # 6) Atualiza PnL em aberto (informativo)
@@ -526,5 +499,24 @@ def run_live(cfg: AppConfig):
 
     except KeyboardInterrupt:
         logger.info("Encerrando OracleWalk LIVE...")
-        live.stop()
-        notifier.send("🛑 OracleWalk LIVE finalizado.")
+    finally:
+        # roda também quando o loop cai por exceção: nada de fila pendente perdida
+        _shutdown_step("live", live.stop)
+        _shutdown_step("orderbook", ob_handler.stop)
+        _shutdown_step("notifier", lambda: notifier.send("🛑 OracleWalk LIVE finalizado."))
+        # notificações são assíncronas: drena a fila antes de sair
+        _shutdown_step("notifier", notifier.close)
+        # fsync do journal de posições + fecha CSVs
+        _shutdown_step("executor", executor.close)
+        # grava o que ainda está na fila do writer do banco
+        _shutdown_step("database", db.close)
+        # processo do dashboard (DashboardPublisher); no servidor em thread é no-op
+        _shutdown_step("dashboard", dashboard.stop)
+
+
+def _shutdown_step(name: str, fn) -> None:
+    """Um passo do encerramento; falha só é logada para os próximos ainda rodarem."""
+    try:
+        fn()
+    except Exception as e:
+        logger.warning(f"[ENGINE] Erro ao encerrar {name}: {e}")
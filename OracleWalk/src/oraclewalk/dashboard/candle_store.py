@@ -0,0 +1,312 @@
+# file: oraclewalk/dashboard/candle_store.py
+
+import json
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from oraclewalk.dashboard.serialization import clean_record, dumps_str
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Formato binário colunar (/api/candles.bin):
+#   "OWC1" | uint32 LE tamanho do header | header JSON | padding | colunas
+# Cada coluna começa num offset absoluto múltiplo de 8 (TypedArray direto no JS).
+BINARY_MAGIC = b"OWC1"
+PRICE_FIELDS = ("open", "high", "low", "close")  # float64: preço não pode perder casas
+# demais campos numéricos (volume, rsi, ma_*) vão em float32; null → NaN
+
+
+def _is_numeric_field(key: str, value: Any) -> bool:
+    if key == "time" or isinstance(value, bool):
+        return False
+    return value is None or isinstance(value, (int, float))
+
+
+def _to_columns(rows: List[Dict[str, Any]], fields: List[str]) -> Dict[str, np.ndarray]:
+    """Linhas (dicts) → colunas float64; ausente/None → NaN."""
+    cols = {"time": np.fromiter((r["time"] for r in rows), dtype=np.uint32, count=len(rows))}
+    for f in fields:
+        vals = [r.get(f) for r in rows]
+        cols[f] = np.array([np.nan if v is None else v for v in vals], dtype=np.float64)
+    return cols
+
+
+def pack_columnar(blocks: List[Dict[str, np.ndarray]], fields: List[str]) -> bytes:
+    """
+    Concatena blocos colunares e empacota no formato OWC1.
+    Blocos sem um campo (campo novo surgiu depois) recebem NaN.
+    """
+    count = sum(len(b["time"]) for b in blocks)
+    columns: List[Tuple[str, str, np.ndarray]] = []
+    times = np.concatenate([b["time"] for b in blocks]) if blocks else np.empty(0, np.uint32)
+    columns.append(("time", "u4", times.astype("<u4", copy=False)))
+    for f in fields:
+        parts = [b[f] if f in b else np.full(len(b["time"]), np.nan) for b in blocks]
+        col = np.concatenate(parts) if parts else np.empty(0)
+        dtype = "f8" if f in PRICE_FIELDS else "f4"
+        columns.append((f, dtype, col.astype("<" + dtype, copy=False)))
+
+    def header_bytes(offsets: List[int]) -> bytes:
+        header = {
+            "version": 1,
+            "count": count,
+            "fields": [
+                {"name": name, "dtype": dtype, "offset": off}
+                for (name, dtype, _), off in zip(columns, offsets)
+            ],
+        }
+        return json.dumps(header, separators=(",", ":")).encode()
+
+    # o tamanho do header depende dos offsets: calcula com placeholders largos e alinha
+    probe = header_bytes([10 ** 9] * len(columns))
+    data_start = -(-(8 + len(probe)) // 8) * 8
+    offsets = []
+    pos = data_start
+    for _, _, arr in columns:
+        offsets.append(pos)
+        pos += -(-arr.nbytes // 8) * 8
+
+    header = header_bytes(offsets).ljust(data_start - 8, b" ")
+    out = bytearray(pos)
+    out[0:4] = BINARY_MAGIC
+    out[4:8] = struct.pack("<I", len(header))
+    out[8:data_start] = header
+    for (_, _, arr), off in zip(columns, offsets):
+        out[off:off + arr.nbytes] = arr.tobytes()
+    return bytes(out)
+
+
+class CandleStore:
+    """
+    Histórico de candles do dashboard, append-only e já serializado.
+
+    - Candles fechados são sanitizados e convertidos em JSON UMA vez, na entrada.
+    - A cada CHUNK_SIZE candles o trecho é "selado" num único fragmento JSON,
+      então a carga completa junta ~max_points/CHUNK_SIZE strings.
+    - `json_since(ts)` faz busca binária pelo cursor e serializa só os
+      candles a partir dele (em regime: o último fechado + o live).
+    - O último candle fechado nunca é selado, para poder ser sobrescrito
+      (reenvio do mesmo timestamp).
+    - Ao passar de `max_points`, descarta o chunk selado mais antigo.
+    - Escrita (thread do engine) e leitura (threads HTTP) sob um lock curto;
+      o join das strings acontece fora dele.
+    - `version` cresce a cada escrita (usado como ETag pelo servidor).
+    - Em paralelo, cada chunk selado guarda suas colunas NumPy para o
+      formato binário (`binary_all`), montado só por concatenação.
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, max_points: int = 10000):
+        self.max_points = max_points
+        self.chunk_size = max(1, min(self.CHUNK_SIZE, max_points // 8))
+        self._lock = threading.Lock()
+
+        self._times: List[int] = []
+        self._frags: List[str] = []  # JSON de cada candle fechado (paralelo a _times)
+        self._rows: List[Dict[str, Any]] = []  # candles sanitizados (paralelo a _times)
+        self._col_chunks: List[Dict[str, np.ndarray]] = []  # colunas dos chunks selados
+        self._fields: List[str] = ["open", "high", "low", "close", "volume"]
+        self._binary_cache: Optional[Tuple[int, bytes]] = None
+        self._chunks: List[str] = []  # fragmentos selados: "{...},{...},..."
+        self._chunk_sizes: List[int] = []
+        self._sealed = 0  # quantos candles (do início) já estão selados
+
+        self._live: Optional[Dict[str, Any]] = None
+        self._live_json: Optional[str] = None
+        self.version = 0
+
+    # -----------------------------
+    # ESCRITA
+    # -----------------------------
+    def append_closed(self, candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Arquiva um candle fechado. Mesmo timestamp do último → sobrescreve.
+        Retorna o candle sanitizado (ou None se descartado).
+        """
+        ts = int(candle.get("time", 0) or 0)
+        if ts <= 0:
+            return None
+
+        clean = clean_record(candle)
+        frag = dumps_str(clean)
+
+        with self._lock:
+            self._track_fields(clean)
+            if self._times and ts == self._times[-1]:
+                self._frags[-1] = frag
+                self._rows[-1] = clean
+            elif self._times and ts < self._times[-1]:
+                logger.debug(f"[DASHBOARD] Candle fechado fora de ordem descartado: {ts}")
+                return None
+            else:
+                self._times.append(ts)
+                self._frags.append(frag)
+                self._rows.append(clean)
+                self._seal()
+                self._evict()
+
+            if self._live is not None and self._live["time"] <= ts:
+                self._live = None
+                self._live_json = None
+            self.version += 1
+        return clean
+
+    def extend_closed(self, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Carga em lote de candles fechados (coluna `time` em segundos + campos).
+        Cada linha é serializada como no append_closed (sem o lock do store);
+        linhas mais antigas que o último candle já arquivado são ignoradas.
+        Retorna as linhas sanitizadas efetivamente adicionadas.
+        """
+        if frame.empty:
+            return []
+        frame = frame.sort_values("time", kind="stable").drop_duplicates("time", keep="last")
+        last = self.last_closed_time
+        if last is not None:
+            frame = frame[frame["time"] > last]
+        if frame.empty:
+            return []
+
+        # mesmo caminho do append_closed (clean_record + dumps): bytes idênticos por candle
+        rows = [clean_record(r) for r in frame.to_dict("records")]
+        frags = [dumps_str(r) for r in rows]
+        times = [int(t) for t in frame["time"].to_numpy()]
+
+        with self._lock:
+            for k in frame.columns:
+                if k not in self._fields and k != "time" and frame[k].dtype.kind in "fiu":
+                    self._fields.append(k)
+            if self._times and times[0] <= self._times[-1]:
+                # outro writer chegou antes: mantém só o que ainda é mais novo
+                keep = bisect_right(times, self._times[-1])
+                times, frags, rows = times[keep:], frags[keep:], rows[keep:]
+            self._times.extend(times)
+            self._frags.extend(frags)
+            self._rows.extend(rows)
+            self._seal()
+            self._evict()
+            if self._live is not None and self._times and self._live["time"] <= self._times[-1]:
+                self._live = None
+                self._live_json = None
+            self.version += 1
+        return rows
+
+    def set_live(self, candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Atualiza o candle em formação (nunca entra no histórico)."""
+        ts = int(candle.get("time", 0) or 0)
+        if ts <= 0:
+            return None
+        clean = clean_record(candle)
+        frag = dumps_str(clean)
+        with self._lock:
+            self._live = clean
+            self._live_json = frag
+            self._track_fields(clean)
+            self.version += 1
+        return clean
+
+    def _track_fields(self, clean: Dict[str, Any]) -> None:
+        for k, v in clean.items():
+            if k not in self._fields and _is_numeric_field(k, v):
+                self._fields.append(k)
+
+    def _seal(self) -> None:
+        # mantém sempre ao menos o último fechado fora dos chunks selados
+        while len(self._times) - self._sealed > self.chunk_size:
+            start = self._sealed
+            end = start + self.chunk_size
+            self._chunks.append(",".join(self._frags[start:end]))
+            self._col_chunks.append(_to_columns(self._rows[start:end], self._fields))
+            self._chunk_sizes.append(self.chunk_size)
+            self._sealed = end
+
+    def _evict(self) -> None:
+        while self._chunk_sizes and len(self._times) > self.max_points:
+            n = self._chunk_sizes.pop(0)
+            self._chunks.pop(0)
+            self._col_chunks.pop(0)
+            del self._times[:n]
+            del self._frags[:n]
+            del self._rows[:n]
+            self._sealed -= n
+
+    # -----------------------------
+    # LEITURA
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def live(self) -> Optional[Dict[str, Any]]:
+        return self._live
+
+    @property
+    def last_closed_time(self) -> Optional[int]:
+        return self._times[-1] if self._times else None
+
+    def _live_part(self, since: int = 0) -> List[str]:
+        if self._live_json is None:
+            return []
+        ts = self._live["time"]
+        if ts < since or (self._times and ts <= self._times[-1]):
+            return []
+        return [self._live_json]
+
+    @property
+    def first_closed_time(self) -> Optional[int]:
+        return self._times[0] if self._times else None
+
+    def rows_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Candles (sanitizados) com start <= time <= end, incluindo o live."""
+        with self._lock:
+            lo = bisect_left(self._times, start)
+            hi = bisect_right(self._times, end)
+            rows = self._rows[lo:hi]
+            if self._live_part(start) and self._live["time"] <= end:
+                rows.append(self._live)
+        return rows
+
+    def json_all(self) -> str:
+        """Array JSON com todo o histórico fechado + live."""
+        with self._lock:
+            parts = self._chunks + self._frags[self._sealed:] + self._live_part()
+        return "[" + ",".join(parts) + "]"
+
+    def json_since(self, since: int) -> str:
+        """Array JSON com os candles de `time >= since` (inclui o live)."""
+        with self._lock:
+            idx = bisect_left(self._times, since)
+            if idx <= 0:
+                parts = self._chunks + self._frags[self._sealed:] + self._live_part()
+            else:
+                parts = self._frags[idx:] + self._live_part(since)
+        return "[" + ",".join(parts) + "]"
+
+    def binary_all(self) -> bytes:
+        """Histórico fechado + live no formato colunar OWC1 (cacheado por versão)."""
+        with self._lock:
+            version = self.version
+            cached = self._binary_cache
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            fields = list(self._fields)
+            blocks = list(self._col_chunks)
+            tail = self._rows[self._sealed:]
+            if self._live_part():
+                tail = tail + [self._live]
+
+        if tail:
+            blocks.append(_to_columns(tail, fields))
+        data = pack_columnar(blocks, fields)
+
+        with self._lock:
+            if self.version == version:
+                self._binary_cache = (version, data)
+        return data
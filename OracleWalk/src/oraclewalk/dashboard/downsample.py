@@ -0,0 +1,217 @@
+# file: oraclewalk/dashboard/downsample.py
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+OHLC_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _merge(bar: Dict[str, Any], candle: Dict[str, Any]) -> None:
+    """Agrega `candle` dentro de `bar` (OHLC + soma de volume; indicadores = último valor)."""
+    if candle.get("high") is not None:
+        bar["high"] = candle["high"] if bar.get("high") is None else max(bar["high"], candle["high"])
+    if candle.get("low") is not None:
+        bar["low"] = candle["low"] if bar.get("low") is None else min(bar["low"], candle["low"])
+    if candle.get("close") is not None:
+        bar["close"] = candle["close"]
+    bar["volume"] = (bar.get("volume") or 0.0) + (candle.get("volume") or 0.0)
+    for k, v in candle.items():
+        if k not in OHLC_FIELDS and k not in ("time", "is_closed"):
+            bar[k] = v
+
+
+class PyramidLevel:
+    """Uma resolução da pirâmide: barras de `interval` segundos alinhadas ao epoch."""
+
+    def __init__(self, interval: int, capacity: int):
+        self.interval = interval
+        self._bars: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._times: Deque[int] = deque(maxlen=capacity)
+        self._partial: Optional[Dict[str, Any]] = None
+        # candles base da barra em formação (no máximo `factor`): permitem refazê-la
+        self._members: List[Dict[str, Any]] = []
+        self._first_candle: Optional[int] = None
+        self.dropped = False  # já descartou barras antigas por capacidade
+
+    def add(self, candle: Dict[str, Any]) -> None:
+        if self._first_candle is None:
+            self._first_candle = candle["time"]
+        bucket = candle["time"] - candle["time"] % self.interval
+        partial = self._partial
+        if partial is not None and bucket == partial["time"]:
+            _merge(partial, candle)
+            self._members.append(candle)
+            return
+        if partial is not None and bucket < partial["time"]:
+            return
+        if partial is not None:
+            if len(self._bars) == self._bars.maxlen:
+                self.dropped = True
+            self._bars.append(partial)
+            self._times.append(partial["time"])
+        self._partial = self._new_bar(candle, bucket)
+        self._members = [candle]
+
+    def replace_last(self, candle: Dict[str, Any]) -> None:
+        """Troca o último candle base (mesmo `time`) e recalcula a barra em formação."""
+        if not self._members or self._members[-1]["time"] != candle["time"]:
+            return
+        self._members[-1] = candle
+        bar = self._new_bar(self._members[0], self._partial["time"])
+        for c in self._members[1:]:
+            _merge(bar, c)
+        self._partial = bar
+
+    @staticmethod
+    def _new_bar(candle: Dict[str, Any], bucket: int) -> Dict[str, Any]:
+        bar = {k: v for k, v in candle.items() if k != "is_closed"}
+        bar["time"] = bucket
+        bar["volume"] = candle.get("volume") or 0.0
+        return bar
+
+    @property
+    def first_time(self) -> Optional[int]:
+        if self._times:
+            return self._times[0]
+        return self._partial["time"] if self._partial else None
+
+    @property
+    def data_start(self) -> Optional[int]:
+        """Candle mais antigo que o nível ainda representa (o bucket alinhado pode começar antes)."""
+        if self.dropped:
+            return self.first_time
+        return self._first_candle
+
+    def between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        times = list(self._times)
+        lo = bisect_left(times, start)
+        hi = bisect_right(times, end)
+        out = list(self._bars)[lo:hi] if hi > lo else []
+        partial = self._partial
+        if partial is not None and start <= partial["time"] <= end:
+            out.append(dict(partial))
+        return out
+
+    def __len__(self) -> int:
+        return len(self._bars) + (1 if self._partial is not None else 0)
+
+
+class CandlePyramid:
+    """
+    Pirâmide multi-resolução de candles FECHADOS, mantida incrementalmente.
+
+    - Cada nível agrega `factor` × intervalo base (1m → 4m, 16m, 64m, 256m...)
+      em buckets alinhados ao epoch; a barra em formação é atualizada a cada
+      candle e empurrada para o deque quando o bucket vira.
+    - Cada nível tem capacidade própria, então níveis grossos cobrem muito
+      mais tempo do que o buffer bruto (semanas de 1m com poucos pontos).
+    - O intervalo base, se não for dado, é o passo entre os dois primeiros candles.
+    - O mesmo candle fechado reenviado (mesmo `time`, ex.: correção da exchange)
+      substitui o anterior; candles mais antigos que o último são ignorados.
+    """
+
+    FACTORS = (4, 16, 64, 256)
+
+    def __init__(self, capacity: int = 10000, interval: Optional[int] = None, factors: Sequence[int] = FACTORS):
+        self.capacity = capacity
+        self.factors = tuple(factors)
+        self.interval: Optional[int] = interval
+        self.levels: List[PyramidLevel] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._last_time: Optional[int] = None
+        self._lock = threading.Lock()
+        if interval:
+            self._build_levels(interval)
+
+    def _build_levels(self, interval: int) -> None:
+        self.interval = interval
+        self.levels = [PyramidLevel(interval * f, self.capacity) for f in self.factors]
+
+    def add(self, candle: Dict[str, Any]) -> None:
+        """Alimenta com um candle fechado (sanitizado, `time` em segundos)."""
+        ts = candle.get("time")
+        if not ts:
+            return
+        with self._lock:
+            if self._last_time is not None and ts < self._last_time:
+                return
+            if ts == self._last_time:
+                # o último candle base está sempre na barra em formação de cada nível
+                if self._pending:
+                    self._pending[-1] = candle
+                for level in self.levels:
+                    level.replace_last(candle)
+                return
+            self._last_time = ts
+            if not self.levels:
+                # precisa de 2 candles para inferir o intervalo base
+                self._pending.append(candle)
+                if len(self._pending) < 2:
+                    return
+                step = self._pending[-1]["time"] - self._pending[-2]["time"]
+                self._build_levels(step)
+                pending, self._pending = self._pending, []
+                for c in pending:
+                    for level in self.levels:
+                        level.add(c)
+                return
+            for level in self.levels:
+                level.add(candle)
+
+    def extend(self, candles: Sequence[Dict[str, Any]]) -> None:
+        for c in candles:
+            self.add(c)
+
+    def snapshot_levels(self) -> List[PyramidLevel]:
+        with self._lock:
+            return list(self.levels)
+
+    def between(self, level: PyramidLevel, start: int, end: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return level.between(start, end)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: índices de `threshold` pontos que
+    preservam a forma da série (sempre inclui o primeiro e o último).
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1], dtype=np.int64)
+
+    out = np.empty(threshold, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        avg_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        out[i + 1] = a
+    return out
+
+
+def lttb_candles(candles: List[Dict[str, Any]], threshold: int) -> List[Dict[str, Any]]:
+    """Aplica LTTB no fechamento e devolve os candles escolhidos."""
+    if len(candles) <= threshold:
+        return candles
+    x = np.fromiter((c["time"] for c in candles), dtype=np.float64, count=len(candles))
+    y = np.array([np.nan if c.get("close") is None else c["close"] for c in candles], dtype=np.float64)
+    if np.isnan(y).any():
+        y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    return [candles[i] for i in lttb_indices(x, y, threshold)]
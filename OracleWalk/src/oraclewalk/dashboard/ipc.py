@@ -0,0 +1,222 @@
+# file: oraclewalk/dashboard/ipc.py
+
+import multiprocessing as mp
+import queue
+import time
+import webbrowser
+from collections.abc import Mapping
+from threading import Thread
+from typing import Any, Dict, Optional, Tuple
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# métodos do DashboardServer que podem ser chamados via fila
+FORWARDED = ("load_history", "push_candle", "push_trade", "remove_trade", "clear_trades", "set_fvg", "set_equity", "set_orderbook")
+
+# sem isso o dado se perde de vez (histórico/trades); o resto é sobrescrito pelo próximo update
+CRITICAL = ("push_trade", "remove_trade", "clear_trades", "set_fvg")
+CRITICAL_PUT_TIMEOUT = 0.05
+# carga inicial do histórico: mensagem única e grande, pode esperar mais
+HISTORY_PUT_TIMEOUT = 5.0
+
+_STOP = None
+
+
+def dispatch(server, msg: Tuple[str, tuple]) -> None:
+    """Aplica uma mensagem (método, args) no DashboardServer do processo filho."""
+    method, args = msg
+    if method not in FORWARDED:
+        logger.warning(f"[DASHBOARD-IPC] Método não suportado: {method}")
+        return
+    try:
+        getattr(server, method)(*args)
+    except Exception as e:
+        logger.warning(f"[DASHBOARD-IPC] Erro ao aplicar {method}: {e}")
+
+
+def _dashboard_process_main(q, server_kwargs: Dict[str, Any]) -> None:
+    """
+    Entry point do processo do dashboard: sobe o HTTP numa thread e
+    consome a fila na thread principal. Serialização JSON e compressão
+    acontecem só aqui, fora do GIL do engine.
+    """
+    from oraclewalk.dashboard.server import DashboardServer
+
+    server = DashboardServer(**server_kwargs)
+    Thread(target=server.serve, daemon=True, name="DashboardServer").start()
+
+    while True:
+        try:
+            msg = q.get()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+        if msg is _STOP:
+            break
+        dispatch(server, msg)
+
+
+class DashboardPublisher:
+    """
+    Dashboard fora do processo do engine.
+
+    Tem a mesma interface de escrita do DashboardServer (push_candle,
+    push_trade, set_fvg, set_equity, set_orderbook), mas só enfileira
+    (método, args) numa multiprocessing.Queue limitada. Um processo filho
+    (spawn) roda o DashboardServer real e serve o HTTP.
+
+    - put_nowait: o engine nunca espera pelo dashboard; se a fila estiver
+      cheia, updates sobrescrevíveis (candle live, equity, book) são
+      descartados e contados em `dropped`.
+    - candles fechados, trades e FVGs esperam até CRITICAL_PUT_TIMEOUT.
+    - o order book só é enviado quando a referência do snapshot muda.
+    """
+
+    def __init__(
+        self,
+        max_points: int = 10000,
+        port: int = 8000,
+        backend: str = "auto",
+        threads: int = 16,
+        host: str = "127.0.0.1",
+        max_stream_clients: Optional[int] = None,
+        max_queue: int = 20000,
+        open_browser: bool = True,
+    ):
+        self.port = port
+        self.host = host
+        self.open_browser = open_browser
+        self._server_kwargs = {
+            "max_points": max_points,
+            "port": port,
+            "backend": backend,
+            "threads": threads,
+            "host": host,
+            "max_stream_clients": max_stream_clients,
+        }
+        # spawn: o engine já tem threads (WebSockets) rodando, fork não é seguro
+        self._ctx = mp.get_context("spawn")
+        self._queue = self._ctx.Queue(maxsize=max_queue)
+        self._process: Optional[mp.process.BaseProcess] = None
+        self._last_book: Any = None
+        self._last_fvg_df: Any = None
+        self._closed_candles = 0
+        self.dropped = 0
+        self._last_drop_log = 0.0
+
+    # -----------------------------
+    # ENVIO
+    # -----------------------------
+    def _send(self, method: str, *args, critical: Optional[bool] = None) -> bool:
+        msg = (method, args)
+        if critical is None:
+            critical = method in CRITICAL
+        try:
+            if critical:
+                self._queue.put(msg, timeout=CRITICAL_PUT_TIMEOUT)
+            else:
+                self._queue.put_nowait(msg)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            now = time.time()
+            if now - self._last_drop_log > 5.0:
+                self._last_drop_log = now
+                logger.warning(
+                    f"[DASHBOARD-IPC] Fila cheia, {self.dropped} updates descartados até agora ({method})."
+                )
+            return False
+        except Exception as e:
+            logger.warning(f"[DASHBOARD-IPC] Falha ao enviar {method}: {e}")
+            return False
+
+    def load_history(self, data) -> int:
+        """Envia o histórico inteiro numa mensagem (DataFrame/arrays são picklados em bloco)."""
+        n = len(data["time"]) if isinstance(data, Mapping) else len(data)
+        try:
+            self._queue.put(("load_history", (data,)), timeout=HISTORY_PUT_TIMEOUT)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("[DASHBOARD-IPC] Fila cheia: histórico inicial não enviado.")
+            return 0
+        self._closed_candles += n
+        return n
+
+    def push_candle(self, candle: Dict[str, Any]):
+        closed = bool(candle.get("is_closed", False))
+        if self._send("push_candle", candle, critical=closed) and closed:
+            self._closed_candles += 1
+
+    def push_trade(self, trade: Dict[str, Any]):
+        self._send("push_trade", dict(trade))
+
+    def remove_trade(self, trade_id):
+        self._send("remove_trade", trade_id)
+
+    def clear_trades(self):
+        self._send("clear_trades")
+
+    def set_fvg(self, fvgs_df):
+        # a estratégia só cria um DataFrame novo quando recalcula: mesmo objeto = nada a enviar
+        if fvgs_df is self._last_fvg_df:
+            return
+        if self._send("set_fvg", fvgs_df):
+            self._last_fvg_df = fvgs_df
+
+    def set_equity(self, balance: float, equity: float, open_pnl: float, ts: float = None):
+        self._send("set_equity", balance, equity, open_pnl, ts if ts is not None else time.time())
+
+    def set_orderbook(self, book):
+        if book is self._last_book:
+            return
+        if self._send("set_orderbook", book):
+            self._last_book = book
+
+    def get_buffer_size(self) -> int:
+        """Candles fechados enviados ao processo (o buffer real vive no filho)."""
+        return min(self._closed_candles, self._server_kwargs["max_points"])
+
+    # -----------------------------
+    # PROCESSO
+    # -----------------------------
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Sobe o processo do dashboard e abre o navegador."""
+        print(f"[DASHBOARD] Iniciando dashboard em processo separado...", flush=True)
+        self._process = self._ctx.Process(
+            target=_dashboard_process_main,
+            args=(self._queue, self._server_kwargs),
+            name="OracleWalkDashboard",
+            daemon=True,
+        )
+        self._process.start()
+        print(f"[DASHBOARD] ✅ Processo iniciado (PID: {self._process.pid})", flush=True)
+
+        if not self.open_browser:
+            return
+        # spawn reimporta pandas/flask no filho: espera um pouco mais que o modo thread
+        time.sleep(2.0)
+        try:
+            webbrowser.open(f"http://127.0.0.1:{self.port}")
+            print(f"[DASHBOARD] ✅ Navegador aberto", flush=True)
+        except Exception as e:
+            logger.warning(f"Não foi possível abrir o navegador automaticamente: {e}")
+
+    def stop(self, timeout: float = 3.0):
+        """Pede para o processo encerrar; força se não sair a tempo."""
+        if self._process is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except Exception:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            logger.warning("[DASHBOARD-IPC] Processo do dashboard não encerrou; terminando.")
+            self._process.terminate()
+            self._process.join(1.0)
+        self._process = None
@@ -0,0 +1,88 @@
+# file: oraclewalk/dashboard/serialization.py
+
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# orjson é opcional: ~10x mais rápido, já devolve bytes e escreve NaN/Inf como null.
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
+_ORJSON_OPTS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def clean_value(v: Any) -> Any:
+    """NaN/Inf → None (numpy float64 é subclasse de float, então também entra aqui)."""
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+
+def clean_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Limpa um dict raso (candle, trade, FVG, equity). Feito UMA vez, na entrada."""
+    return {k: clean_value(v) for k, v in record.items()}
+
+
+def clean(data: Any) -> Any:
+    """Versão recursiva, só para payloads aninhados vindos de fora."""
+    if isinstance(data, dict):
+        return {k: clean(v) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [clean(v) for v in data]
+    return clean_value(data)
+
+
+def _json_default(obj: Any) -> Any:
+    """Tipos numpy no caminho stdlib (o orjson já os serializa nativamente)."""
+    if isinstance(obj, np.ndarray):
+        return clean(obj.tolist())
+    if isinstance(obj, np.generic):
+        return clean_value(obj.item())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    JSON compacto em bytes. Assume dados já limpos na ingestão;
+    se ainda assim sobrar NaN no caminho stdlib, limpa e tenta de novo.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_OPTS)
+    try:
+        return json.dumps(obj, separators=(",", ":"), allow_nan=False, default=_json_default).encode()
+    except ValueError:
+        logger.debug("[DASHBOARD] Payload com NaN chegou ao serializador; limpando.")
+        return json.dumps(clean(obj), separators=(",", ":"), allow_nan=False, default=_json_default).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode()
+
+
+class EncodedCache:
+    """
+    Bytes já serializados por (nome, versão): enquanto o dado não muda,
+    todas as requisições devolvem o mesmo objeto bytes sem tocar no encoder.
+    """
+
+    def __init__(self):
+        self._items: Dict[Hashable, Tuple[Hashable, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: Hashable, version: Hashable, build: Callable[[], Any]) -> bytes:
+        hit = self._items.get(name)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        data = dumps(build())
+        with self._lock:
+            self._items[name] = (version, data)
+        return data
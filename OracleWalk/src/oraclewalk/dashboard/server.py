@@ -4,13 +4,21 @@ import os
 import sys
 import time
 import webbrowser
-from collections import deque
 from threading import Thread
-from typing import Dict, Any, Deque, List, Optional
+from typing import Dict, Any, List, Mapping, Optional, Union
 
+import numpy as np
 import pandas as pd
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
+from oraclewalk.dashboard.candle_store import CandleStore
+from oraclewalk.dashboard.downsample import CandlePyramid, lttb_candles
+from oraclewalk.dashboard.serialization import EncodedCache, clean_record, dumps, dumps_str
+from oraclewalk.dashboard.serving import conditional, install_compression, run_server
+from oraclewalk.dashboard.stores import VersionedStore
+from oraclewalk.dashboard.stream import RESYNC, EventHub, format_sse
+from oraclewalk.data.order_book import OrderBookSnapshot
 from oraclewalk.utils.logger import setup_logger
+from oraclewalk.utils.file_tail import tail_csv
 
 logger = setup_logger(__name__)
 
@@ -19,31 +27,70 @@ class DashboardServer:
     """
     Servidor para exibir dados via Lightweight Charts.
     Agora:
-      - /api/candles  → candles de preço/indicadores
+      - /api/candles  → candles de preço/indicadores (?since=<ts> → só a partir do cursor)
+      - /api/candles?from=&to=&max_points= → faixa de tempo com no máximo
+                        max_points barras (pirâmide OHLC; LTTB se ainda sobrar)
+      - /api/candles.bin → mesmo histórico em formato colunar binário (carga inicial)
       - /api/trades   → trades (para desenhar setas, SL/TP etc.)
+      - /api/stream   → Server-Sent Events: snapshot inicial + deltas
+                        (candle, trade, fvg, equity, orderbook)
+
+    Endpoints de snapshot respondem com ETag (versão do dado) e 304 para
+    If-None-Match; respostas grandes saem comprimidas (br/gzip).
+    O backend HTTP é plugável (waitress se instalado, senão werkzeug threaded).
     """
 
-    def __init__(self, max_points: int = 10000, port: int = 8000):
+    # intervalo de checagem do orderbook / heartbeat do stream (segundos)
+    STREAM_ORDERBOOK_INTERVAL = 0.3
+    STREAM_HEARTBEAT_INTERVAL = 15.0
+    # duração máxima de uma conexão /api/stream: depois disso o servidor fecha e o
+    # EventSource reconecta (snapshot novo). Libera a thread de cliente que sumiu
+    # sem o TCP avisar (o heartbeat só falha quando o buffer do socket enche).
+    STREAM_MAX_AGE = 300.0
+    STREAM_RETRY_AFTER = 5
+
+    # limite de barras por requisição em /api/candles?from=&to=
+    RANGE_DEFAULT_POINTS = 1000
+    RANGE_MAX_POINTS = 5000
+
+    def __init__(
+        self,
+        max_points: int = 10000,
+        port: int = 8000,
+        backend: str = "auto",
+        threads: int = 16,
+        host: str = "127.0.0.1",
+        max_stream_clients: Optional[int] = None,
+    ):
         # Quando empacotado com PyInstaller, os arquivos estáticos ficam em sys._MEIPASS.
         base_dir = getattr(sys, "_MEIPASS", os.path.dirname(__file__))
         static_folder = os.path.join(base_dir, "static")
 
         self.app = Flask(__name__, static_folder=static_folder, static_url_path="/static")
         self.port = port
+        self.host = host
+        self.backend = backend
+        self.threads = threads
         self.max_points = max_points
+        install_compression(self.app)
+
+        # versões para ETag (prefixo muda a cada boot → cache antigo nunca casa)
+        self._etag_boot = f"{int(time.time() * 1000):x}"
+        self._versions: Dict[str, int] = {"equity": 0, "orderbook": 0}
 
         # --- SEPARAÇÃO ESTRITA: HISTÓRICO vs LIVE ---
-        # _history_buffer: guarda APENAS candles fechados (is_closed=True)
-        self._history_buffer: Deque[Dict[str, Any]] = deque(maxlen=max_points)
-        
-        # _live_candle: guarda APENAS o candle atual em formação (is_closed=False)
-        self._live_candle: Optional[Dict[str, Any]] = None
+        # _candles: candles fechados (append-only, já sanitizados e serializados)
+        #           + o candle atual em formação (live), guardado à parte
+        self._candles = CandleStore(max_points)
+        # resoluções agregadas (4x, 16x, 64x, 256x) alimentadas a cada candle fechado
+        self._pyramid = CandlePyramid(capacity=max_points)
 
         # snapshot do livro de ordens (para /api/orderbook)
-        self._orderbook = {"bids": [], "asks": []}
+        # dict legado ou OrderBookSnapshot imutável (convertido só na requisição)
+        self._orderbook: Any = {"bids": [], "asks": []}
 
-        # buffer circular de trades
-        self._trades: Deque[Dict[str, Any]] = deque(maxlen=500)
+        # trades indexados por id (upsert O(1), ring de 500, deltas por versão)
+        self._trades = VersionedStore(maxlen=500)
         
         # Carrega trades do CSV se existir
         self._load_trades_from_csv()
@@ -54,12 +101,24 @@ class DashboardServer:
         # info de equity (saldo/pnl aberto)
         self._equity: Dict[str, Any] = self._compute_equity_from_trades()
 
-        # buffer de FVGs (lista de dicts)
-        self.fvg_buffer: List[Dict[str, Any]] = []
+        # FVGs indexados por id estável (tempo do C2 + tipo): cada recálculo
+        # grava só o que entrou/saiu/mudou e o cliente recebe o diff
+        self._fvgs = VersionedStore(maxlen=2000)
+        self._last_fvg_df: Any = None
 
         # para controlar atualização 
         self.last_candle_ts = None
 
+        # pub/sub para /api/stream (deltas só são serializados se houver cliente)
+        # cada stream ocupa uma thread do pool: metade fica livre para o REST
+        if max_stream_clients is None:
+            max_stream_clients = max(1, threads // 2)
+        self._hub = EventHub(max_subscribers=max_stream_clients)
+
+        # corpos JSON já codificados por (endpoint, versão): dados são limpos
+        # (NaN → null) na entrada, então as respostas nunca são percorridas
+        self._encoded = EncodedCache()
+
         # ------------- ROTAS -------------
         @self.app.route("/")
         def index():
@@ -67,25 +126,30 @@ class DashboardServer:
 
         @self.app.route("/api/candles")
         def api_candles():
-            # 1. Combina histórico + live (se existir)
-            raw_candles = list(self._history_buffer)
-            if self._live_candle:
-                raw_candles.append(self._live_candle)
-            
-            # 2. Filtragem e Deduplicação Estrita
-            # - Remove timestamps inválidos (<= 0)
-            # - Remove duplicatas de timestamp (mantendo o último inserido/atualizado)
-            unique_candles = {}
-            for c in raw_candles:
-                t = c.get("time", 0)
-                if t > 0:
-                    unique_candles[t] = c
-            
-            # 3. Converte volta para lista e ordena
-            final_list = list(unique_candles.values())
-            final_list.sort(key=lambda x: x["time"])
-            
-            return jsonify(self._sanitize_json(final_list))
+            args = request.args
+            if any(k in args for k in ("from", "to", "max_points")):
+                payload = self._candles_range(
+                    args.get("from", type=int),
+                    args.get("to", type=int),
+                    args.get("max_points", self.RANGE_DEFAULT_POINTS, type=int),
+                )
+                return Response(dumps(payload), mimetype="application/json")
+            since = args.get("since", type=int)
+            if since is None:
+                return conditional(self._etag("candles", self._candles.version), self._candles.json_all)
+            return conditional(
+                self._etag(f"candles-{since}", self._candles.version),
+                lambda: self._candles.json_since(since),
+            )
+
+        @self.app.route("/api/candles.bin")
+        def api_candles_bin():
+            """Formato OWC1 (ver candle_store.pack_columnar): TypedArrays por campo."""
+            return conditional(
+                self._etag("candles-bin", self._candles.version),
+                self._candles.binary_all,
+                mimetype="application/octet-stream",
+            )
 
         @self.app.route("/api/trades")
         def api_trades():
@@ -95,37 +159,214 @@ class DashboardServer:
                 - seta de saída
                 - linha pontilhada entre elas
                 - linhas de SL / TP
+
+            ?since_version=<v> → {"version", "full", "items", "removed"}
+            só com os trades alterados depois de v (full=True → substituir tudo).
             """
-            return jsonify(self._sanitize_json(list(self._trades)))
+            since = request.args.get("since_version", type=int)
+            if since is None:
+                return conditional(
+                    self._etag("trades", self._trades.version),
+                    lambda: self._encoded.get("trades", self._trades.version, self._trades.values),
+                )
+            return conditional(
+                self._etag(f"trades-{since}", self._trades.version),
+                lambda: dumps(self._trades.changes_since(since)),
+            )
 
         @self.app.route("/api/orderbook")
         def api_orderbook():
-            return jsonify(self._orderbook)
+            version = self._versions["orderbook"]
+            return conditional(self._etag("orderbook", version), lambda: self._orderbook_bytes(version))
 
         @self.app.route("/api/fvg")
         def api_fvg():
-            return jsonify(self._sanitize_json(self.fvg_buffer))
+            """
+            Lista completa de FVGs, ou com ?since_version=<v> só o diff
+            {"version", "full", "items", "removed"} (mesmo formato de /api/trades).
+            """
+            since = request.args.get("since_version", type=int)
+            if since is None:
+                return conditional(
+                    self._etag("fvg", self._fvgs.version),
+                    lambda: self._encoded.get("fvg", self._fvgs.version, self._fvgs.values),
+                )
+            return conditional(
+                self._etag(f"fvg-{since}", self._fvgs.version),
+                lambda: dumps(self._fvgs.changes_since(since)),
+            )
 
         @self.app.route("/api/equity")
         def api_equity():
-            # se não tiver equity calculada, tenta fallback via trades
-            if self._equity.get("balance") is None:
-                self._equity = self._compute_equity_from_trades()
-            return jsonify(self._sanitize_json(self._equity))
+            # versão antes do snapshot: o dado servido nunca é mais velho que a etag
+            version = self._versions["equity"]
+            equity = self._equity
+            if equity.get("balance") is None:
+                # sem equity calculada: fallback via trades só na resposta
+                # (quem escreve `_equity` é a thread do engine, não a da requisição)
+                trades_version = self._trades.version
+                return conditional(
+                    self._etag("equity-trades", trades_version),
+                    lambda: self._encoded.get("equity_trades", trades_version, self._compute_equity_from_trades),
+                )
+            return conditional(
+                self._etag("equity", version),
+                lambda: self._encoded.get("equity", version, lambda: equity),
+            )
         
+        @self.app.route("/api/stream")
+        def api_stream():
+            """
+            Server-Sent Events. Envia `snapshot` na conexão e depois só deltas:
+              candle    → candle novo/atualizado
+              trade     → trade aberto/fechado
+              fvg_diff  → {"version", "items", "removed"} dos FVGs alterados
+              equity    → snapshot de equity
+              orderbook → livro (quando a versão muda)
+
+            ?candles=0 → snapshot sem candles (o cliente carrega /api/candles.bin)
+
+            Acima de `max_stream_clients` responde 503 (o front cai para polling).
+            """
+            with_candles = request.args.get("candles", "1") != "0"
+            sub = self._hub.subscribe()
+            if sub is None:
+                logger.warning("[DASHBOARD] Limite de clientes do stream atingido; recusando conexão.")
+                return Response(
+                    "too many stream clients\n",
+                    status=503,
+                    mimetype="text/plain",
+                    headers={"Retry-After": str(self.STREAM_RETRY_AFTER)},
+                )
+
+            def generate():
+                try:
+                    yield format_sse("snapshot", self._stream_snapshot_json(with_candles))
+                    last_book = self._orderbook
+                    idle = 0.0
+                    deadline = time.monotonic() + self.STREAM_MAX_AGE
+                    while time.monotonic() < deadline:
+                        msg = sub.get(timeout=self.STREAM_ORDERBOOK_INTERVAL)
+                        if msg is RESYNC:
+                            sub.overflowed = False
+                            yield format_sse("snapshot", self._stream_snapshot_json(with_candles))
+                            last_book = self._orderbook
+                            idle = 0.0
+                            continue
+                        if msg is not None:
+                            yield msg
+                            idle = 0.0
+                        else:
+                            idle += self.STREAM_ORDERBOOK_INTERVAL
+
+                        book = self._orderbook
+                        if book is not last_book:
+                            last_book = book
+                            body = self._orderbook_bytes(self._versions["orderbook"])
+                            yield format_sse("orderbook", body.decode())
+                            idle = 0.0
+                        elif idle >= self.STREAM_HEARTBEAT_INTERVAL:
+                            yield ": ping\n\n"
+                            idle = 0.0
+                finally:
+                    self._hub.unsubscribe(sub)
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
         @self.app.route("/api/debug")
         def api_debug():
             """Endpoint de debug para verificar status do dashboard"""
             return jsonify({
-                "history_candles": len(self._history_buffer),
-                "live_candle_present": self._live_candle is not None,
+                "history_candles": len(self._candles),
+                "live_candle_present": self._candles.live is not None,
                 "trades_in_buffer": len(self._trades),
                 "fvgs_in_buffer": len(self.fvg_buffer),
+                "stream_clients": self._hub.subscriber_count,
                 "last_candle_ts": self.last_candle_ts,
                 "equity_timestamp": self._equity.get("timestamp"),
             })
 
 
+    # -----------------------------
+    # PAYLOADS (compartilhados entre polling e stream)
+    # -----------------------------
+    def _etag(self, name: str, version: int) -> str:
+        return f"{self._etag_boot}-{name}-{version}"
+
+    def _orderbook_bytes(self, version: int) -> bytes:
+        # mesmo bytes para todas as abas/polls enquanto a versão não muda
+        return self._encoded.get("orderbook", version, lambda: self._orderbook_payload(self._orderbook))
+
+    @staticmethod
+    def _orderbook_payload(book) -> Dict[str, Any]:
+        if isinstance(book, OrderBookSnapshot):
+            return book.to_dict(levels=50)
+        return book
+
+    def _candles_range(self, start: Optional[int], end: Optional[int], max_points: int) -> Dict[str, Any]:
+        """
+        Escolhe a resolução mais fina que cubra [start, end] com até max_points barras:
+        candles brutos → níveis da pirâmide → LTTB sobre o nível que cobre a faixa.
+        """
+        max_points = max(2, min(max_points, self.RANGE_MAX_POINTS))
+        end = end if end is not None else 2 ** 31
+
+        candidates = [(self._pyramid.interval, self._candles.first_closed_time, None)]
+        candidates += [(lvl.interval, lvl.data_start, lvl) for lvl in self._pyramid.snapshot_levels()]
+
+        # sem `from` (ou antes de tudo): começa no dado mais antigo disponível,
+        # senão nenhum nível "cobre" o início e a resposta cai no mais grosso
+        known = [first for _, first, _ in candidates if first is not None]
+        earliest = min(known) if known else 0
+        start = earliest if start is None else max(start, earliest)
+
+        def rows(level):
+            if level is None:
+                return self._candles.rows_between(start, end)
+            # inclui o bucket que contém `start` (alinhado ao epoch, começa antes)
+            return self._pyramid.between(level, start - start % level.interval, end)
+
+        fallback = None
+        for interval, first, level in candidates:
+            covers = first is None or first <= start
+            if not covers:
+                continue
+            data = rows(level)
+            if len(data) <= max_points:
+                return {"resolution": interval, "downsampled": False, "candles": data}
+            if fallback is None:
+                fallback = (interval, data)
+
+        if fallback is None:
+            # nenhum nível alcança `start`: usa o que vai mais longe no passado
+            interval, _, level = candidates[-1]
+            fallback = (interval, rows(level))
+        interval, data = fallback
+        return {
+            "resolution": interval,
+            "downsampled": len(data) > max_points,
+            "candles": lttb_candles(data, max_points),
+        }
+
+    def _stream_snapshot_json(self, with_candles: bool = True) -> str:
+        # candles já vêm serializados do CandleStore; o resto é pequeno
+        rest = dumps_str(
+            {
+                "trades": self._trades.values(),
+                "fvg": self._fvgs.values(),
+                "fvg_version": self._fvgs.version,
+                "equity": self._equity,
+                "orderbook": self._orderbook_payload(self._orderbook),
+            }
+        )
+        if not with_candles:
+            return rest
+        return '{"candles":' + self._candles.json_all() + "," + rest[1:]
+
     def push_candle(self, candle: Dict[str, Any]):
         """
         Lógica de Separação Estrita:
@@ -137,36 +378,63 @@ class DashboardServer:
         
         if is_closed:
             # === CANDLE FECHADO ===
-            # Adiciona ao histórico (deduplicando se necessário)
-            
-            # Verifica se já existe último candle com mesmo TS (pode acontecer reenvio)
-            if len(self._history_buffer) > 0 and self._history_buffer[-1]["time"] == ts:
-                # Atualiza (overwrite) o último fechado
-                self._history_buffer[-1] = candle
-            else:
-                # Novo candle fechado
-                self._history_buffer.append(candle)
-                
-            # Limpa o live, pois agora ele virou histórico
-            self._live_candle = None
+            # Adiciona ao histórico (mesmo TS do último → sobrescreve; reenvio)
+            # e limpa o live, pois agora ele virou histórico
+            clean = self._candles.append_closed(candle)
+            if clean is not None:
+                self._pyramid.add(clean)
             self.last_candle_ts = ts
             
             logger.info(f"[DASHBOARD] 🟡 Candle FECHADO e arquivado: {ts}")
             
         else:
             # === CANDLE LIVE (EM FORMAÇÃO) ===
-            # Só atualiza a variável temporária. NUNCA toca no buffer de histórico.
-            self._live_candle = candle
+            # Só atualiza o live. NUNCA toca no histórico.
+            clean = self._candles.set_live(candle)
             # logger.debug(f"[DASHBOARD] Live candle update: {ts}")
 
-        # Mantém tamanho do histórico
-        while len(self._history_buffer) > self.max_points:
-            self._history_buffer.popleft()
+        if clean is not None and self._hub.has_subscribers:
+            self._hub.publish("candle", clean)
 
 
+    def load_history(self, data: Union[pd.DataFrame, Mapping[str, Any]]) -> int:
+        """
+        Carga em lote do histórico (substitui N chamadas de push_candle).
+
+        data = DataFrame com índice datetime (UTC) ou coluna `time` (segundos),
+               colunas open/high/low/close/volume e indicadores opcionais;
+               ou dict de arrays com as mesmas chaves (incluindo `time`).
+        Tudo vira um único frame, serializado de uma vez no CandleStore.
+        Retorna quantos candles entraram.
+        """
+        try:
+            frame = pd.DataFrame(data) if not isinstance(data, pd.DataFrame) else data
+            if "time" not in frame.columns:
+                index = pd.DatetimeIndex(frame.index)
+                if index.tz is not None:
+                    index = index.tz_convert("UTC").tz_localize(None)
+                frame = frame.assign(time=index.as_unit("s").asi8)
+            frame = frame.reset_index(drop=True)
+            cols = ["time"] + [c for c in frame.columns if c not in ("time", "is_closed")]
+            frame = frame[cols].replace([np.inf, -np.inf], np.nan)
+            frame["time"] = frame["time"].astype("int64")
+            frame["is_closed"] = True
+
+            rows = self._candles.extend_closed(frame)
+        except Exception as e:
+            logger.warning(f"[DASHBOARD] Erro ao carregar histórico em lote: {e}")
+            return 0
+
+        if rows:
+            self._pyramid.extend(rows)
+            self.last_candle_ts = rows[-1]["time"]
+            if self._hub.has_subscribers:
+                self._hub.resync_all()
+        logger.info(f"[DASHBOARD] Histórico em lote: {len(rows)} candles (buffer={len(self._candles)})")
+        return len(rows)
+
     def _load_trades_from_csv(self):
-        """Carrega os últimos 10 trades do arquivo trades.csv."""
-        import csv
+        """Carrega os últimos 10 trades do arquivo trades.csv (lendo só o fim do arquivo)."""
         from datetime import datetime
         
         filename = "trades.csv"
@@ -174,14 +442,7 @@ class DashboardServer:
             return
 
         try:
-            trades_list = []
-            with open(filename, "r") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    trades_list.append(row)
-            
-            # Pega os últimos 10
-            last_trades = trades_list[-10:]
+            last_trades = tail_csv(filename, 10)
             
             for t in last_trades:
                 try:
@@ -215,7 +476,7 @@ class DashboardServer:
                         "sl": None,
                         "tp": None
                     }
-                    self._trades.append(trade_obj)
+                    self._store_trade(trade_obj)
                 except Exception:
                     continue
             
@@ -253,7 +514,7 @@ class DashboardServer:
         balance = self.initial_balance
         open_pnl = 0.0
         try:
-            for t in list(self._trades):
+            for t in self._trades.values():
                 qty = t.get("quantity")
                 try:
                     qty = float(qty) if qty not in (None, "") else None
@@ -290,30 +551,14 @@ class DashboardServer:
         except Exception as e:
             logger.warning(f"[DASHBOARD] Erro ao computar equity dos trades: {e}")
         equity = balance + open_pnl
-        return {
+        return clean_record({
             "balance": balance,
             "equity": equity,
             "open_pnl": open_pnl,
             "timestamp": time.time(),
-        }
+        })
 
 
-    def _sanitize_json(self, data):
-        """
-        Recursively replace NaN/Infinity with None to ensure valid JSON.
-        """
-        import math
-        
-        if isinstance(data, dict):
-            return {k: self._sanitize_json(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._sanitize_json(v) for v in data]
-        elif isinstance(data, float):
-            if math.isnan(data) or math.isinf(data):
-                return None
-            return data
-        return data
-
     # -----------------------------
     # TRADES
     # -----------------------------
@@ -335,23 +580,33 @@ class DashboardServer:
           sl          || stop_loss
           tp          || take_profit
         """
-        trade_dict = dict(trade)
-        
-        # Deduplicação baseada em time_entry
-        # Se já existe um trade com mesmo time_entry, atualiza
-        updated = False
-        for i, t in enumerate(self._trades):
-            if t.get("time_entry") == trade_dict.get("time_entry"):
-                self._trades[i] = trade_dict
-                updated = True
-                break
-        
-        if not updated:
-            self._trades.append(trade_dict)
-
-        # limite de segurança (já tem maxlen, mas deixo explícito)
-        while len(self._trades) > self._trades.maxlen:
-            self._trades.popleft()
+        # Deduplicação por id (mesmo time_entry/símbolo → atualiza o existente)
+        trade_dict = self._store_trade(trade)
+
+        if self._hub.has_subscribers:
+            self._hub.publish("trade", trade_dict)
+
+    @staticmethod
+    def _trade_key(trade: Dict[str, Any]):
+        """id explícito, senão símbolo:time_entry (ou só time_entry)."""
+        key = trade.get("id") or trade.get("trade_id")
+        if key is not None:
+            return key
+        symbol = trade.get("symbol")
+        entry = trade.get("time_entry")
+        return f"{symbol}:{entry}" if symbol else entry
+
+    def _store_trade(self, trade: Dict[str, Any]) -> Dict[str, Any]:
+        trade_dict = clean_record(trade)
+        key = self._trade_key(trade_dict)
+        trade_dict.setdefault("id", key)
+        self._trades.upsert(key, trade_dict)
+        return trade_dict
+
+    def remove_trade(self, trade_id):
+        """Remove um trade do buffer (entrada que nunca executou); o front recebe pelo delta."""
+        if self._trades.remove(trade_id) and self._hub.has_subscribers:
+            self._hub.publish("trade_removed", {"id": trade_id})
 
     def clear_trades(self):
         """Limpa todos os trades (se um dia você quiser resetar)."""
@@ -359,26 +614,25 @@ class DashboardServer:
     
     def get_buffer_size(self) -> int:
         """Retorna o tamanho atual do buffer de candles."""
-        return len(self._history_buffer)
+        return len(self._candles)
 
     # -----------------------------
     # SERVER
     # -----------------------------
+    def serve(self):
+        """Serve HTTP de forma bloqueante (thread do dashboard ou processo dedicado)."""
+        logger.info(f"Iniciando dashboard em http://{self.host}:{self.port}")
+        print(f"[DASHBOARD-THREAD] Servidor rodando em http://{self.host}:{self.port}", flush=True)
+        try:
+            run_server(self.app, self.host, self.port, backend=self.backend, threads=self.threads)
+        except Exception as e:
+            logger.error(f"[DASHBOARD] Servidor HTTP caiu: {e}")
+
     def start(self):
-        """Inicia servidor Flask em background e abre navegador."""
-        print(f"[DASHBOARD] Iniciando servidor Flask em thread separada...", flush=True)
-
-        def run():
-            logger.info(f"Iniciando dashboard em http://127.0.0.1:{self.port}")
-            print(f"[DASHBOARD-THREAD] Flask rodando em http://127.0.0.1:{self.port}", flush=True)
-            self.app.run(
-                host="127.0.0.1",
-                port=self.port,
-                debug=False,
-                use_reloader=False,
-            )
+        """Inicia o servidor HTTP em background e abre navegador."""
+        print(f"[DASHBOARD] Iniciando servidor HTTP em thread separada...", flush=True)
 
-        t = Thread(target=run, daemon=True, name="DashboardServer")
+        t = Thread(target=self.serve, daemon=True, name="DashboardServer")
         print(f"[DASHBOARD] Criando thread '{t.name}'...", flush=True)
         t.start()
         print(f"[DASHBOARD] ✅ Thread iniciada (ID: {t.ident}, Alive: {t.is_alive()})", flush=True)
@@ -395,31 +649,61 @@ class DashboardServer:
         
         print(f"[DASHBOARD] start() finalizado, retornando...", flush=True)
 
-    def set_orderbook(self, book: Dict[str, Any]):
+    def stop(self, timeout: float = 3.0):
+        """Mesma interface do DashboardPublisher; a thread HTTP é daemon e morre com o processo."""
+        return None
+
+    def set_orderbook(self, book):
         """
         Atualiza o snapshot do order book que será servido em /api/orderbook.
-        book = {"bids": [[price, qty], ...], "asks": [[price, qty], ...]}
+        book = OrderBookSnapshot (guardado por referência, sem cópia)
+            ou {"bids": [[price, qty], ...], "asks": [[price, qty], ...]}
         """
+        if isinstance(book, OrderBookSnapshot):
+            if book is not self._orderbook:
+                self._orderbook = book
+                self._versions["orderbook"] += 1
+            return
         try:
             bids = book.get("bids", [])[:50]
             asks = book.get("asks", [])[:50]
             self._orderbook = {"bids": bids, "asks": asks}
+            self._versions["orderbook"] += 1
         except Exception as e:
             logger.warning(f"[DASHBOARD] Erro ao setar orderbook: {e}")
 
+    @property
+    def fvg_buffer(self) -> List[Dict[str, Any]]:
+        """FVGs atuais (lista de dicts, ordem de inserção)."""
+        return self._fvgs.values()
+
+    @staticmethod
+    def _fvg_key(fvg: Dict[str, Any]) -> str:
+        # "id" vem da estratégia (tempo do C2 + tipo); fallback para DataFrames antigos
+        if fvg.get("id") is not None:
+            return str(fvg["id"])
+        return f"{fvg.get('start_time')}:{fvg.get('type')}"
+
     def set_fvg(self, fvgs_df: pd.DataFrame):
         """
-        Recebe DataFrame de FVGs e converte para lista de dicts.
-        Esperado: columns=['start_time', 'top', 'bottom', 'type', ...]
+        Recebe o DataFrame de FVGs (conjunto completo atual) e grava só a diferença.
+        Esperado: columns=['id', 'start_time', 'top', 'bottom', 'type', ...]
         """
+        if fvgs_df is self._last_fvg_df:
+            return
         try:
-            if fvgs_df.empty:
-                self.fvg_buffer = []
-                return
-
-            # Converte para dict
-            # orient='records' -> [{col: val}, ...]
-            self.fvg_buffer = fvgs_df.to_dict(orient="records")
+            records = [] if fvgs_df.empty else fvgs_df.to_dict(orient="records")
+            fvgs: Dict[str, Dict[str, Any]] = {}
+            for r in records:
+                fvg = clean_record(r)
+                key = self._fvg_key(fvg)
+                fvg["id"] = key
+                fvgs[key] = fvg
+
+            changed, removed = self._fvgs.sync(fvgs)
+            self._last_fvg_df = fvgs_df
+            if (changed or removed) and self._hub.has_subscribers:
+                self._hub.publish("fvg_diff", {"version": self._fvgs.version, "items": changed, "removed": removed})
         except Exception as e:
             logger.warning(f"[DASHBOARD] Erro ao setar FVG: {e}")
 
@@ -428,12 +712,15 @@ class DashboardServer:
         Armazena snapshot de equity/saldo/pnl aberto.
         """
         try:
-            self._equity = {
+            self._equity = clean_record({
                 "balance": float(balance) if balance is not None else None,
                 "equity": float(equity) if equity is not None else None,
                 "open_pnl": float(open_pnl) if open_pnl is not None else None,
                 "timestamp": ts if ts is not None else time.time(),
-            }
+            })
+            self._versions["equity"] += 1
+            if self._hub.has_subscribers:
+                self._hub.publish("equity", self._equity)
         except Exception as e:
             logger.warning(f"[DASHBOARD] Erro ao setar equity: {e}")
 
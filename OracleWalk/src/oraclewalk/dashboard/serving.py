@@ -0,0 +1,196 @@
+# file: oraclewalk/dashboard/serving.py
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple, Union
+
+from flask import Flask, Response, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Dependências opcionais: sem elas cai para o servidor do werkzeug / só gzip.
+try:
+    from waitress import serve as waitress_serve  # type: ignore
+except Exception:
+    waitress_serve = None
+
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+BACKENDS = ("auto", "waitress", "werkzeug")
+
+# respostas menores que isso não compensam o custo de comprimir
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/octet-stream",
+    "text/html",
+    "text/css",
+    "application/javascript",
+)
+
+
+def conditional(etag: str, build: Callable[[], Union[str, bytes]], mimetype: str = "application/json") -> Response:
+    """
+    Resposta com ETag (fraca, pois o corpo pode ir comprimido).
+    Se o cliente já tem essa versão (If-None-Match), devolve 304 SEM montar o corpo.
+    """
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(build(), mimetype=mimetype)
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe br (se a lib existir) ou gzip a partir do Accept-Encoding (q=0 exclui)."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0  # q inválido: trata como não aceito
+        if q > 0:
+            accepted.add(name.lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionCache:
+    """
+    LRU de corpos já comprimidos, chaveado por (ETag, encoding).
+    Várias abas pedindo o mesmo snapshot comprimem uma vez só.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: Tuple[str, str], data: bytes) -> None:
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+def install_compression(app: Flask, min_size: int = MIN_COMPRESS_SIZE, cache_entries: int = 32) -> None:
+    """
+    Registra um after_request que comprime respostas grandes (br/gzip).
+    Ignora streams (SSE), arquivos estáticos (passthrough), 304 e respostas pequenas.
+    """
+    cache = CompressionCache(cache_entries)
+
+    @app.after_request
+    def _compress(resp: Response) -> Response:
+        if (
+            resp.status_code != 200
+            or resp.direct_passthrough
+            or resp.is_streamed
+            or "Content-Encoding" in resp.headers
+            or resp.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return resp
+        resp.vary.add("Accept-Encoding")
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return resp
+        body = resp.get_data()
+        if len(body) < min_size:
+            return resp
+
+        etag, _ = resp.get_etag()
+        key = (etag, encoding) if etag else None
+        data = cache.get(key) if key else None
+        if data is None:
+            try:
+                data = compress(body, encoding)
+            except Exception as e:
+                logger.warning(f"[DASHBOARD] Falha ao comprimir resposta ({encoding}): {e}")
+                return resp
+            if key:
+                cache.put(key, data)
+
+        resp.set_data(data)
+        resp.headers["Content-Encoding"] = encoding
+        return resp
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 no servidor do werkzeug → conexões keep-alive entre polls."""
+
+    protocol_version = "HTTP/1.1"
+
+
+def resolve_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inválido: {backend!r} (use um de {BACKENDS})")
+    if backend == "auto":
+        return "waitress" if waitress_serve is not None else "werkzeug"
+    if backend == "waitress" and waitress_serve is None:
+        logger.warning("[DASHBOARD] waitress não instalado; usando servidor threaded do werkzeug.")
+        return "werkzeug"
+    return backend
+
+
+def run_server(app: Flask, host: str, port: int, backend: str = "auto", threads: int = 16) -> None:
+    """
+    Serve o app (bloqueante; chamado na thread do dashboard).
+
+    - waitress: pool fixo de `threads` workers, keep-alive nativo.
+      Cada conexão /api/stream segura um worker, por isso o pool é generoso.
+    - werkzeug: uma thread por conexão, HTTP/1.1 keep-alive.
+    """
+    chosen = resolve_backend(backend)
+    logger.info(f"[DASHBOARD] Backend HTTP: {chosen} (threads={threads})")
+
+    if chosen == "waitress":
+        waitress_serve(
+            app,
+            host=host,
+            port=port,
+            threads=threads,
+            channel_timeout=120,
+            ident="OracleWalk",
+            _quiet=True,
+        )
+        return
+
+    server = make_server(host, port, app, threaded=True, request_handler=KeepAliveRequestHandler)
+    server.daemon_threads = True
+    server.serve_forever()
@@ -13,6 +13,10 @@ let latestEquity = null;
 let positionsPanelHeight = 190;
 let lastTradesCache = [];
 
+// candles atualmente no gráfico (para aplicar deltas do stream)
+let candleStore = [];
+let pollTimer = null;
+
 // mapas para tooltip
 let ema50Map = new Map();
 let rsiMap = new Map();
@@ -824,99 +828,195 @@ function handleTrendlineClick(clicked) {
 // ======================================================
 // MAP BACKEND DATA
 // ======================================================
-function mapBackendData(data) {
-  const candles = data.map((c) => ({
+function mapCandle(c) {
+  return {
     time: Number(c.time),
     open: Number(c.open),
     high: Number(c.high),
     low: Number(c.low),
     close: Number(c.close),
     volume: c.volume != null ? Number(c.volume) : 0,
-  }));
+  };
+}
+
+function mapBackendData(data) {
+  const candles = data.map(mapCandle);
 
   const last = candles.at(-1);
   setDebug(`Candles: ${candles.length} | Vol último: ${last?.volume ?? "n/a"}`);
   return candles;
 }
 
+function volumePoint(c) {
+  return {
+    time: c.time,
+    value: c.volume,
+    color: c.close >= c.open
+      ? "rgba(38,166,154,0.7)"
+      : "rgba(239,83,80,0.7)",
+  };
+}
+
 // ======================================================
 // FETCH & UPDATE CANDLES
 // ======================================================
-async function fetchCandles() {
-  try {
-    const res = await fetch("/api/candles");
-    const raw = await res.json();
+function applyCandles(raw) {
+  if (!Array.isArray(raw) || raw.length === 0) {
+    setDebug("Nenhum dado em /api/candles");
+    return;
+  }
 
-    if (!Array.isArray(raw) || raw.length === 0) {
-      setDebug("Nenhum dado em /api/candles");
-      return;
-    }
+  const candles = mapBackendData(raw);
+  candleStore = candles;
+
+  // ===== PREÇO =====
+  const candleData = candles.map((c) => ({
+    time: c.time,
+    open: c.open,
+    high: c.high,
+    low: c.low,
+    close: c.close,
+    volume: c.volume,
+  }));
+  window.latestCandleTimes = candleData.map(c => c.time);
 
-    const candles = mapBackendData(raw);
-
-    // ===== PREÇO =====
-    const candleData = candles.map((c) => ({
-      time: c.time,
-      open: c.open,
-      high: c.high,
-      low: c.low,
-      close: c.close,
-      volume: c.volume,
-    }));
-    window.latestCandleTimes = candleData.map(c => c.time);
-
-    candleSeries.setData(candleData);
-    if (candleData.length > 0) {
-      lastPriceRef = candleData[candleData.length - 1].close;
-    }
+  candleSeries.setData(candleData);
+  if (candleData.length > 0) {
+    lastPriceRef = candleData[candleData.length - 1].close;
+  }
 
-    // ===== CALC EMA & RSI NO FRONT =====
-    const closes = candles.map(c => c.close);
+  // ===== CALC EMA & RSI NO FRONT =====
+  const closes = candles.map(c => c.close);
 
-    const ema50 = calcEMA(closes, 50);   // EMA 50 da estratégia ICT
-    const rsiVals = calcRSI(closes, 14);  // RSI 14
+  const ema50 = calcEMA(closes, 50);   // EMA 50 da estratégia ICT
+  const rsiVals = calcRSI(closes, 14);  // RSI 14
 
-    ema50Map = new Map();
-    rsiMap = new Map();
+  ema50Map = new Map();
+  rsiMap = new Map();
 
-    const ema50Data = [];
-    const rsiPoints = [];
+  const ema50Data = [];
+  const rsiPoints = [];
 
-    for (let i = 0; i < candles.length; i++) {
-      const t = candles[i].time;
+  for (let i = 0; i < candles.length; i++) {
+    const t = candles[i].time;
 
-      if (ema50[i] != null) {
-        ema50Data.push({ time: t, value: ema50[i] });
-        ema50Map.set(t, ema50[i]);
-      }
-      if (rsiVals[i] != null) {
-        rsiPoints.push({ time: t, value: rsiVals[i] });
-        rsiMap.set(t, rsiVals[i]);
-      }
+    if (ema50[i] != null) {
+      ema50Data.push({ time: t, value: ema50[i] });
+      ema50Map.set(t, ema50[i]);
+    }
+    if (rsiVals[i] != null) {
+      rsiPoints.push({ time: t, value: rsiVals[i] });
+      rsiMap.set(t, rsiVals[i]);
     }
+  }
 
-    ema50Series.setData(ema50Data);
+  ema50Series.setData(ema50Data);
 
-    // ===== VOLUME =====
-    volumeSeries.setData(
-      candles.map(c => ({
-        time: c.time,
-        value: c.volume,
-        color: c.close >= c.open
-          ? "rgba(38,166,154,0.7)"
-          : "rgba(239,83,80,0.7)",
-      }))
-    );
+  // ===== VOLUME =====
+  volumeSeries.setData(candles.map(volumePoint));
+
+  // ===== RSI =====
+  rsiSeries.setData(rsiPoints);
+
+  if (firstLoad) {
+    priceChart.timeScale().fitContent();
+    volumeChart.timeScale().fitContent();
+    rsiChart.timeScale().fitContent();
+    firstLoad = false;
+  }
+}
+
+// Delta do stream: atualiza o último candle ou acrescenta um novo
+function upsertCandle(raw) {
+  if (!candleSeries || !raw) return;
+  const c = mapCandle(raw);
+  if (!Number.isFinite(c.time) || c.time <= 0) return;
+
+  const last = candleStore.at(-1);
+  if (last && c.time < last.time) return; // fora de ordem: ignora
+
+  if (last && c.time === last.time) {
+    candleStore[candleStore.length - 1] = c;
+  } else {
+    candleStore.push(c);
+    if (Array.isArray(window.latestCandleTimes)) window.latestCandleTimes.push(c.time);
+  }
+
+  candleSeries.update(c);
+  volumeSeries.update(volumePoint(c));
+  lastPriceRef = c.close;
+
+  // indicadores: recalcula no array local e atualiza só o último ponto
+  const closes = candleStore.map(x => x.close);
+  const n = closes.length - 1;
+  const ema = calcEMA(closes, 50)[n];
+  const rsi = calcRSI(closes, 14)[n];
+  if (ema != null) {
+    ema50Series.update({ time: c.time, value: ema });
+    ema50Map.set(c.time, ema);
+  }
+  if (rsi != null) {
+    rsiSeries.update({ time: c.time, value: rsi });
+    rsiMap.set(c.time, rsi);
+  }
+}
+
+// ======================================================
+// CARGA INICIAL BINÁRIA (/api/candles.bin, formato OWC1)
+// "OWC1" | uint32 LE len | header JSON | colunas alinhadas em 8 bytes
+// ======================================================
+const OWC_ARRAYS = { u4: Uint32Array, f4: Float32Array, f8: Float64Array };
+
+function decodeCandlesBinary(buf) {
+  const view = new DataView(buf);
+  const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+  if (magic !== "OWC1") throw new Error(`formato binário desconhecido: ${magic}`);
+
+  const headerLen = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 8, headerLen)));
+  const n = header.count;
+
+  const cols = {};
+  for (const f of header.fields) {
+    cols[f.name] = new OWC_ARRAYS[f.dtype](buf, f.offset, n);
+  }
+
+  const names = Object.keys(cols);
+  const out = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const c = {};
+    for (const name of names) {
+      const v = cols[name][i];
+      c[name] = Number.isNaN(v) ? null : v;
+    }
+    out[i] = c;
+  }
+  return out;
+}
 
-    // ===== RSI =====
-    rsiSeries.setData(rsiPoints);
+async function fetchCandlesInitial() {
+  try {
+    const res = await fetch("/api/candles.bin");
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    return decodeCandlesBinary(await res.arrayBuffer());
+  } catch (err) {
+    console.warn("[OracleView] /api/candles.bin indisponível, usando JSON", err);
+    const res = await fetch("/api/candles");
+    return res.json();
+  }
+}
 
-    if (firstLoad) {
-      priceChart.timeScale().fitContent();
-      volumeChart.timeScale().fitContent();
-      rsiChart.timeScale().fitContent();
-      firstLoad = false;
+async function fetchCandles() {
+  try {
+    // depois da carga inicial, pede só a partir do último candle conhecido
+    const last = candleStore.at(-1);
+    if (!last) {
+      applyCandles(await fetchCandlesInitial());
+      return;
     }
+    const res = await fetch(`/api/candles?since=${last.time}`);
+    const raw = await res.json();
+    if (Array.isArray(raw)) raw.forEach(upsertCandle);
   } catch (err) {
     console.error("Erro ao buscar /api/candles:", err);
     setDebug("Erro fetch /api/candles (ver console)");
@@ -1098,18 +1198,46 @@ function initTabs() {
   });
 }
 
+function applyTrades(trades) {
+  if (!Array.isArray(trades)) return;
+  lastTradesCache = trades;
+  renderTradeMarkers(trades);
+  const activeTab = document.querySelector(".pos-tab.active")?.dataset?.tab || "open";
+  showTab(activeTab);
+}
+
+const tradeKey = (t) => t.id ?? t.time_entry;
+let tradesVersion = null;
+
+// Aplica trades alterados/removidos (por id; fallback time_entry)
+function mergeTrades(changed, removed = []) {
+  const byKey = new Map(lastTradesCache.map((t) => [tradeKey(t), t]));
+  removed.forEach((k) => byKey.delete(k));
+  changed.forEach((t) => byKey.set(tradeKey(t), t));
+  applyTrades(Array.from(byKey.values()));
+}
+
+// Delta do stream: substitui o trade com mesmo id ou acrescenta
+function upsertTrade(trade) {
+  if (!trade) return;
+  mergeTrades([trade]);
+}
+
 async function fetchTrades() {
   try {
-    const res = await fetch("/api/trades");
+    // depois da primeira carga, pede só o que mudou desde a última versão
+    // since_version=-1 → carga completa (full=true) já com a versão atual
+    const url = `/api/trades?since_version=${tradesVersion ?? -1}`;
+    const res = await fetch(url);
     if (!res.ok) return;
-    const trades = await res.json();
-
-    if (Array.isArray(trades)) {
-      lastTradesCache = trades;
-      renderTradeMarkers(trades);
-      const activeTab = document.querySelector(".pos-tab.active")?.dataset?.tab || "open";
-      showTab(activeTab);
+    const delta = await res.json();
+    if (Array.isArray(delta)) {
+      applyTrades(delta);
+      return;
     }
+    if (delta.full) applyTrades(delta.items);
+    else if (delta.items.length || delta.removed.length) mergeTrades(delta.items, delta.removed);
+    tradesVersion = delta.version;
   } catch (e) {
     console.error("Erro ao buscar /api/trades", e);
   }
@@ -1118,6 +1246,12 @@ async function fetchTrades() {
 // ======================================================
 // EQUITY
 // ======================================================
+function applyEquity(data) {
+  if (!data) return;
+  latestEquity = data;
+  updateEquityPanel(data);
+}
+
 async function fetchEquity() {
   try {
     const res = await fetch("/api/equity");
@@ -1129,9 +1263,7 @@ async function fetchEquity() {
       }
       return;
     }
-    const data = await res.json();
-    latestEquity = data;
-    updateEquityPanel(data);
+    applyEquity(await res.json());
   } catch (e) {
     // Fallback silencioso
     const derived = computeLocalEquity();
@@ -1303,7 +1435,8 @@ function renderTradeMarkers(trades) {
     }
   });
 
-  // Atualiza markers na série de candles
+  // Atualiza markers na série de candles (precisam estar em ordem de tempo)
+  markers.sort((a, b) => a.time - b.time);
   candleSeries.setMarkers(markers);
 
   // Log para debug
@@ -1315,45 +1448,72 @@ function renderTradeMarkers(trades) {
 // ======================================================
 // FVG FETCH
 // ======================================================
-async function fetchFVG() {
-  try {
-    const res = await fetch("/api/fvg");
-    if (!res.ok) return;
-    const raw = await res.json();
-
-    if (fvgPrimitive && Array.isArray(raw)) {
-      const candleTimes = Array.isArray(window.latestCandleTimes) ? window.latestCandleTimes : [];
-
-      function snapTime(ts) {
-        if (!Number.isFinite(ts) || candleTimes.length === 0) return ts;
-        if (candleTimes.includes(ts)) return ts;
-        // Escolhe o candle mais próximo para garantir coordenada
-        let nearest = candleTimes[0];
-        let bestDiff = Math.abs(ts - nearest);
-        for (let i = 1; i < candleTimes.length; i++) {
-          const diff = Math.abs(ts - candleTimes[i]);
-          if (diff < bestDiff) {
-            bestDiff = diff;
-            nearest = candleTimes[i];
-          }
+function applyFVG(raw) {
+  if (fvgPrimitive && Array.isArray(raw)) {
+    const candleTimes = Array.isArray(window.latestCandleTimes) ? window.latestCandleTimes : [];
+
+    function snapTime(ts) {
+      if (!Number.isFinite(ts) || candleTimes.length === 0) return ts;
+      if (candleTimes.includes(ts)) return ts;
+      // Escolhe o candle mais próximo para garantir coordenada
+      let nearest = candleTimes[0];
+      let bestDiff = Math.abs(ts - nearest);
+      for (let i = 1; i < candleTimes.length; i++) {
+        const diff = Math.abs(ts - candleTimes[i]);
+        if (diff < bestDiff) {
+          bestDiff = diff;
+          nearest = candleTimes[i];
         }
-        return nearest;
       }
+      return nearest;
+    }
+
+    // Normaliza tipos para evitar problemas de coordenada/time
+    const data = raw
+      .map(f => ({
+        ...f,
+        start_time: f.start_time != null ? snapTime(Number(f.start_time)) : null,
+        end_time: f.end_time != null ? snapTime(Number(f.end_time)) : null,
+        top: f.top != null ? Number(f.top) : null,
+        bottom: f.bottom != null ? Number(f.bottom) : null,
+        mid: f.mid != null ? Number(f.mid) : null,
+      }))
+      .filter(f => Number.isFinite(f.start_time));
+
+    fvgPrimitive.setData(data);
+  }
+}
+
+// FVGs por id estável (tempo do C2 + tipo); o servidor manda só o diff
+const fvgCache = new Map();
+let fvgVersion = null;
+
+function setFVGs(list) {
+  if (!Array.isArray(list)) return;
+  fvgCache.clear();
+  list.forEach((f) => fvgCache.set(f.id, f));
+  applyFVG(Array.from(fvgCache.values()));
+}
+
+function mergeFVG(changed, removed = []) {
+  removed.forEach((k) => fvgCache.delete(k));
+  changed.forEach((f) => fvgCache.set(f.id, f));
+  applyFVG(Array.from(fvgCache.values()));
+}
 
-      // Normaliza tipos para evitar problemas de coordenada/time
-      const data = raw
-        .map(f => ({
-          ...f,
-          start_time: f.start_time != null ? snapTime(Number(f.start_time)) : null,
-          end_time: f.end_time != null ? snapTime(Number(f.end_time)) : null,
-          top: f.top != null ? Number(f.top) : null,
-          bottom: f.bottom != null ? Number(f.bottom) : null,
-          mid: f.mid != null ? Number(f.mid) : null,
-        }))
-        .filter(f => Number.isFinite(f.start_time));
-
-      fvgPrimitive.setData(data);
+async function fetchFVG() {
+  try {
+    // since_version=-1 → carga completa (full=true) já com a versão atual
+    const res = await fetch(`/api/fvg?since_version=${fvgVersion ?? -1}`);
+    if (!res.ok) return;
+    const delta = await res.json();
+    if (Array.isArray(delta)) {
+      setFVGs(delta);
+      return;
     }
+    if (delta.full) setFVGs(delta.items);
+    else if (delta.items.length || delta.removed.length) mergeFVG(delta.items, delta.removed);
+    fvgVersion = delta.version;
   } catch (e) {
     console.error("Erro ao buscar /api/fvg", e);
   }
@@ -1368,16 +1528,84 @@ function initOracleView() {
   initTabs();
   initPositionResizer();
   showTab("open");
-  fetchCandles();
-  fetchTrades();
-  fetchFVG();
-  fetchEquity();
-  setInterval(() => {
+  if (!initStream()) startPolling();
+}
+
+// ======================================================
+// STREAM (Server-Sent Events) + fallback de polling
+// ======================================================
+function startPolling() {
+  if (pollTimer) return;
+  console.log("[OracleView] Usando polling (1s)");
+  const pollAll = () => {
     fetchCandles();
     fetchTrades();
     fetchFVG();
     fetchEquity();
-  }, 1000);
+  };
+  pollAll();
+  pollTimer = setInterval(pollAll, 1000);
+  if (!orderBookTimer) orderBookTimer = setInterval(fetchOrderBook, 300);
+}
+
+function initStream() {
+  if (!window.EventSource) return false;
+
+  // deltas de candle que chegam enquanto o histórico binário carrega
+  let pendingCandles = null;
+  const es = new EventSource("/api/stream?candles=0");
+  const on = (name, fn) => es.addEventListener(name, (ev) => {
+    try {
+      fn(JSON.parse(ev.data));
+    } catch (e) {
+      console.error(`[STREAM] Erro no evento ${name}`, e);
+    }
+  });
+
+  on("snapshot", (snap) => {
+    if (Array.isArray(snap.candles)) {
+      applyCandles(snap.candles);
+    } else if (pendingCandles === null) {
+      pendingCandles = [];
+      fetchCandlesInitial()
+        .then(applyCandles)
+        .catch((e) => console.error("[STREAM] Erro na carga inicial de candles", e))
+        .finally(() => {
+          const queued = pendingCandles || [];
+          pendingCandles = null;
+          queued.forEach(upsertCandle);
+        });
+    }
+    applyTrades(snap.trades);
+    setFVGs(snap.fvg);
+    if (snap.fvg_version != null) fvgVersion = snap.fvg_version;
+    applyEquity(snap.equity);
+    renderOrderBook(snap.orderbook);
+  });
+  on("candle", (c) => {
+    if (pendingCandles !== null) pendingCandles.push(c);
+    else upsertCandle(c);
+  });
+  on("trade", upsertTrade);
+  on("trade_removed", (d) => mergeTrades([], [d.id]));
+  on("fvg", setFVGs);
+  on("fvg_diff", (d) => {
+    mergeFVG(d.items, d.removed);
+    fvgVersion = d.version;
+  });
+  on("equity", applyEquity);
+  on("orderbook", renderOrderBook);
+
+  es.onerror = () => {
+    // EventSource reconecta sozinho (inclusive quando o servidor fecha por idade);
+    // CLOSED = resposta não-200 (rota inexistente, 503 por limite de clientes) → polling
+    if (es.readyState === EventSource.CLOSED) {
+      es.close();
+      startPolling();
+    }
+  };
+  console.log("[OracleView] Stream /api/stream iniciado");
+  return true;
 }
 
 // Garante que o init rode mesmo se o load já tiver acontecido
@@ -1390,12 +1618,11 @@ if (document.readyState === "complete" || document.readyState === "interactive")
 // ======================================================
 // ORDERBOOK
 // ======================================================
-async function fetchOrderBook() {
-  try {
-    const res = await fetch("/api/orderbook");
-    if (!res.ok) return;
-    const data = await res.json();
+let orderBookTimer = null;
 
+function renderOrderBook(data) {
+  if (!data) return;
+  try {
     const bids = data.bids || [];
     const asks = data.asks || [];
 
@@ -1469,9 +1696,17 @@ async function fetchOrderBook() {
       obLast.textContent = mid.toFixed(1);
     }
   } catch (e) {
-    console.error("Erro carregando /api/orderbook", e);
+    console.error("Erro renderizando orderbook", e);
   }
 }
 
-// atualiza a cada 300ms
-setInterval(fetchOrderBook, 300);
+async function fetchOrderBook() {
+  try {
+    const res = await fetch("/api/orderbook");
+    if (!res.ok) return;
+    renderOrderBook(await res.json());
+  } catch (e) {
+    console.error("Erro carregando /api/orderbook", e);
+  }
+}
+// polling do orderbook (300ms) só é ligado em startPolling(); no stream chega via evento
@@ -0,0 +1,128 @@
+# file: oraclewalk/dashboard/stores.py
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+
+class VersionedStore:
+    """
+    Coleção chaveada com versionamento, para deltas do dashboard.
+
+    - `_items`: OrderedDict chave → item, em ordem de inserção (ring: ao passar
+      de `maxlen` o mais antigo sai e vira tombstone).
+    - `_touched`: OrderedDict chave → versão, em ordem de modificação
+      (move_to_end a cada upsert), então `changes_since(v)` percorre só o
+      final até achar uma versão <= v.
+    - Remoções ficam num deque limitado de tombstones; se o cliente está
+      mais atrasado do que o histórico guardado, recebe `full=True`.
+    Upsert, remoção e despejo são O(1).
+    """
+
+    def __init__(self, maxlen: int = 500, max_tombstones: Optional[int] = None):
+        self.maxlen = maxlen
+        self.version = 0
+        self._items: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._touched: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._tombstones: Deque[Tuple[int, Hashable]] = deque(maxlen=max_tombstones or 2 * maxlen)
+        # versões <= _floor não conseguem mais ser respondidas com delta
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        return self._items.get(key)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._items.values())
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._items.keys())
+
+    # -----------------------------
+    # ESCRITA
+    # -----------------------------
+    def upsert(self, key: Hashable, item: Dict[str, Any]) -> int:
+        """Insere/substitui `item` (mantém a posição original se já existia)."""
+        with self._lock:
+            self.version += 1
+            self._items[key] = item
+            self._touched[key] = self.version
+            self._touched.move_to_end(key)
+            while len(self._items) > self.maxlen:
+                old_key, _ = self._items.popitem(last=False)
+                self._forget(old_key)
+            return self.version
+
+    def remove(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._items:
+                return False
+            self.version += 1
+            del self._items[key]
+            self._forget(key)
+            return True
+
+    def sync(self, items: Dict[Hashable, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Hashable]]:
+        """
+        Torna a coleção igual a `items` (chave → item) gravando só a diferença:
+        upsert do que é novo/mudou e remoção do que sumiu.
+        Retorna (alterados, chaves_removidas).
+        """
+        removed = [key for key in self.keys() if key not in items]
+        for key in removed:
+            self.remove(key)
+        changed: List[Dict[str, Any]] = []
+        for key, item in items.items():
+            if self._items.get(key) != item:
+                self.upsert(key, item)
+                changed.append(item)
+        return changed, removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._items.clear()
+            self._touched.clear()
+            self._tombstones.clear()
+            self._floor = self.version
+
+    def _forget(self, key: Hashable) -> None:
+        self._touched.pop(key, None)
+        if len(self._tombstones) == self._tombstones.maxlen:
+            self._floor = self._tombstones[0][0]
+        self._tombstones.append((self.version, key))
+
+    # -----------------------------
+    # LEITURA
+    # -----------------------------
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """
+        {"version", "full", "items", "removed"}.
+        full=True → `items` é a coleção inteira e o cliente deve substituir tudo.
+        """
+        with self._lock:
+            if since < self._floor or since > self.version:
+                return {"version": self.version, "full": True, "items": list(self._items.values()), "removed": []}
+
+            changed: List[Hashable] = []
+            for key in reversed(self._touched):
+                if self._touched[key] <= since:
+                    break
+                changed.append(key)
+            changed.reverse()
+
+            removed = [key for ver, key in self._tombstones if ver > since and key not in self._items]
+            return {
+                "version": self.version,
+                "full": False,
+                "items": [self._items[k] for k in changed],
+                "removed": removed,
+            }
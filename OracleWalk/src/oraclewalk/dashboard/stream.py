@@ -0,0 +1,105 @@
+# file: oraclewalk/dashboard/stream.py
+
+import threading
+from queue import Queue, Full, Empty
+from typing import Any, List, Optional
+
+from oraclewalk.dashboard.serialization import dumps_str
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Marcador colocado na fila quando o cliente ficou para trás e precisa de snapshot novo
+RESYNC = object()
+
+
+def format_sse(event: str, data: str) -> str:
+    """Formata uma mensagem Server-Sent Events (`data` já em JSON)."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class Subscriber:
+    """Fila de um cliente conectado em /api/stream."""
+
+    def __init__(self, max_queue: int):
+        self.queue: Queue = Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> Optional[Any]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class EventHub:
+    """
+    Pub/sub em memória para o streaming do dashboard.
+
+    - `publish` serializa o evento UMA vez e entrega para todas as filas
+      (put_nowait: o engine nunca bloqueia por causa de um navegador lento).
+    - Sem clientes conectados, `publish` não faz nada.
+    - Se a fila de um cliente enche, ela é esvaziada e recebe RESYNC:
+      o stream reenvia o snapshot completo em vez de acumular deltas.
+    - `max_subscribers` limita clientes simultâneos: cada stream prende uma
+      thread do servidor HTTP, então acima do limite `subscribe` devolve None.
+    """
+
+    def __init__(self, max_queue: int = 1000, max_subscribers: Optional[int] = None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subs: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subs)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """Novo cliente, ou None se já há `max_subscribers` conectados."""
+        sub = Subscriber(self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subs) >= self.max_subscribers:
+                return None
+            self._subs = self._subs + [sub]
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+
+    def publish(self, event: str, payload: Any) -> None:
+        subs = self._subs
+        if not subs:
+            return
+        try:
+            msg = format_sse(event, dumps_str(payload))
+        except Exception as e:
+            logger.warning(f"[STREAM] Falha ao serializar evento {event}: {e}")
+            return
+        for sub in subs:
+            self._offer(sub, msg)
+
+    def resync_all(self) -> None:
+        """Força snapshot novo em todos os clientes (ex.: após carga em lote)."""
+        for sub in self._subs:
+            self._offer(sub, RESYNC)
+
+    @staticmethod
+    def _offer(sub: Subscriber, msg: Any) -> None:
+        if sub.overflowed:
+            return
+        try:
+            sub.queue.put_nowait(msg)
+        except Full:
+            sub.overflowed = True
+            while True:
+                try:
+                    sub.queue.get_nowait()
+                except Empty:
+                    break
+            sub.queue.put_nowait(RESYNC)
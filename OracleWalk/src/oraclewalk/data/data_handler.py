@@ -1,9 +1,10 @@
 # file: oraclewalk/data/data_handler.py
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Optional
 import pandas as pd
 from binance.client import Client
+from oraclewalk.data.resampler import resample_ohlcv
 from oraclewalk.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -46,3 +47,27 @@ class HistoricalDataHandler:
 
         df.set_index("datetime", inplace=True)
         return df
+
+    def get_ohlcv_multi(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        timeframes: Iterable[str] = (),
+        base_timeframe: str = "1m",
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Baixa o timeframe base UMA vez e monta os demais por reamostragem
+        (mesmos buckets da Binance). Retorna {timeframe: DataFrame}.
+        """
+        original = self.timeframe
+        self.timeframe = base_timeframe
+        try:
+            base = self.get_ohlcv(start, end)
+        finally:
+            self.timeframe = original
+
+        out = {base_timeframe: base}
+        for tf in timeframes:
+            if tf != base_timeframe:
+                out[tf] = resample_ohlcv(base, tf)
+        return out
@@ -0,0 +1,336 @@
+# file: oraclewalk/data/order_book.py
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sortedcontainers import SortedDict
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _frozen(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+@dataclass(frozen=True, eq=False)
+class OrderBookSnapshot:
+    """
+    Visão imutável e versionada dos melhores níveis do livro.
+
+    Arrays NumPy somente-leitura: pode ser repassada entre threads sem cópia.
+    Profundidade acumulada (qty e notional) já vem pronta, então
+    imbalance e VWAP-até-tamanho são O(1) / O(log k).
+    """
+
+    version: int
+    bid_px: np.ndarray
+    bid_qty: np.ndarray
+    ask_px: np.ndarray
+    ask_qty: np.ndarray
+    bid_cum: np.ndarray
+    ask_cum: np.ndarray
+    bid_notional_cum: np.ndarray
+    ask_notional_cum: np.ndarray
+    bid_total: float = 0.0
+    ask_total: float = 0.0
+
+    @classmethod
+    def from_levels(
+        cls,
+        version: int,
+        bids: List[Tuple[float, float]],
+        asks: List[Tuple[float, float]],
+        bid_total: float = 0.0,
+        ask_total: float = 0.0,
+    ) -> "OrderBookSnapshot":
+        b = np.array(bids, dtype=np.float64).reshape(-1, 2)
+        a = np.array(asks, dtype=np.float64).reshape(-1, 2)
+        bid_px, bid_qty = b[:, 0].copy(), b[:, 1].copy()
+        ask_px, ask_qty = a[:, 0].copy(), a[:, 1].copy()
+        return cls(
+            version=version,
+            bid_px=_frozen(bid_px),
+            bid_qty=_frozen(bid_qty),
+            ask_px=_frozen(ask_px),
+            ask_qty=_frozen(ask_qty),
+            bid_cum=_frozen(np.cumsum(bid_qty)),
+            ask_cum=_frozen(np.cumsum(ask_qty)),
+            bid_notional_cum=_frozen(np.cumsum(bid_px * bid_qty)),
+            ask_notional_cum=_frozen(np.cumsum(ask_px * ask_qty)),
+            bid_total=float(bid_total),
+            ask_total=float(ask_total),
+        )
+
+    @classmethod
+    def empty(cls, version: int = 0) -> "OrderBookSnapshot":
+        return cls.from_levels(version, [], [])
+
+    # -----------------------------
+    # AGREGADOS
+    # -----------------------------
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_px[0]) if len(self.bid_px) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_px[0]) if len(self.ask_px) else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not len(self.bid_px) or not len(self.ask_px):
+            return None
+        return (float(self.bid_px[0]) + float(self.ask_px[0])) / 2.0
+
+    def imbalance(self, levels: Optional[int] = None) -> float:
+        """
+        (bid - ask) / (bid + ask) nos primeiros `levels` níveis
+        (None = todos os níveis do snapshot). Retorna 0.0 se livro vazio.
+        """
+        bid = self._cum_at(self.bid_cum, levels)
+        ask = self._cum_at(self.ask_cum, levels)
+        total = bid + ask
+        return (bid - ask) / total if total > 0 else 0.0
+
+    def book_imbalance(self) -> float:
+        """Imbalance do livro inteiro (totais mantidos incrementalmente)."""
+        total = self.bid_total + self.ask_total
+        return (self.bid_total - self.ask_total) / total if total > 0 else 0.0
+
+    @staticmethod
+    def _cum_at(cum: np.ndarray, levels: Optional[int]) -> float:
+        if not len(cum):
+            return 0.0
+        if levels is None or levels >= len(cum):
+            return float(cum[-1])
+        if levels <= 0:
+            return 0.0
+        return float(cum[levels - 1])
+
+    def vwap_to_size(self, side: str, qty: float) -> Tuple[Optional[float], float]:
+        """
+        Preço médio para executar `qty` a mercado.
+        side "buy" consome asks, "sell" consome bids.
+        Retorna (vwap, qty_preenchida); vwap None se não houver liquidez.
+        """
+        is_buy = side.lower() in ("buy", "long")
+        px = self.ask_px if is_buy else self.bid_px
+        cum = self.ask_cum if is_buy else self.bid_cum
+        notional = self.ask_notional_cum if is_buy else self.bid_notional_cum
+
+        if qty <= 0 or not len(cum):
+            return None, 0.0
+
+        idx = int(np.searchsorted(cum, qty, side="left"))
+        if idx >= len(cum):
+            filled = float(cum[-1])
+            return float(notional[-1]) / filled, filled
+
+        prev_qty = float(cum[idx - 1]) if idx > 0 else 0.0
+        prev_notional = float(notional[idx - 1]) if idx > 0 else 0.0
+        cost = prev_notional + (qty - prev_qty) * float(px[idx])
+        return cost / qty, float(qty)
+
+    def to_dict(self, levels: Optional[int] = None) -> Dict[str, Any]:
+        """Formato do /api/orderbook: listas [price, qty] + agregados."""
+        n_b = len(self.bid_px) if levels is None else min(levels, len(self.bid_px))
+        n_a = len(self.ask_px) if levels is None else min(levels, len(self.ask_px))
+        return {
+            "version": self.version,
+            "bids": np.column_stack((self.bid_px[:n_b], self.bid_qty[:n_b])).tolist(),
+            "asks": np.column_stack((self.ask_px[:n_a], self.ask_qty[:n_a])).tolist(),
+            "bid_cum": self.bid_cum[:n_b].tolist(),
+            "ask_cum": self.ask_cum[:n_a].tolist(),
+            "imbalance": self.imbalance(levels),
+            "book_imbalance": self.book_imbalance(),
+        }
+
+
+class LocalOrderBook:
+    """
+    Livro de ofertas local mantido a partir de snapshot REST + diffs do WS.
+
+    Segue o procedimento da Binance para `<symbol>@depth`:
+      1. Diffs recebidos antes do snapshot ficam num buffer.
+      2. Snapshot REST (`lastUpdateId`) carrega o livro.
+      3. Descarta diffs com `u <= lastUpdateId`.
+      4. O primeiro diff aplicado precisa ter `U <= lastUpdateId + 1 <= u`.
+      5. Cada diff seguinte precisa ter `U == u_anterior + 1`; se não tiver,
+         o livro fica dessincronizado (`synced=False`) e precisa de novo snapshot.
+      6. Quantidade 0 remove o nível de preço.
+
+    Níveis guardados em SortedDict: update O(log n), top-k O(k).
+    Totais de cada lado são mantidos incrementalmente e cada mudança
+    incrementa `version`; `snapshot(k)` reaproveita a mesma visão imutável
+    enquanto a versão não muda.
+    """
+
+    def __init__(self, symbol: str = ""):
+        self.symbol = symbol
+        # bids ordenados por preço decrescente (chave negativa), asks crescente
+        self._bids: SortedDict = SortedDict(lambda p: -p)
+        self._asks: SortedDict = SortedDict()
+
+        self._bid_total = 0.0
+        self._ask_total = 0.0
+
+        self.last_update_id: Optional[int] = None
+        self.synced = False
+        self.version = 0
+        self._first_applied = False
+        self._pending: List[Dict[str, Any]] = []
+        self._snapshot_cache: Optional[Tuple[int, int, OrderBookSnapshot]] = None
+
+    # -----------------------------
+    # SNAPSHOT / RESYNC
+    # -----------------------------
+    def reset(self) -> None:
+        """Limpa o livro e volta ao estado 'aguardando snapshot'."""
+        self._bids.clear()
+        self._asks.clear()
+        self._bid_total = 0.0
+        self._ask_total = 0.0
+        self.last_update_id = None
+        self.synced = False
+        self.version += 1
+        self._first_applied = False
+        self._pending = []
+
+    def load_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Carrega o snapshot REST (`GET /api/v3/depth`) e aplica os diffs
+        que ficaram no buffer enquanto o snapshot era baixado.
+        """
+        pending = self._pending
+        self._bids.clear()
+        self._asks.clear()
+        self._bid_total = 0.0
+        self._ask_total = 0.0
+        self._pending = []
+
+        for p, q in snapshot.get("bids", []):
+            self._bid_total += self._set_level(self._bids, float(p), float(q))
+        for p, q in snapshot.get("asks", []):
+            self._ask_total += self._set_level(self._asks, float(p), float(q))
+
+        self.last_update_id = int(snapshot["lastUpdateId"])
+        self.synced = True
+        self.version += 1
+        self._first_applied = False
+
+        for msg in pending:
+            if not self.apply_diff(msg):
+                if not self.synced:
+                    break
+
+    def buffer_diff(self, msg: Dict[str, Any]) -> None:
+        """Guarda um diff recebido antes do snapshot."""
+        self._pending.append(msg)
+
+    # -----------------------------
+    # DIFFS
+    # -----------------------------
+    def apply_diff(self, msg: Dict[str, Any]) -> bool:
+        """
+        Aplica um `depthUpdate`. Retorna True se aplicado.
+        Sem snapshot o diff vai para o buffer; diffs antigos são ignorados;
+        buraco na sequência marca `synced=False`.
+        """
+        first_id = int(msg["U"])
+        final_id = int(msg["u"])
+
+        if self.last_update_id is None:
+            self.buffer_diff(msg)
+            return False
+
+        if not self.synced:
+            return False
+
+        if final_id <= self.last_update_id:
+            return False
+
+        expected = self.last_update_id + 1
+        if not self._first_applied:
+            ok = first_id <= expected <= final_id
+        else:
+            ok = first_id == expected
+
+        if not ok:
+            logger.warning(
+                f"[ORDERBOOK] Gap de sequência em {self.symbol}: "
+                f"esperado U={expected}, recebido U={first_id} u={final_id}"
+            )
+            self.synced = False
+            return False
+
+        for p, q in msg.get("b", []):
+            self._bid_total += self._set_level(self._bids, float(p), float(q))
+        for p, q in msg.get("a", []):
+            self._ask_total += self._set_level(self._asks, float(p), float(q))
+
+        self.last_update_id = final_id
+        self.version += 1
+        self._first_applied = True
+        return True
+
+    @staticmethod
+    def _set_level(side: SortedDict, price: float, qty: float) -> float:
+        """Atualiza o nível e retorna a variação de quantidade total do lado."""
+        if qty == 0.0:
+            return -side.pop(price, 0.0)
+        old = side.get(price, 0.0)
+        side[price] = qty
+        return qty - old
+
+    # -----------------------------
+    # LEITURA
+    # -----------------------------
+    @staticmethod
+    def _top(side: SortedDict, k: int) -> List[List[float]]:
+        items = side.items()
+        return [[p, q] for p, q in items[:k]]
+
+    def top(self, k: int) -> Dict[str, List[List[float]]]:
+        """Melhores k níveis de cada lado (bids decrescente, asks crescente)."""
+        return {"bids": self._top(self._bids, k), "asks": self._top(self._asks, k)}
+
+    def snapshot(self, k: int) -> OrderBookSnapshot:
+        """
+        Visão imutável dos melhores k níveis. Reutilizada (sem cópia)
+        enquanto `version` não mudar.
+        """
+        cached = self._snapshot_cache
+        if cached is not None and cached[0] == self.version and cached[1] == k:
+            return cached[2]
+        snap = OrderBookSnapshot.from_levels(
+            self.version,
+            self._bids.items()[:k],
+            self._asks.items()[:k],
+            bid_total=self._bid_total,
+            ask_total=self._ask_total,
+        )
+        self._snapshot_cache = (self.version, k, snap)
+        return snap
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self._bids.peekitem(0) if self._bids else None
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self._asks.peekitem(0) if self._asks else None
+
+    def depth(self) -> Tuple[int, int]:
+        return len(self._bids), len(self._asks)
+
+
+def replay_diffs(
+    book: LocalOrderBook, snapshot: Dict[str, Any], diffs: Iterable[Dict[str, Any]]
+) -> LocalOrderBook:
+    """Carrega snapshot e aplica uma sequência gravada de diffs (útil para testes)."""
+    book.load_snapshot(snapshot)
+    for msg in diffs:
+        book.apply_diff(msg)
+    return book
@@ -2,46 +2,113 @@
 # file: oraclewalk/data/orderbook_data.py
 
 import threading
-from queue import Queue, Empty
 from typing import Optional, Dict, Any
 
 from binance import ThreadedWebsocketManager
+from binance.client import Client
+from oraclewalk.data.order_book import LocalOrderBook, OrderBookSnapshot
 from oraclewalk.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
 class OrderBookHandler:
-    def __init__(self, api_key: str, api_secret: str, symbol: str, limit: int = 25):
+    """
+    Mantém um livro local correto: snapshot REST + diffs sequenciados do
+    stream `<symbol>@depth@100ms`. Em caso de buraco na sequência (U/u),
+    baixa um novo snapshot em background (resync) sem travar o WS.
+    Snapshot com erro (ex.: 429/418) ou desatualizado é refeito na mesma
+    thread com backoff exponencial (até `resync_max_backoff` segundos).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        symbol: str,
+        limit: int = 25,
+        snapshot_limit: int = 1000,
+        resync_backoff: float = 1.0,
+        resync_max_backoff: float = 60.0,
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
         self.symbol = symbol
         self.limit = limit
+        self.snapshot_limit = snapshot_limit
+        self.resync_backoff = resync_backoff
+        self.resync_max_backoff = resync_max_backoff
 
         self._twm: Optional[ThreadedWebsocketManager] = None
         self._thread: Optional[threading.Thread] = None
+        self._client: Optional[Client] = None
 
-        self._last_book: Dict[str, Any] = {"bids": [], "asks": []}
+        self._book = LocalOrderBook(symbol)
         self._lock = threading.Lock()
+        self._resyncing = False
+        self._stop = threading.Event()
+        self.resync_count = 0
+
+    def _fetch_snapshot(self) -> Dict[str, Any]:
+        if self._client is None:
+            self._client = Client(self.api_key, self.api_secret)
+        return self._client.get_order_book(symbol=self.symbol, limit=self.snapshot_limit)
+
+    def _resync(self):
+        """Baixa snapshot REST e reaplica os diffs bufferizados; repete com backoff até sincronizar."""
+        delay = 0.0
+        try:
+            while not self._stop.is_set():
+                # o livro já está resetado: diffs novos vão para o buffer durante a espera
+                if delay and self._stop.wait(delay):
+                    return
+                try:
+                    snapshot = self._fetch_snapshot()
+                    with self._lock:
+                        self._book.load_snapshot(snapshot)
+                        synced = self._book.synced
+                    if synced:
+                        logger.info(
+                            f"[ORDERBOOK] Livro sincronizado (lastUpdateId={self._book.last_update_id})"
+                        )
+                        return
+                    problem = "Snapshot desatualizado em relação ao buffer"
+                except Exception as e:
+                    problem = f"Erro ao baixar snapshot: {e}"
+
+                delay = min(max(delay * 2, self.resync_backoff), self.resync_max_backoff)
+                logger.warning(f"[ORDERBOOK] {problem}; nova tentativa em {delay:.1f}s")
+                with self._lock:
+                    self.resync_count += 1
+                    self._book.reset()
+        finally:
+            self._resyncing = False
+
+    def _schedule_resync(self):
+        with self._lock:
+            if self._resyncing:
+                return
+            self._resyncing = True
+            self.resync_count += 1
+            self._book.reset()
+        threading.Thread(target=self._resync, daemon=True, name="OrderBookResync").start()
 
     def _process_depth(self, msg):
         """
-        msg['b'] = bids  (lista de [price, qty])
+        msg['U'] / msg['u'] = primeiro / último update id do diff
+        msg['b'] = bids  (lista de [price, qty]), qty 0 remove o nível
         msg['a'] = asks
         """
         try:
             if msg.get("e") != "depthUpdate":
                 return
 
-            bids = msg.get("b", [])[: self.limit]
-            asks = msg.get("a", [])[: self.limit]
-
-            # converte para float
-            bids = [[float(p), float(q)] for p, q in bids]
-            asks = [[float(p), float(q)] for p, q in asks]
-
             with self._lock:
-                self._last_book = {"bids": bids, "asks": asks}
+                self._book.apply_diff(msg)
+                lost_sync = self._book.last_update_id is not None and not self._book.synced
+
+            if lost_sync:
+                self._schedule_resync()
 
         except Exception as e:
             logger.warning(f"[ORDERBOOK] Erro depthUpdate: {e}")
@@ -55,25 +122,36 @@ class OrderBookHandler:
                 self._twm.start()
 
                 self._twm.start_depth_socket(
-                    callback=self._process_depth, symbol=self.symbol
+                    callback=self._process_depth, symbol=self.symbol, interval=100
                 )
             except Exception as e:
                 logger.error(f"[ORDERBOOK] Erro ao iniciar TWM depth: {e}")
+                return
+
+            # diffs já estão sendo bufferizados; agora baixa o snapshot
+            self._schedule_resync()
 
         self._thread = threading.Thread(target=_run, daemon=True)
         self._thread.start()
 
     def stop(self):
+        self._stop.set()
         try:
             if self._twm:
                 self._twm.stop()
         except Exception:
             pass
 
-    def get_snapshot(self) -> Dict[str, Any]:
-        # cópia segura
+    def get_book(self) -> OrderBookSnapshot:
+        """
+        Visão imutável/versionada dos melhores `limit` níveis com profundidade
+        acumulada e imbalance. Pode ser repassada a outras threads sem cópia.
+        """
         with self._lock:
-            return {
-                "bids": list(self._last_book["bids"]),
-                "asks": list(self._last_book["asks"]),
-            }
+            if not self._book.synced:
+                return OrderBookSnapshot.empty(self._book.version)
+            return self._book.snapshot(self.limit)
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        # formato legado: {"bids": [[p, q], ...], "asks": [[p, q], ...], ...agregados}
+        return self.get_book().to_dict()
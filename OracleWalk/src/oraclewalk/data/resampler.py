@@ -0,0 +1,223 @@
+# file: oraclewalk/data/resampler.py
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Semanas da Binance começam na segunda 00:00 UTC; o epoch (1970-01-01) foi quinta.
+_WEEK_OFFSET = 4 * 86400
+
+Candle = Dict[str, Any]
+Callback = Callable[[str, Candle], None]
+
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """'1m' → 60, '4h' → 14400, '1d' → 86400, '1w' → 604800."""
+    tf = (timeframe or "").strip()
+    try:
+        n = int(tf[:-1])
+        unit = _UNIT_SECONDS[tf[-1]]
+    except (ValueError, KeyError, IndexError):
+        raise ValueError(f"Timeframe não suportado: {timeframe!r}") from None
+    if n <= 0:
+        raise ValueError(f"Timeframe não suportado: {timeframe!r}")
+    return n * unit
+
+
+def bucket_start(ts: int, seconds: int) -> int:
+    """Início do bucket de `seconds` que contém `ts` (alinhado como a Binance)."""
+    if seconds % _UNIT_SECONDS["w"] == 0:
+        return ts - (ts - _WEEK_OFFSET) % seconds
+    return ts - ts % seconds
+
+
+def _candle_ts(candle: Candle) -> int:
+    dt = candle.get("datetime")
+    if isinstance(dt, datetime):
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+    return int(candle["time"])
+
+
+def _new_bar(start: int, candle: Candle) -> Candle:
+    return {
+        "datetime": datetime.fromtimestamp(start, tz=timezone.utc).replace(tzinfo=None),
+        "open": candle["open"],
+        "high": candle["high"],
+        "low": candle["low"],
+        "close": candle["close"],
+        "volume": candle.get("volume", 0.0) or 0.0,
+    }
+
+
+def _merge(bar: Candle, candle: Candle) -> Candle:
+    bar["high"] = max(bar["high"], candle["high"])
+    bar["low"] = min(bar["low"], candle["low"])
+    bar["close"] = candle["close"]
+    bar["volume"] += candle.get("volume", 0.0) or 0.0
+    return bar
+
+
+class _TimeframeState:
+    """Estado de um timeframe alvo: barra acumulada só com candles base FECHADOS."""
+
+    def __init__(self, timeframe: str, seconds: int):
+        self.timeframe = timeframe
+        self.seconds = seconds
+        self.start: Optional[int] = None
+        self.closed_acc: Optional[Candle] = None
+        self.partial: Optional[Candle] = None
+
+
+class CandleResampler:
+    """
+    Monta timeframes maiores a partir do stream base (ex.: 1m) incrementalmente.
+
+    - Buckets alinhados ao epoch (semana na segunda-feira, como a Binance).
+    - Cada timeframe guarda o agregado dos candles base fechados + a barra
+      parcial (agregado + candle base em formação), emitida com is_closed=False.
+    - A barra fecha quando chega o último candle base do bucket; se o stream
+      pular para outro bucket (gap/reconexão), a anterior é fechada à força
+      com `forced=True`.
+    - `subscribe(tf, cb)` recebe cb(timeframe, candle) no mesmo formato do
+      LiveDataHandler (datetime, OHLCV, is_closed). O timeframe base também
+      pode ser assinado (repasse direto).
+    """
+
+    def __init__(self, base_timeframe: str = "1m", timeframes: Iterable[str] = ()):
+        self.base_timeframe = base_timeframe
+        self.base_seconds = timeframe_to_seconds(base_timeframe)
+        self._states: Dict[str, _TimeframeState] = {}
+        self._subs: Dict[str, List[Callback]] = defaultdict(list)
+        for tf in timeframes:
+            self.add_timeframe(tf)
+
+    def add_timeframe(self, timeframe: str) -> None:
+        if timeframe == self.base_timeframe or timeframe in self._states:
+            return
+        seconds = timeframe_to_seconds(timeframe)
+        if seconds % self.base_seconds != 0:
+            raise ValueError(f"{timeframe} não é múltiplo do timeframe base {self.base_timeframe}")
+        self._states[timeframe] = _TimeframeState(timeframe, seconds)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return [self.base_timeframe] + list(self._states)
+
+    def subscribe(self, timeframe: str, callback: Callback) -> None:
+        self.add_timeframe(timeframe)
+        self._subs[timeframe].append(callback)
+
+    def partial(self, timeframe: str) -> Optional[Candle]:
+        """Barra em formação do timeframe (cópia) ou None."""
+        state = self._states.get(timeframe)
+        if state is None or state.partial is None:
+            return None
+        return dict(state.partial)
+
+    def _emit(self, timeframe: str, bar: Candle) -> None:
+        for cb in self._subs.get(timeframe, ()):
+            try:
+                cb(timeframe, bar)
+            except Exception as e:
+                logger.warning(f"[RESAMPLER] Erro no callback de {timeframe}: {e}")
+
+    def update(self, candle: Candle) -> List[Candle]:
+        """
+        Processa um candle base (fechado ou em formação).
+        Retorna as barras FECHADAS produzidas (com chave 'timeframe').
+        """
+        ts = _candle_ts(candle)
+        is_closed = bool(candle.get("is_closed", False))
+        closed_bars: List[Candle] = []
+
+        if self._subs.get(self.base_timeframe):
+            self._emit(self.base_timeframe, candle)
+
+        for tf, state in self._states.items():
+            start = bucket_start(ts, state.seconds)
+
+            if state.start is not None and start < state.start:
+                continue  # candle atrasado de um bucket já fechado
+
+            if state.start is not None and start > state.start and state.closed_acc is not None:
+                # pulou de bucket sem ver o último candle base: fecha à força
+                bar = dict(state.closed_acc, is_closed=True, forced=True, timeframe=tf)
+                closed_bars.append(bar)
+                self._emit(tf, bar)
+                state.closed_acc = None
+
+            if state.start != start:
+                state.start = start
+                state.closed_acc = None
+
+            if is_closed:
+                if state.closed_acc is None:
+                    state.closed_acc = _new_bar(start, candle)
+                else:
+                    _merge(state.closed_acc, candle)
+                state.partial = dict(state.closed_acc)
+
+                if ts + self.base_seconds >= start + state.seconds:
+                    bar = dict(state.closed_acc, is_closed=True, timeframe=tf)
+                    closed_bars.append(bar)
+                    self._emit(tf, bar)
+                    state.closed_acc = None
+                    state.partial = None
+                    state.start = start + state.seconds
+                    continue
+            else:
+                if state.closed_acc is None:
+                    state.partial = _new_bar(start, candle)
+                else:
+                    state.partial = _merge(dict(state.closed_acc), candle)
+
+            self._emit(tf, dict(state.partial, is_closed=False, timeframe=tf))
+
+        return closed_bars
+
+    def update_many(self, candles: Iterable[Candle]) -> List[Candle]:
+        out: List[Candle] = []
+        for c in candles:
+            out.extend(self.update(c))
+        return out
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str, drop_partial: bool = True) -> pd.DataFrame:
+    """
+    Reamostra um OHLCV (índice datetime UTC, colunas open/high/low/close/volume)
+    para `timeframe` com os mesmos buckets da Binance.
+
+    drop_partial=True descarta o último bucket se ainda não tem todos os candles base.
+    """
+    if df.empty:
+        return df.copy()
+
+    seconds = timeframe_to_seconds(timeframe)
+    origin = pd.Timestamp(_WEEK_OFFSET, unit="s") if seconds % _UNIT_SECONDS["w"] == 0 else "epoch"
+    index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    src = df.set_axis(index)
+
+    grouped = src.resample(f"{seconds}s", origin=origin, label="left", closed="left")
+    out = grouped.agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    counts = grouped["close"].count()
+    out = out[counts > 0]
+
+    if drop_partial and len(src) > 1 and not out.empty:
+        base = int(pd.Series(src.index).diff().dropna().min().total_seconds())
+        if base > 0 and counts[counts > 0].iloc[-1] < seconds // base:
+            out = out.iloc[:-1]
+
+    out.index.name = df.index.name
+    return out
@@ -1,10 +1,74 @@
 # file: oraclewalk/execution/execution_price_model.py
 
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from oraclewalk.data.order_book import OrderBookSnapshot
+
+
+def side_signs(sides) -> np.ndarray:
+    """+1 (buy/long) / -1 (sell/short) para um array de lados numéricos ou strings."""
+    arr = np.asarray(sides)
+    if arr.dtype.kind in ("U", "S", "O"):
+        lowered = np.char.lower(arr.astype(str))
+        return np.where(np.isin(lowered, ("buy", "long")), 1.0, -1.0)
+    return np.where(arr.astype(np.float64) >= 0, 1.0, -1.0)
+
+
+class TradeCosts(NamedTuple):
+    """Resultado vetorizado de `ExecutionPriceModel.trade_costs` (um elemento por trade)."""
+
+    entry_exec: np.ndarray  # preço de entrada com impacto + comissão (igual ao exec_buy/exec_sell)
+    exit_exec: np.ndarray
+    fees: np.ndarray  # comissão de entrada + saída, em moeda de cotação
+    pnl_gross: np.ndarray  # PnL no mid, sem custos
+    pnl_net: np.ndarray  # PnL nos preços executados (spread, slippage/impacto e comissão)
+
+
+class SyntheticDepth:
+    """
+    Livro sintético para quando não há book real (backtest / dry-run sem depth).
+
+    `levels` níveis separados por `step_pct` % do topo, cada um com
+    `level_notional` (em moeda de cotação) multiplicado por `growth` a cada
+    nível. Tudo é relativo ao topo, então as somas acumuladas são calculadas
+    uma vez só e cada estimativa é uma busca binária (aceita arrays).
+    """
+
+    def __init__(self, level_notional: float, step_pct: float = 0.01, levels: int = 50, growth: float = 1.0):
+        levels = max(1, int(levels))
+        self.offsets = np.arange(levels, dtype=np.float64) * (step_pct / 100)
+        notional = float(level_notional) * np.power(float(growth), np.arange(levels, dtype=np.float64))
+        self.cum = np.cumsum(notional)
+        self.cum_offset = np.cumsum(notional * self.offsets)
+
+    def impact(self, notional):
+        """
+        Deslocamento relativo médio (vwap / topo - 1) para consumir `notional`.
+        Além do último nível, o resto é precificado no último nível.
+        """
+        n = np.asarray(notional, dtype=np.float64)
+        idx = np.minimum(np.searchsorted(self.cum, n, side="left"), len(self.cum) - 1)
+        prev_cum = np.where(idx > 0, self.cum[idx - 1], 0.0)
+        prev_off = np.where(idx > 0, self.cum_offset[idx - 1], 0.0)
+        cost = prev_off + (n - prev_cum) * self.offsets[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.where(n > 0, cost / n, 0.0)
+        return float(out) if out.ndim == 0 else out
+
+    def vwap(self, side: str, top: float, qty: float) -> float:
+        rel = self.impact(qty * top)
+        return top * (1 + rel) if side.lower() in ("buy", "long") else top * (1 - rel)
+
+
 class ExecutionPriceModel:
     """
     Modelo de execução realista:
     - Usa bid/ask
-    - Aplica slippage
+    - Com `qty` e um book (live) ou `depth` sintético: preço = VWAP de
+      percorrer os níveis até o tamanho (busca binária na profundidade acumulada)
+    - Sem book: aplica slippage fixo sobre o topo
     - Aplica comissão maker/taker
     - Retorna preço final da execução real
     """
@@ -13,25 +77,63 @@ class ExecutionPriceModel:
         self,
         slippage_pct: float,
         commission_maker: float,
-        commission_taker: float
+        commission_taker: float,
+        depth: Optional[SyntheticDepth] = None,
     ):
         # porcentagens para fator multiplicador
         self.slippage = slippage_pct / 100
         self.com_maker = commission_maker / 100
         self.com_taker = commission_taker / 100
+        self.depth = depth
 
     # ===============================
-    # EXECUÇÃO DE COMPRA (BUY / LONG)
+    # PREÇO ANTES DA COMISSÃO
     # ===============================
 
-    def exec_buy(self, bid: float, ask: float, taker=True) -> float:
+    def fill_price(
+        self,
+        side: str,
+        bid: float,
+        ask: float,
+        qty: Optional[float] = None,
+        book: Optional[OrderBookSnapshot] = None,
+    ) -> float:
         """
-        Compra ocorre no ASK + slippage + comissão.
+        Preço médio de uma ordem a mercado de `qty`:
+        1) book real com liquidez → VWAP dos níveis; o que passar da
+           profundidade visível sai no pior nível + slippage
+        2) depth sintético → VWAP do livro sintético a partir do topo
+        3) senão → topo ± slippage fixo
         """
-        price = ask
+        is_buy = side.lower() in ("buy", "long")
+        top = ask if is_buy else bid
+        sign = 1 if is_buy else -1
+
+        if qty is not None and qty > 0:
+            if book is not None:
+                vwap, filled = book.vwap_to_size(side, qty)
+                if vwap is not None:
+                    if filled >= qty:
+                        return vwap
+                    px = book.ask_px if is_buy else book.bid_px
+                    worst = float(px[-1]) * (1 + sign * self.slippage)
+                    return (vwap * filled + worst * (qty - filled)) / qty
+            if self.depth is not None:
+                return self.depth.vwap(side, top, qty)
 
-        # aplicar slippage (sempre prejudica quem compra)
-        price *= (1 + self.slippage)
+        return top * (1 + sign * self.slippage)
+
+    # ===============================
+    # EXECUÇÃO DE COMPRA (BUY / LONG)
+    # ===============================
+
+    def exec_buy(self, bid: float, ask: float, taker=True, qty: Optional[float] = None,
+                 book: Optional[OrderBookSnapshot] = None) -> float:
+        """
+        Compra ocorre no ASK (ou VWAP dos asks até `qty`) + slippage + comissão.
+        """
+        # slippage / impacto (sempre prejudica quem compra)
+        price = self.fill_price("buy", bid, ask, qty=qty, book=book)
 
         # comissão (geralmente taker em mercado)
         if taker:
@@ -45,14 +147,13 @@ class ExecutionPriceModel:
     # EXECUÇÃO DE VENDA (SELL / SHORT)
     # ===============================
 
-    def exec_sell(self, bid: float, ask: float, taker=True) -> float:
+    def exec_sell(self, bid: float, ask: float, taker=True, qty: Optional[float] = None,
+                  book: Optional[OrderBookSnapshot] = None) -> float:
         """
-        Venda ocorre no BID - slippage - comissão.
+        Venda ocorre no BID (ou VWAP dos bids até `qty`) - slippage - comissão.
         """
-        price = bid
-
-        # aplicar slippage (sempre prejudica quem vende)
-        price *= (1 - self.slippage)
+        # slippage / impacto (sempre prejudica quem vende)
+        price = self.fill_price("sell", bid, ask, qty=qty, book=book)
 
         # comissão
         if taker:
@@ -61,3 +162,55 @@ class ExecutionPriceModel:
             price *= (1 - self.com_maker)
 
         return price
+
+    # ===============================
+    # VERSÕES VETORIZADAS (BACKTEST)
+    # ===============================
+
+    def fill_prices(self, sides, bids, asks, qty=None) -> np.ndarray:
+        """
+        `fill_price` para arrays (sem book live): topo do lado certo mais o
+        impacto do depth sintético (se houver `qty`) ou o slippage fixo.
+        """
+        sign = side_signs(sides)
+        top = np.where(sign > 0, np.asarray(asks, dtype=np.float64), np.asarray(bids, dtype=np.float64))
+        if qty is not None and self.depth is not None:
+            rel = self.depth.impact(np.asarray(qty, dtype=np.float64) * top)
+        else:
+            rel = self.slippage
+        return top * (1 + sign * rel)
+
+    def exec_prices(self, sides, bids, asks, qty=None, taker=True) -> np.ndarray:
+        """exec_buy/exec_sell para arrays: mesmo resultado, uma chamada NumPy."""
+        com = self.com_taker if taker else self.com_maker
+        return self.fill_prices(sides, bids, asks, qty) * (1 + side_signs(sides) * com)
+
+    def fees(self, prices, qty, taker=True) -> np.ndarray:
+        """Comissão em moeda de cotação sobre o notional (preço antes da comissão × qty)."""
+        com = self.com_taker if taker else self.com_maker
+        return np.abs(np.asarray(prices, dtype=np.float64) * np.asarray(qty, dtype=np.float64)) * com
+
+    def trade_costs(self, sides, entry_bid, entry_ask, exit_bid, exit_ask, qty=1.0, taker=True) -> TradeCosts:
+        """
+        Custos de trades fechados de uma vez: `sides` é o lado da entrada
+        (+1/-1 ou strings); a saída executa no lado oposto. `pnl_net` bate
+        com o `pnl_exec` que o TradeExecutor calcula trade a trade.
+        """
+        sign = side_signs(sides)
+        qty = np.asarray(qty, dtype=np.float64)
+        com = self.com_taker if taker else self.com_maker
+
+        entry_fill = self.fill_prices(sign, entry_bid, entry_ask, qty)
+        exit_fill = self.fill_prices(-sign, exit_bid, exit_ask, qty)
+        entry_exec = entry_fill * (1 + sign * com)
+        exit_exec = exit_fill * (1 - sign * com)
+
+        entry_mid = (np.asarray(entry_bid, dtype=np.float64) + np.asarray(entry_ask, dtype=np.float64)) / 2
+        exit_mid = (np.asarray(exit_bid, dtype=np.float64) + np.asarray(exit_ask, dtype=np.float64)) / 2
+        return TradeCosts(
+            entry_exec=entry_exec,
+            exit_exec=exit_exec,
+            fees=self.fees(entry_fill, qty, taker) + self.fees(exit_fill, qty, taker),
+            pnl_gross=sign * (exit_mid - entry_mid) * qty,
+            pnl_net=sign * (exit_exec - entry_exec) * qty,
+        )
@@ -0,0 +1,616 @@
+# file: oraclewalk/execution/order_gateway.py
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import ROUND_DOWN, Decimal
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# aiohttp é opcional: sem ele não há gateway e o executor só loga as ordens.
+try:
+    import aiohttp  # type: ignore
+except Exception:
+    aiohttp = None
+
+SPOT_REST_URL = "https://api.binance.com"
+SPOT_STREAM_URL = "wss://stream.binance.com:9443"
+FUTURES_REST_URL = "https://fapi.binance.com"
+FUTURES_STREAM_URL = "wss://fstream.binance.com"
+
+# estados da Binance + PENDING_NEW (enviada, sem resposta ainda) e UNKNOWN
+# (timeout/conexão/5xx: a ordem pode ter chegado, confirmada via GET /order)
+PENDING_NEW = "PENDING_NEW"
+UNKNOWN = "UNKNOWN"
+NEW = "NEW"
+PARTIALLY_FILLED = "PARTIALLY_FILLED"
+FILLED = "FILLED"
+CANCELED = "CANCELED"
+REJECTED = "REJECTED"
+EXPIRED = "EXPIRED"
+EXPIRED_IN_MATCH = "EXPIRED_IN_MATCH"
+
+TERMINAL_STATES = frozenset({FILLED, CANCELED, REJECTED, EXPIRED, EXPIRED_IN_MATCH})
+
+TRANSITIONS = {
+    PENDING_NEW: {UNKNOWN, NEW, PARTIALLY_FILLED} | TERMINAL_STATES,
+    UNKNOWN: {NEW, PARTIALLY_FILLED} | TERMINAL_STATES,
+    NEW: {PARTIALLY_FILLED} | TERMINAL_STATES,
+    PARTIALLY_FILLED: {PARTIALLY_FILLED, FILLED, CANCELED, EXPIRED, EXPIRED_IN_MATCH},
+}
+
+
+# código da Binance para ordem inexistente na consulta
+ORDER_NOT_FOUND = -2013
+
+
+class OrderRequestError(RuntimeError):
+    """Resposta HTTP de erro da Binance (`status` + `code`/`msg` do corpo)."""
+
+    def __init__(self, status: int, code: Optional[int], msg: str):
+        super().__init__(f"HTTP {status}: {msg}")
+        self.status = status
+        self.code = code
+
+    @property
+    def is_rejection(self) -> bool:
+        # 4xx: a corretora recusou a requisição; 5xx: resultado desconhecido
+        return 400 <= self.status < 500
+
+
+def new_client_order_id(prefix: str = "ow") -> str:
+    """clientOrderId único (a Binance aceita até 36 caracteres [.A-Za-z0-9:/_-])."""
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+
+def sign_params(params: Dict[str, Any], secret: str) -> str:
+    """Query string com `signature` HMAC-SHA256 no final (formato SIGNED da Binance)."""
+    query = urlencode(params)
+    signature = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+    return f"{query}&signature={signature}"
+
+
+def _fmt_qty(value) -> str:
+    if isinstance(value, Decimal):
+        text = format(value, "f")
+    else:
+        text = f"{float(value):.8f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text or "0"
+
+
+def _floor_to_step(value: float, step: Decimal) -> Decimal:
+    """Arredonda para baixo no múltiplo de `step` (Decimal: sem erro de float)."""
+    dec = Decimal(str(value))
+    if step <= 0:
+        return dec
+    return (dec / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+@dataclass
+class SymbolFilters:
+    """Filtros do exchangeInfo que a Binance valida em toda ordem (-1013 se violados)."""
+
+    step_size: Decimal = Decimal(0)
+    min_qty: Decimal = Decimal(0)
+    market_step_size: Decimal = Decimal(0)
+    tick_size: Decimal = Decimal(0)
+    min_notional: Decimal = Decimal(0)
+
+    @classmethod
+    def from_symbol_info(cls, info: Dict[str, Any]) -> "SymbolFilters":
+        out = cls()
+        for f in info.get("filters", []):
+            kind = f.get("filterType")
+            if kind == "LOT_SIZE":
+                out.step_size = Decimal(f.get("stepSize", "0"))
+                out.min_qty = Decimal(f.get("minQty", "0"))
+            elif kind == "MARKET_LOT_SIZE":
+                out.market_step_size = Decimal(f.get("stepSize", "0"))
+            elif kind == "PRICE_FILTER":
+                out.tick_size = Decimal(f.get("tickSize", "0"))
+            elif kind in ("MIN_NOTIONAL", "NOTIONAL"):
+                # spot: minNotional; futures: notional
+                out.min_notional = Decimal(f.get("minNotional", f.get("notional", "0")))
+        return out
+
+    def floor_qty(self, qty: float, market: bool = True) -> Decimal:
+        step = self.market_step_size if market and self.market_step_size > 0 else self.step_size
+        return _floor_to_step(qty, step)
+
+    def floor_price(self, price: float) -> Decimal:
+        return _floor_to_step(price, self.tick_size)
+
+    def violation(self, qty: Decimal, price: Optional[float]) -> Optional[str]:
+        if qty <= 0 or qty < self.min_qty:
+            return f"quantidade {_fmt_qty(qty)} abaixo do mínimo {_fmt_qty(self.min_qty)} (LOT_SIZE)"
+        if price and self.min_notional > 0 and qty * Decimal(str(price)) < self.min_notional:
+            return f"notional {_fmt_qty(qty * Decimal(str(price)))} abaixo de {_fmt_qty(self.min_notional)} (MIN_NOTIONAL)"
+        return None
+
+
+@dataclass
+class LocalOrder:
+    client_order_id: str
+    symbol: str
+    side: str
+    order_type: str
+    quantity: float
+    price: Optional[float] = None
+    status: str = PENDING_NEW
+    exchange_order_id: Optional[int] = None
+    executed_qty: float = 0.0
+    cum_quote: float = 0.0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        if self.executed_qty <= 0:
+            return None
+        return self.cum_quote / self.executed_qty
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+
+class OrderGateway:
+    """
+    Envio assíncrono de ordens para a Binance (spot ou futures) com estado local.
+
+    - Um event loop próprio numa thread daemon: `submit()` registra a ordem
+      como PENDING_NEW e devolve na hora; o POST assinado roda no loop.
+    - Uma única `aiohttp.ClientSession` com pool de conexões keep-alive:
+      várias ordens ficam em voo ao mesmo tempo sem novo handshake TLS.
+    - Toda ordem leva um clientOrderId gerado aqui, então a resposta REST e
+      os eventos do user data stream caem na mesma LocalOrder.
+    - A máquina de estados só aceita transições válidas e nunca volta a
+      quantidade executada; eventos atrasados/repetidos são ignorados.
+    - No start carrega o exchangeInfo: quantidade e preço são arredondados
+      para baixo em stepSize/tickSize e ordens abaixo de minQty/minNotional
+      são rejeitadas localmente (sem ida à corretora).
+    - Só erro HTTP 4xx vira REJECTED. Timeout, conexão caída ou 5xx deixam a
+      ordem UNKNOWN e ela é confirmada com GET /order?origClientOrderId=
+      (o user data stream também pode resolvê-la).
+    - `on_update(cb)` registra callbacks chamados (na thread do gateway) a
+      cada mudança de estado.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        futures: bool = False,
+        base_url: str = "",
+        stream_url: str = "",
+        recv_window: int = 5000,
+        max_connections: int = 8,
+        request_timeout: float = 10.0,
+        keepalive_interval: float = 30 * 60,
+        user_stream: bool = True,
+        confirm_attempts: int = 5,
+        confirm_delay: float = 1.0,
+    ):
+        if aiohttp is None:
+            raise ImportError("aiohttp é necessário para o OrderGateway (pip install aiohttp)")
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.futures = futures
+        self.base_url = (base_url or (FUTURES_REST_URL if futures else SPOT_REST_URL)).rstrip("/")
+        self.stream_url = (stream_url or (FUTURES_STREAM_URL if futures else SPOT_STREAM_URL)).rstrip("/")
+        self.recv_window = recv_window
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self.keepalive_interval = keepalive_interval
+        self.user_stream = user_stream
+        self.confirm_attempts = confirm_attempts
+        self.confirm_delay = confirm_delay
+
+        self.orders: Dict[str, LocalOrder] = {}
+        self.filters: Dict[str, SymbolFilters] = {}
+        self._callbacks: List[Callable[[LocalOrder], None]] = []
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = None
+        self._thread: Optional[threading.Thread] = None
+        self._stream_task = None
+        self._listen_key: Optional[str] = None
+        self._ready = threading.Event()
+        self._closed = False
+
+    @property
+    def _prefix(self) -> str:
+        return "/fapi/v1" if self.futures else "/api/v3"
+
+    # -----------------------------
+    # CICLO DE VIDA
+    # -----------------------------
+    def start(self) -> "OrderGateway":
+        if self._thread is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="OrderGateway")
+        self._thread.start()
+        # sessão + exchangeInfo (timeout da requisição) antes de aceitar ordens
+        self._ready.wait(timeout=self.request_timeout + 5.0)
+        return self
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._open_session())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _open_session(self) -> None:
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            headers={"X-MBX-APIKEY": self.api_key},
+        )
+        await self._load_exchange_info()
+        if self.user_stream:
+            self._stream_task = asyncio.ensure_future(self._run_user_stream())
+
+    async def _load_exchange_info(self) -> None:
+        try:
+            async with self._session.get(f"{self.base_url}{self._prefix}/exchangeInfo") as resp:
+                payload = await resp.json(content_type=None)
+                if resp.status >= 400:
+                    raise RuntimeError(f"HTTP {resp.status}: {payload}")
+        except Exception as e:
+            logger.warning(f"[GATEWAY] exchangeInfo indisponível; ordens sem arredondamento: {e!r}")
+            return
+        for info in payload.get("symbols", []):
+            self.filters[info["symbol"]] = SymbolFilters.from_symbol_info(info)
+        logger.info(f"[GATEWAY] Filtros carregados para {len(self.filters)} símbolo(s).")
+
+    def round_qty(self, symbol: str, quantity: float, market: bool = True) -> float:
+        """Quantidade que será enviada (stepSize do símbolo), para o executor registrar a mesma."""
+        filters = self.filters.get(symbol)
+        return float(filters.floor_qty(quantity, market)) if filters else float(quantity)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed or self._loop is None:
+            return
+        self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"[GATEWAY] Erro ao encerrar: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=timeout)
+
+    async def _shutdown(self) -> None:
+        # stream + envios/consultas ainda em voo
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+    # -----------------------------
+    # ESTADO LOCAL
+    # -----------------------------
+    def on_update(self, callback: Callable[[LocalOrder], None]) -> None:
+        self._callbacks.append(callback)
+
+    def get(self, client_order_id: str) -> Optional[LocalOrder]:
+        with self._cond:
+            return self.orders.get(client_order_id)
+
+    def open_orders(self) -> List[LocalOrder]:
+        with self._cond:
+            return [o for o in self.orders.values() if not o.is_terminal]
+
+    def wait(self, client_order_id: str, statuses=TERMINAL_STATES, timeout: Optional[float] = None) -> Optional[LocalOrder]:
+        """Bloqueia até a ordem chegar a um dos `statuses` (uso em testes/encerramento)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                order = self.orders.get(client_order_id)
+                if order is not None and order.status in statuses:
+                    return order
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return order
+                self._cond.wait(remaining)
+
+    def _apply(
+        self,
+        client_order_id: str,
+        status: Optional[str],
+        executed_qty: Optional[float] = None,
+        cum_quote: Optional[float] = None,
+        exchange_order_id: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        with self._cond:
+            order = self.orders.get(client_order_id)
+            if order is None or status is None:
+                return False
+            if status != order.status and status not in TRANSITIONS.get(order.status, ()):
+                logger.debug(f"[GATEWAY] Transição ignorada {client_order_id}: {order.status} → {status}")
+                return False
+            if executed_qty is not None and executed_qty < order.executed_qty:
+                return False  # evento atrasado
+            changed = status != order.status or (executed_qty is not None and executed_qty != order.executed_qty)
+            order.status = status
+            if executed_qty is not None:
+                order.executed_qty = executed_qty
+            if cum_quote is not None:
+                order.cum_quote = cum_quote
+            if exchange_order_id is not None:
+                order.exchange_order_id = exchange_order_id
+            if error:
+                order.error = error
+            order.updated_at = time.time()
+            self._cond.notify_all()
+        if changed:
+            for cb in list(self._callbacks):
+                try:
+                    cb(order)
+                except Exception as e:
+                    logger.warning(f"[GATEWAY] Callback falhou: {e}")
+        return changed
+
+    # -----------------------------
+    # REST
+    # -----------------------------
+    def submit(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        order_type: str = "MARKET",
+        price: Optional[float] = None,
+        client_order_id: Optional[str] = None,
+        reduce_only: bool = False,
+        ref_price: Optional[float] = None,
+    ) -> LocalOrder:
+        """
+        Registra e envia a ordem sem bloquear; o estado chega depois via REST/stream.
+        `ref_price` (preço de referência de uma MARKET) permite checar o minNotional.
+        """
+        if self._loop is None:
+            self.start()
+        order_type = order_type.upper()
+        qty: Any = quantity
+        px: Any = price
+        violation = None
+        filters = self.filters.get(symbol)
+        if filters is not None:
+            qty = filters.floor_qty(quantity, market=order_type == "MARKET")
+            if price is not None:
+                px = filters.floor_price(price)
+                price = float(px)
+            violation = filters.violation(qty, price if order_type == "LIMIT" else (ref_price or price))
+        order = LocalOrder(
+            client_order_id=client_order_id or new_client_order_id(),
+            symbol=symbol,
+            side=side.upper(),
+            order_type=order_type,
+            quantity=float(qty),
+            price=price,
+        )
+        with self._cond:
+            self.orders[order.client_order_id] = order
+        if violation:
+            logger.warning(f"[GATEWAY] Ordem {order.side} {symbol} rejeitada localmente: {violation}")
+            self._apply(order.client_order_id, REJECTED, error=violation)
+            return order
+
+        params: Dict[str, Any] = {
+            "symbol": symbol,
+            "side": order.side,
+            "type": order.order_type,
+            "quantity": _fmt_qty(qty),
+            "newClientOrderId": order.client_order_id,
+        }
+        if order.order_type == "LIMIT":
+            params["price"] = _fmt_qty(px)
+            params["timeInForce"] = "GTC"
+        if reduce_only and self.futures:
+            params["reduceOnly"] = "true"
+        if not self.futures:
+            params["newOrderRespType"] = "RESULT"
+        asyncio.run_coroutine_threadsafe(self._place(order.client_order_id, params), self._loop)
+        return order
+
+    def cancel(self, symbol: str, client_order_id: str) -> None:
+        if self._loop is None:
+            return
+        params = {"symbol": symbol, "origClientOrderId": client_order_id}
+        asyncio.run_coroutine_threadsafe(self._cancel(client_order_id, params), self._loop)
+
+    async def _signed(self, method: str, path: str, params: Dict[str, Any]) -> Any:
+        params = dict(params, timestamp=int(time.time() * 1000), recvWindow=self.recv_window)
+        body = sign_params(params, self.api_secret)
+        url = f"{self.base_url}{path}"
+        if method == "GET":
+            # endpoints GET SIGNED só aceitam os parâmetros na query string
+            request = self._session.request(method, f"{url}?{body}")
+        else:
+            request = self._session.request(
+                method, url, data=body, headers={"Content-Type": "application/x-www-form-urlencoded"}
+            )
+        async with request as resp:
+            if resp.status >= 400:
+                try:
+                    payload = await resp.json(content_type=None)
+                except Exception:
+                    payload = await resp.text()
+                if isinstance(payload, dict):
+                    raise OrderRequestError(resp.status, payload.get("code"), str(payload.get("msg")))
+                raise OrderRequestError(resp.status, None, str(payload))
+            return await resp.json(content_type=None)
+
+    def _apply_rest(self, client_order_id: str, payload: Dict[str, Any]) -> None:
+        executed = payload.get("executedQty")
+        quote = payload.get("cummulativeQuoteQty", payload.get("cumQuote"))
+        self._apply(
+            client_order_id,
+            payload.get("status"),
+            executed_qty=float(executed) if executed is not None else None,
+            cum_quote=float(quote) if quote is not None else None,
+            exchange_order_id=payload.get("orderId"),
+        )
+
+    async def _place(self, client_order_id: str, params: Dict[str, Any]) -> None:
+        try:
+            payload = await self._signed("POST", f"{self._prefix}/order", params)
+        except OrderRequestError as e:
+            if e.is_rejection:
+                logger.warning(f"[GATEWAY] Ordem {client_order_id} rejeitada: {e}")
+                self._apply(client_order_id, REJECTED, error=str(e))
+                return
+            await self._unknown(client_order_id, params["symbol"], e)
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._unknown(client_order_id, params["symbol"], e)
+            return
+        self._apply_rest(client_order_id, payload)
+
+    async def _unknown(self, client_order_id: str, symbol: str, error: Exception) -> None:
+        order = self.get(client_order_id)
+        if self._closed or order is None or order.is_terminal:
+            return  # o stream já resolveu (ou o gateway está encerrando)
+        logger.warning(f"[GATEWAY] Ordem {client_order_id} sem confirmação ({error!r}); consultando a corretora.")
+        self._apply(client_order_id, UNKNOWN, error=str(error) or repr(error))
+        await self._confirm(client_order_id, symbol)
+
+    async def _confirm(self, client_order_id: str, symbol: str) -> None:
+        """GET /order pelo clientOrderId até saber se a ordem existe."""
+        params = {"symbol": symbol, "origClientOrderId": client_order_id}
+        delay = self.confirm_delay
+        for attempt in range(1, self.confirm_attempts + 1):
+            await asyncio.sleep(delay)
+            order = self.get(client_order_id)
+            if order is None or order.status != UNKNOWN:
+                return  # o stream resolveu antes
+            try:
+                payload = await self._signed("GET", f"{self._prefix}/order", params)
+            except OrderRequestError as e:
+                if e.code == ORDER_NOT_FOUND and attempt == self.confirm_attempts:
+                    logger.warning(f"[GATEWAY] Ordem {client_order_id} não chegou à corretora.")
+                    self._apply(client_order_id, REJECTED, error=str(e))
+                    return
+                logger.warning(f"[GATEWAY] Consulta {attempt}/{self.confirm_attempts} de {client_order_id}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[GATEWAY] Consulta {attempt}/{self.confirm_attempts} de {client_order_id}: {e!r}")
+            else:
+                self._apply_rest(client_order_id, payload)
+                return
+            delay = min(delay * 2, 30.0)
+        logger.warning(f"[GATEWAY] Ordem {client_order_id} segue UNKNOWN; aguardando o user data stream.")
+
+    async def _cancel(self, client_order_id: str, params: Dict[str, Any]) -> None:
+        try:
+            payload = await self._signed("DELETE", f"{self._prefix}/order", params)
+        except Exception as e:
+            logger.warning(f"[GATEWAY] Falha ao cancelar {client_order_id}: {e}")
+            return
+        self._apply_rest(client_order_id, payload)
+
+    # -----------------------------
+    # USER DATA STREAM
+    # -----------------------------
+    async def _listen_key_request(self, method: str) -> Optional[str]:
+        path = "/fapi/v1/listenKey" if self.futures else "/api/v3/userDataStream"
+        params = {"listenKey": self._listen_key} if method == "PUT" and not self.futures else None
+        async with self._session.request(method, f"{self.base_url}{path}", params=params) as resp:
+            payload = await resp.json(content_type=None)
+            if resp.status >= 400:
+                raise RuntimeError(f"HTTP {resp.status}: {payload}")
+            return payload.get("listenKey") if isinstance(payload, dict) else None
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self._listen_key_request("PUT")
+            except Exception as e:
+                logger.warning(f"[GATEWAY] Keepalive do listenKey falhou: {e}")
+
+    async def _run_user_stream(self) -> None:
+        backoff = 1.0
+        while not self._closed:
+            keepalive = None
+            try:
+                self._listen_key = await self._listen_key_request("POST")
+                keepalive = asyncio.ensure_future(self._keepalive())
+                async with self._session.ws_connect(f"{self.stream_url}/ws/{self._listen_key}", heartbeat=30) as ws:
+                    logger.info("[GATEWAY] User data stream conectado.")
+                    backoff = 1.0
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            event = json.loads(msg.data)
+                            if event.get("e") == "listenKeyExpired":
+                                break  # pede um listenKey novo e reconecta
+                            self.handle_stream_event(event)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[GATEWAY] User data stream caiu: {e}")
+            finally:
+                if keepalive is not None:
+                    keepalive.cancel()
+            if self._closed:
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def handle_stream_event(self, event: Dict[str, Any]) -> bool:
+        """executionReport (spot) / ORDER_TRADE_UPDATE (futures) → máquina de estados."""
+        kind = event.get("e")
+        if kind == "executionReport":
+            # em cancelamentos `c` é o id do cancel e `C` o da ordem original
+            cid = event.get("C") or event.get("c")
+            return self._apply(
+                cid,
+                event.get("X"),
+                executed_qty=float(event.get("z", 0.0)),
+                cum_quote=float(event.get("Z", 0.0)),
+                exchange_order_id=event.get("i"),
+                error=event.get("r") if event.get("r") not in (None, "NONE") else None,
+            )
+        if kind == "ORDER_TRADE_UPDATE":
+            o = event.get("o") or {}
+            executed = float(o.get("z", 0.0))
+            return self._apply(
+                o.get("c"),
+                o.get("X"),
+                executed_qty=executed,
+                cum_quote=executed * float(o.get("ap", 0.0)),
+                exchange_order_id=o.get("i"),
+            )
+        return False
+
+    @classmethod
+    def from_config(cls, cfg) -> "OrderGateway":
+        return cls(
+            cfg.binance_api_key,
+            cfg.binance_api_secret,
+            futures=bool(getattr(cfg, "use_futures", False)),
+            base_url=getattr(cfg, "binance_rest_url", ""),
+            stream_url=getattr(cfg, "binance_stream_url", ""),
+        )
@@ -1,9 +1,14 @@
 # file: oraclewalk/execution/order_model.py
 
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
 from typing import Optional
 
 
+def new_position_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
 @dataclass
 class Position:
     symbol: str
@@ -16,3 +21,5 @@ class Position:
     closed_at: Optional[str] = None
     pnl: float = 0.0
     is_open: bool = True
+    trailing_distance: float = 0.0  # trailing stop em preço (0 = fixo)
+    position_id: str = field(default_factory=new_position_id)
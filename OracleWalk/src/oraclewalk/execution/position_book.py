@@ -0,0 +1,126 @@
+# file: oraclewalk/execution/position_book.py
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from oraclewalk.execution.order_model import Position
+
+
+def side_sign(side: str) -> int:
+    """+1 para comprado (buy/long), -1 para vendido (sell/short)."""
+    return 1 if str(side).lower() in ("buy", "long") else -1
+
+
+class _SymbolArrays:
+    """Colunas numpy das posições abertas de um símbolo (na ordem de abertura)."""
+
+    __slots__ = ("positions", "sign", "qty", "entry")
+
+    def __init__(self, positions: List[Position]):
+        self.positions = positions
+        self.sign = np.array([side_sign(p.side) for p in positions], dtype=np.int8)
+        self.qty = np.array([p.quantity or 0.0 for p in positions], dtype=np.float64)
+        self.entry = np.array([p.entry_price or 0.0 for p in positions], dtype=np.float64)
+
+
+class PositionBook:
+    """
+    Livro de posições abertas, chaveado por `position_id` e indexado por símbolo.
+
+    - add / remove / get são O(1) (dicts).
+    - Por símbolo, as colunas side/qty/entry ficam em arrays numpy,
+      reconstruídos só quando o conjunto muda (abertura ou fechamento).
+      Assim `open_pnl` avalia todas as posições do símbolo num único passo
+      vetorizado por tick. Stops e alvos ficam no StopEngine.
+    """
+
+    def __init__(self):
+        self._positions: Dict[str, Position] = {}
+        self._by_symbol: Dict[str, Dict[str, Position]] = {}
+        self._arrays: Dict[str, _SymbolArrays] = {}
+
+    # -----------------------------
+    # ACESSO
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(list(self._positions.values()))
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self._positions
+
+    def get(self, position_id: str) -> Optional[Position]:
+        return self._positions.get(position_id)
+
+    def by_symbol(self, symbol: str, side: Optional[str] = None) -> List[Position]:
+        positions = list(self._by_symbol.get(symbol, {}).values())
+        if side is not None:
+            sign = side_sign(side)
+            positions = [p for p in positions if side_sign(p.side) == sign]
+        return positions
+
+    def latest(self, symbol: Optional[str] = None) -> Optional[Position]:
+        """Posição aberta mais recente (dicts preservam a ordem de inserção)."""
+        source = self._positions if symbol is None else self._by_symbol.get(symbol, {})
+        if not source:
+            return None
+        return next(reversed(source.values()))
+
+    # -----------------------------
+    # ALTERAÇÃO
+    # -----------------------------
+    def add(self, position: Position) -> None:
+        self._positions[position.position_id] = position
+        self._by_symbol.setdefault(position.symbol, {})[position.position_id] = position
+        self._arrays.pop(position.symbol, None)
+
+    def remove(self, position_id: str) -> Optional[Position]:
+        position = self._positions.pop(position_id, None)
+        if position is None:
+            return None
+        bucket = self._by_symbol.get(position.symbol)
+        if bucket is not None:
+            bucket.pop(position_id, None)
+            if not bucket:
+                del self._by_symbol[position.symbol]
+        self._arrays.pop(position.symbol, None)
+        return position
+
+    def update(self, position_id: str, **fields) -> Optional[Position]:
+        """Altera campos da posição (ex.: preço/qtd do fill) e invalida os arrays do símbolo."""
+        position = self._positions.get(position_id)
+        if position is None:
+            return None
+        for name, value in fields.items():
+            setattr(position, name, value)
+        self._arrays.pop(position.symbol, None)
+        return position
+
+    def _columns(self, symbol: str) -> Optional[_SymbolArrays]:
+        cols = self._arrays.get(symbol)
+        if cols is None:
+            bucket = self._by_symbol.get(symbol)
+            if not bucket:
+                return None
+            cols = self._arrays[symbol] = _SymbolArrays(list(bucket.values()))
+        return cols
+
+    # -----------------------------
+    # AVALIAÇÃO VETORIZADA
+    # -----------------------------
+    def pnl_by_position(self, symbol: str, price: float) -> List[Tuple[Position, float]]:
+        cols = self._columns(symbol)
+        if cols is None:
+            return []
+        pnl = cols.sign * (price - cols.entry) * cols.qty
+        return list(zip(cols.positions, pnl.tolist()))
+
+    def open_pnl(self, symbol: str, price: float) -> float:
+        """PnL bruto (no preço dado) somado de todas as posições do símbolo."""
+        cols = self._columns(symbol)
+        if cols is None:
+            return 0.0
+        return float(np.sum(cols.sign * (price - cols.entry) * cols.qty))
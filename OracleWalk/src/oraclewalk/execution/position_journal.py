@@ -0,0 +1,238 @@
+# file: oraclewalk/execution/position_journal.py
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from oraclewalk.execution.order_model import Position
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# atributos extras que o executor pendura na Position (preços brutos/bid/ask, chave no banco, ordem)
+POSITION_EXTRAS = ("entry_raw", "entry_bid", "entry_ask", "trade_key", "entry_order_id")
+
+
+def position_to_record(pos: Position, **extra: Any) -> Dict[str, Any]:
+    record = asdict(pos)
+    for name in POSITION_EXTRAS:
+        if hasattr(pos, name):
+            record[name] = getattr(pos, name)
+    record.update(extra)
+    return record
+
+
+def position_from_record(record: Dict[str, Any]) -> Position:
+    fields = Position.__dataclass_fields__
+    pos = Position(**{k: v for k, v in record.items() if k in fields})
+    for name in POSITION_EXTRAS:
+        if record.get(name) is not None:
+            setattr(pos, name, record[name])
+    return pos
+
+
+def _fsync_dir(path: str) -> None:
+    # garante que o rename do snapshot sobreviva a uma queda (POSIX)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class PositionJournal:
+    """
+    Write-ahead log de eventos de posição (open / modify / close).
+
+    - `<prefix>.journal.jsonl`: um evento JSON por linha, só append, com `seq`
+      crescente. Cada evento é escrito e descarregado para o SO na hora
+      (sobrevive a crash do processo); o fsync é feito em grupo por uma thread,
+      no máximo `fsync_interval` segundos depois (sobrevive a queda do SO).
+    - `<prefix>.snapshot.json`: posições abertas até `seq`, gravado em .tmp +
+      fsync + os.replace (atômico). Depois do snapshot o journal é truncado.
+    - `replay()` carrega o snapshot e aplica só os eventos com seq maior,
+      então o custo é proporcional ao que aconteceu desde a última compactação.
+      Uma última linha cortada (crash no meio da escrita) é descartada.
+    - Posições são chaveadas por `position_id`: várias abertas ao mesmo tempo,
+      em qualquer símbolo.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".",
+        prefix: str = "positions",
+        fsync_interval: float = 0.05,
+        compact_every: int = 1000,
+    ):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, f"{prefix}.journal.jsonl")
+        self.snapshot_path = os.path.join(directory, f"{prefix}.snapshot.json")
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.seq = 0
+        self._events_since_snapshot = 0
+        self._lock = threading.RLock()
+        self._dirty = threading.Event()
+        self._closed = False
+        self._fh = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.replay()
+        self._fh = open(self.journal_path, "a", encoding="utf-8")
+        self._syncer = threading.Thread(target=self._run_syncer, daemon=True, name="PositionJournalSync")
+        self._syncer.start()
+
+    # -----------------------------
+    # RECUPERAÇÃO
+    # -----------------------------
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Reconstrói as posições abertas: snapshot + eventos posteriores."""
+        with self._lock:
+            positions: Dict[str, Dict[str, Any]] = {}
+            seq = 0
+            if os.path.exists(self.snapshot_path):
+                try:
+                    with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                        snap = json.load(f)
+                    positions = dict(snap.get("positions", {}))
+                    seq = int(snap.get("seq", 0))
+                except Exception as e:
+                    logger.warning(f"[JOURNAL] Snapshot ilegível ({self.snapshot_path}): {e}")
+
+            applied = 0
+            if os.path.exists(self.journal_path):
+                valid_bytes = 0
+                last = b"\n"
+                with open(self.journal_path, "rb") as f:
+                    for raw in f:
+                        try:
+                            event = json.loads(raw)
+                        except ValueError:
+                            logger.warning(f"[JOURNAL] Linha corrompida no fim do journal descartada ({len(raw)} bytes).")
+                            break
+                        valid_bytes += len(raw)
+                        last = raw
+                        if event.get("seq", 0) <= seq:
+                            continue
+                        self._apply(positions, event)
+                        seq = event["seq"]
+                        applied += 1
+                if valid_bytes < os.path.getsize(self.journal_path):
+                    # remove a cauda cortada para o próximo append começar numa linha limpa
+                    with open(self.journal_path, "r+b") as f:
+                        f.truncate(valid_bytes)
+                if not last.endswith(b"\n"):
+                    # evento completo mas sem quebra de linha: fecha a linha antes do próximo append
+                    with open(self.journal_path, "ab") as f:
+                        f.write(b"\n")
+
+            self.positions = positions
+            self.seq = seq
+            self._events_since_snapshot = applied
+            return dict(positions)
+
+    @staticmethod
+    def _apply(positions: Dict[str, Dict[str, Any]], event: Dict[str, Any]) -> None:
+        pid = event.get("position_id")
+        kind = event.get("type")
+        data = event.get("data") or {}
+        if kind == "open":
+            positions[pid] = dict(data)
+        elif kind == "modify" and pid in positions:
+            positions[pid].update(data)
+        elif kind == "close":
+            positions.pop(pid, None)
+
+    # -----------------------------
+    # ESCRITA
+    # -----------------------------
+    def _append(self, kind: str, position_id: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            self.seq += 1
+            event = {"seq": self.seq, "ts": time.time(), "type": kind, "position_id": position_id, "data": data}
+            self._apply(self.positions, event)
+            self._fh.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._fh.flush()
+            self._events_since_snapshot += 1
+            self._dirty.set()
+            if self._events_since_snapshot >= self.compact_every:
+                self.compact()
+            return self.seq
+
+    def record_open(self, position_id: str, data: Dict[str, Any]) -> int:
+        return self._append("open", position_id, data)
+
+    def record_modify(self, position_id: str, **changes: Any) -> int:
+        return self._append("modify", position_id, changes)
+
+    def record_close(self, position_id: str, **info: Any) -> int:
+        return self._append("close", position_id, info)
+
+    def open_positions(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {pid: dict(data) for pid, data in self.positions.items()}
+
+    # -----------------------------
+    # DURABILIDADE
+    # -----------------------------
+    def _run_syncer(self) -> None:
+        while not self._closed:
+            self._dirty.wait()
+            if self._closed:
+                return
+            # agrupa os eventos que chegarem nesta janela num único fsync
+            time.sleep(self.fsync_interval)
+            self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._dirty.clear()
+            if self._fh is None or self._fh.closed:
+                return
+            try:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+            except OSError as e:
+                logger.warning(f"[JOURNAL] fsync falhou: {e}")
+
+    def compact(self) -> None:
+        """Snapshot atômico das posições abertas e truncamento do journal."""
+        with self._lock:
+            snap = {"seq": self.seq, "ts": time.time(), "positions": self.positions}
+            tmp = self.snapshot_path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(snap, f, separators=(",", ":"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.snapshot_path)
+                _fsync_dir(self.directory)
+            except Exception as e:
+                logger.warning(f"[JOURNAL] Falha ao gravar snapshot: {e}")
+                return
+            # eventos com seq <= snapshot são ignorados no replay, então um crash
+            # entre o replace e o truncate não duplica nada
+            if self._fh is not None:
+                self._fh.close()
+            self._fh = open(self.journal_path, "w", encoding="utf-8")
+            self._events_since_snapshot = 0
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.sync()
+        with self._lock:
+            self._closed = True
+            self._dirty.set()
+            if self._fh is not None:
+                self._fh.close()
@@ -0,0 +1,228 @@
+# file: oraclewalk/execution/stop_engine.py
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from oraclewalk.execution.position_book import side_sign
+
+
+class Trigger(NamedTuple):
+    position_id: str
+    price: float
+    kind: str  # "sl" | "tp"
+
+
+class _Ladder:
+    """
+    Níveis de um tipo de saída (SL ou TP) de um símbolo/lado, ordenados.
+
+    `levels`, `ids` e `trail` são arrays paralelos em ordem crescente de nível;
+    `_level_of` guarda o nível atual de cada posição para achar o índice por
+    busca binária na remoção.
+    """
+
+    def __init__(self):
+        self.levels = np.empty(0, dtype=np.float64)
+        self.ids = np.empty(0, dtype=object)
+        self.trail = np.empty(0, dtype=np.float64)
+        self._level_of: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._level_of)
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self._level_of
+
+    def add(self, position_id: str, level: float, trail: float = 0.0) -> None:
+        i = int(np.searchsorted(self.levels, level, side="right"))
+        self.levels = np.insert(self.levels, i, level)
+        self.ids = np.insert(self.ids, i, position_id)
+        self.trail = np.insert(self.trail, i, trail)
+        self._level_of[position_id] = level
+
+    def _index(self, position_id: str) -> int:
+        level = self._level_of[position_id]
+        lo = int(np.searchsorted(self.levels, level, side="left"))
+        hi = int(np.searchsorted(self.levels, level, side="right"))
+        for i in range(lo, hi):
+            if self.ids[i] == position_id:
+                return i
+        raise KeyError(position_id)
+
+    def remove(self, position_id: str) -> Optional[Tuple[float, float]]:
+        if position_id not in self._level_of:
+            return None
+        i = self._index(position_id)
+        level, trail = float(self.levels[i]), float(self.trail[i])
+        self.levels = np.delete(self.levels, i)
+        self.ids = np.delete(self.ids, i)
+        self.trail = np.delete(self.trail, i)
+        del self._level_of[position_id]
+        return level, trail
+
+    def at_or_below(self, price: float) -> slice:
+        return slice(0, int(np.searchsorted(self.levels, price, side="right")))
+
+    def at_or_above(self, price: float) -> slice:
+        return slice(int(np.searchsorted(self.levels, price, side="left")), len(self.levels))
+
+    def ratchet(self, candidate: np.ndarray, upward: bool) -> List[Tuple[str, float]]:
+        """
+        Move os níveis com trail > 0 para `candidate` quando isso aperta o stop
+        (para cima em compras, para baixo em vendas). Atualiza os arrays no lugar
+        e reordena só se algum nível mudou.
+        """
+        trailing = self.trail > 0
+        if not trailing.any():
+            return []
+        if upward:
+            moved = trailing & (candidate > self.levels)
+        else:
+            moved = trailing & (candidate < self.levels)
+        if not moved.any():
+            return []
+        self.levels[moved] = candidate[moved]
+        changed = [(pid, float(lvl)) for pid, lvl in zip(self.ids[moved], self.levels[moved])]
+        for pid, lvl in changed:
+            self._level_of[pid] = lvl
+        # stops andam juntos com o preço: a ordem quase não muda e o sort estável é barato
+        order = np.argsort(self.levels, kind="stable")
+        self.levels, self.ids, self.trail = self.levels[order], self.ids[order], self.trail[order]
+        return changed
+
+
+class StopEngine:
+    """
+    Stops e alvos de todas as posições abertas, em arrays ordenados por
+    símbolo, lado e tipo (SL/TP).
+
+    - `evaluate(symbol, low, high)`: para cada escada, uma busca binária dá
+      o trecho de níveis tocados pelo range do candle/tick. Nada de laço por
+      posição. SL tem prioridade sobre TP na mesma posição.
+    - `trail(symbol, price)`: trailing stop (distância em preço, como no
+      backtester de referência): compra → stop = max(stop, price - dist);
+      venda → stop = min(stop, price + dist). Vetorizado sobre a escada.
+    - SL/TP 0 = desligado. Uma posição com trailing e sem SL entra com stop
+      "infinito" (nunca toca) até o primeiro `trail`.
+    """
+
+    def __init__(self):
+        self._ladders: Dict[Tuple[str, int, str], _Ladder] = {}
+        self._meta: Dict[str, Tuple[str, int]] = {}
+
+    def _ladder(self, symbol: str, sign: int, kind: str) -> _Ladder:
+        key = (symbol, sign, kind)
+        ladder = self._ladders.get(key)
+        if ladder is None:
+            ladder = self._ladders[key] = _Ladder()
+        return ladder
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self._meta
+
+    # -----------------------------
+    # CADASTRO
+    # -----------------------------
+    def add(
+        self,
+        position_id: str,
+        symbol: str,
+        side: str,
+        stop_loss: float = 0.0,
+        take_profit: float = 0.0,
+        trailing: float = 0.0,
+    ) -> None:
+        if position_id in self._meta:
+            self.remove(position_id)
+        sign = side_sign(side)
+        trailing = float(trailing or 0.0)
+        stop_loss = float(stop_loss or 0.0)
+        if stop_loss <= 0 and trailing > 0:
+            stop_loss = -np.inf if sign > 0 else np.inf
+        if stop_loss != 0:
+            self._ladder(symbol, sign, "sl").add(position_id, stop_loss, trailing)
+        if take_profit and take_profit > 0:
+            self._ladder(symbol, sign, "tp").add(position_id, float(take_profit))
+        self._meta[position_id] = (symbol, sign)
+
+    def remove(self, position_id: str) -> None:
+        meta = self._meta.pop(position_id, None)
+        if meta is None:
+            return
+        symbol, sign = meta
+        for kind in ("sl", "tp"):
+            ladder = self._ladders.get((symbol, sign, kind))
+            if ladder is not None:
+                ladder.remove(position_id)
+
+    def update(self, position_id: str, stop_loss: Optional[float] = None, take_profit: Optional[float] = None) -> None:
+        """Troca SL e/ou TP de uma posição (mantém o trailing)."""
+        meta = self._meta.get(position_id)
+        if meta is None:
+            return
+        symbol, sign = meta
+        if stop_loss is not None:
+            ladder = self._ladder(symbol, sign, "sl")
+            old = ladder.remove(position_id)
+            trail = old[1] if old else 0.0
+            if stop_loss and stop_loss > 0:
+                ladder.add(position_id, float(stop_loss), trail)
+            elif trail > 0:
+                ladder.add(position_id, -np.inf if sign > 0 else np.inf, trail)
+        if take_profit is not None:
+            ladder = self._ladder(symbol, sign, "tp")
+            ladder.remove(position_id)
+            if take_profit and take_profit > 0:
+                ladder.add(position_id, float(take_profit))
+
+    def levels(self, position_id: str) -> Tuple[float, float]:
+        """(SL, TP) atuais da posição; 0.0 quando não há nível."""
+        meta = self._meta.get(position_id)
+        if meta is None:
+            return 0.0, 0.0
+        symbol, sign = meta
+        out = []
+        for kind in ("sl", "tp"):
+            ladder = self._ladders.get((symbol, sign, kind))
+            level = ladder._level_of.get(position_id, 0.0) if ladder is not None else 0.0
+            out.append(float(level) if np.isfinite(level) else 0.0)
+        return out[0], out[1]
+
+    # -----------------------------
+    # AVALIAÇÃO
+    # -----------------------------
+    def evaluate(self, symbol: str, low: float, high: float) -> List[Trigger]:
+        """Saídas tocadas no range [low, high], com o preço do nível e o tipo."""
+        triggers: List[Trigger] = []
+        for sign in (1, -1):
+            sl = self._ladders.get((symbol, sign, "sl"))
+            tp = self._ladders.get((symbol, sign, "tp"))
+            stopped = set()
+            if sl is not None and len(sl):
+                # compra: stop toca se low <= nível; venda: se high >= nível
+                window = sl.at_or_above(low) if sign > 0 else sl.at_or_below(high)
+                for pid, lvl in zip(sl.ids[window], sl.levels[window]):
+                    triggers.append(Trigger(pid, float(lvl), "sl"))
+                    stopped.add(pid)
+            if tp is not None and len(tp):
+                # compra: alvo toca se high >= nível; venda: se low <= nível
+                window = tp.at_or_below(high) if sign > 0 else tp.at_or_above(low)
+                for pid, lvl in zip(tp.ids[window], tp.levels[window]):
+                    if pid not in stopped:
+                        triggers.append(Trigger(pid, float(lvl), "tp"))
+        return triggers
+
+    def trail(self, symbol: str, price: float) -> Dict[str, float]:
+        """Aplica os trailing stops ao preço atual; retorna {position_id: novo SL}."""
+        moved: Dict[str, float] = {}
+        for sign in (1, -1):
+            ladder = self._ladders.get((symbol, sign, "sl"))
+            if ladder is None or not len(ladder):
+                continue
+            candidate = price - sign * ladder.trail
+            moved.update(ladder.ratchet(candidate, upward=sign > 0))
+        return moved
@@ -1,22 +1,35 @@
 # file: oraclewalk/execution/trade_executor.py
 
+import queue
 import time
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 import json
 import os
 
 from binance.client import Client
 
 from oraclewalk.config.config_loader import AppConfig
+from oraclewalk.execution.order_gateway import (
+    FILLED,
+    TERMINAL_STATES,
+    LocalOrder,
+    OrderGateway,
+    new_client_order_id,
+)
 from oraclewalk.execution.order_model import Position
+from oraclewalk.execution.position_book import PositionBook, side_sign
+from oraclewalk.execution.position_journal import PositionJournal, position_from_record, position_to_record
 from oraclewalk.execution.risk_manager import RiskManager
+from oraclewalk.execution.stop_engine import StopEngine
 from oraclewalk.notifications.telegram_notifier import TelegramNotifier
-from oraclewalk.storage.database import DatabaseManager
+from oraclewalk.storage.database import DatabaseManager, trade_key
 from oraclewalk.utils.logger import setup_logger
 
 from oraclewalk.execution.trade_logger import ProTradeLogger
-from oraclewalk.execution.execution_price_model import ExecutionPriceModel
+from oraclewalk.execution.trade_journal import TradeJournal
+from oraclewalk.data.order_book import OrderBookSnapshot
+from oraclewalk.execution.execution_price_model import ExecutionPriceModel, SyntheticDepth
 
 logger = setup_logger(__name__)
 
@@ -24,9 +37,15 @@ logger = setup_logger(__name__)
 class TradeExecutor:
     """
     Executor de trades:
-    - Modo live: envia ordens reais (se dry_run=False)
+    - Modo live: envia ordens reais (se dry_run=False) pelo OrderGateway assíncrono
     - Modo simulação: apenas loga (dry_run=True)
     - Integra com DashboardServer para desenhar trades no OracleView.
+    - Posições abertas ficam num PositionBook (por símbolo e position_id).
+      Com `single_position_mode` (padrão) só uma fica aberta por vez; sem ele,
+      entradas concorrentes são aceitas até `max_open_positions`.
+    - SL/TP (e trailing stops) de todas as posições ficam no StopEngine.
+    - Ordens de entrada são reconciliadas com o fill (preço médio/qtd executada);
+      entrada rejeitada/expirada sem execução remove a posição do livro e do journal.
     """
 
     def __init__(
@@ -36,30 +55,233 @@ class TradeExecutor:
         database: DatabaseManager,
         notifier: TelegramNotifier,
         dashboard=None,
+        order_book: Optional[Callable[[], OrderBookSnapshot]] = None,
     ):
         self.cfg = cfg
         self.risk = risk_manager
         self.db = database
         self.notifier = notifier
         self.dashboard = dashboard
+        # fonte do book live (ex.: OrderBookHandler.get_book) para preço por profundidade
+        self.order_book = order_book
 
         self.client: Client = cfg.get_client()
 
-        # posição atual (None se não tiver nada aberto)
-        self.current_position: Optional[Position] = None
+        # ordens reais: gateway aiohttp com estado local (não bloqueia o loop do engine)
+        self.gateway: Optional[OrderGateway] = None
+        # entradas em voo (clientOrderId → position_id); updates do gateway chegam
+        # na thread dele e são aplicados na thread do engine (apply_order_updates)
+        self._entry_orders: Dict[str, str] = {}
+        self._order_updates: "queue.Queue[LocalOrder]" = queue.Queue()
+        if not getattr(cfg, "dry_run", True):
+            try:
+                self.gateway = OrderGateway.from_config(cfg).start()
+                self.gateway.on_update(self._on_order_update)
+            except Exception as e:
+                logger.warning(f"[ORDER] Gateway indisponível, ordens reais desativadas: {e}")
+
+        # posições abertas (várias quando single_position_mode=False)
+        self.book = PositionBook()
+        self.stops = StopEngine()
+        self.single_position_mode = bool(getattr(cfg, "single_position_mode", True))
+        self.max_open_positions = int(getattr(cfg, "max_open_positions", 0) or 0)
 
-        # modelo de execução realista
+        # modelo de execução realista (book live > depth sintético > slippage fixo)
+        depth_notional = float(getattr(cfg, "synthetic_depth_notional", 0.0) or 0.0)
         self.exec_price_model = ExecutionPriceModel(
             slippage_pct=self.cfg.slippage,
             commission_maker=self.cfg.commission_maker,
             commission_taker=self.cfg.commission_taker,
+            depth=SyntheticDepth(
+                depth_notional,
+                step_pct=getattr(cfg, "synthetic_depth_step", 0.01),
+                levels=getattr(cfg, "synthetic_depth_levels", 50),
+            ) if depth_notional > 0 else None,
         )
 
         # logger PRO de trades
-        self.trade_logger = ProTradeLogger()
-        # persistência de posição aberta
+        journal = TradeJournal(cfg.trade_journal_dir) if cfg.trade_journal_dir else None
+        self.trade_logger = ProTradeLogger(journal=journal)
+        # persistência de posições: journal append-only + snapshot (positions.*)
+        # open_position.json é o formato antigo, migrado no primeiro restore
+        self.position_journal = PositionJournal(os.getcwd())
         self._persist_path = os.path.join(os.getcwd(), "open_position.json")
 
+    # ========== POSIÇÕES ==========
+
+    @property
+    def current_position(self) -> Optional[Position]:
+        """Posição aberta mais recente (compatível com o executor de um slot só)."""
+        return self.book.latest()
+
+    def positions(self, symbol: Optional[str] = None, side: Optional[str] = None) -> List[Position]:
+        if symbol is None:
+            return [p for p in self.book if side is None or side_sign(p.side) == side_sign(side)]
+        return self.book.by_symbol(symbol, side)
+
+    def _can_open(self, label: str) -> bool:
+        open_count = len(self.book)
+        if self.single_position_mode and open_count:
+            logger.warning(f"Tentativa de abrir {label} com posição já aberta.")
+            return False
+        if self.max_open_positions and open_count >= self.max_open_positions:
+            logger.warning(f"Tentativa de abrir {label} com {open_count} posições abertas (limite {self.max_open_positions}).")
+            return False
+        return True
+
+    def _track(self, position: Position):
+        self.book.add(position)
+        self.stops.add(
+            position.position_id,
+            position.symbol,
+            position.side,
+            position.stop_loss,
+            position.take_profit,
+            position.trailing_distance,
+        )
+
+    def _untrack(self, position: Position):
+        self.book.remove(position.position_id)
+        self.stops.remove(position.position_id)
+
+    def trail_stops(self, symbol: str, price: float) -> Dict[str, float]:
+        """Move os trailing stops do símbolo e registra os novos SL no journal."""
+        moved = self.stops.trail(symbol, price)
+        for pid, stop in moved.items():
+            pos = self.book.get(pid)
+            if pos is None:
+                continue
+            pos.stop_loss = stop
+            try:
+                self.position_journal.record_modify(pid, stop_loss=stop)
+            except Exception as e:
+                logger.warning(f"[PERSIST] Falha ao registrar trailing stop: {e}")
+        return moved
+
+    def check_stops(self, symbol: str, candle: dict) -> list:
+        """
+        SL/TP do candle: avalia o range [low, high] contra os níveis vigentes,
+        fecha o que disparou e só depois move os trailing stops pelo close
+        (o trailing do close não pode disparar no próprio candle).
+        """
+        self.apply_order_updates()
+        exit_reasons = {"sl": "Stop Loss 🛑", "tp": "Take Profit 💰"}
+        triggers = self.stops.evaluate(symbol, candle["low"], candle["high"])
+        for trig in triggers:
+            logger.info(
+                f"{exit_reasons[trig.kind]} atingido na posição {trig.position_id}! "
+                f"Low={candle['low']} High={candle['high']} → saída {trig.price}"
+            )
+            self.close_position(
+                symbol,
+                trig.price,  # Executa no preço do SL/TP
+                candle["datetime"],
+                reason=exit_reasons[trig.kind],
+                position_id=trig.position_id,
+            )
+        self.trail_stops(symbol, float(candle["close"]))
+        return triggers
+
+    # ========== ORDENS ==========
+
+    def _order_size(self, symbol: str, price: float) -> float:
+        """Tamanho do risk manager já no stepSize do símbolo (o mesmo que vai para a corretora)."""
+        size = self.risk.get_position_size(price)
+        if self.gateway is not None and not self.cfg.dry_run:
+            size = self.gateway.round_qty(symbol, size)
+        return size
+
+    def _submit_order(self, symbol: str, side: str, quantity: float, reduce_only: bool = False,
+                      position_id: Optional[str] = None, ref_price: Optional[float] = None) -> Optional[str]:
+        """
+        Envia ordem a mercado sem esperar resposta; devolve o clientOrderId.
+        Com `position_id`, a ordem é a entrada dessa posição e o fill a reconcilia.
+        """
+        if self.gateway is None:
+            logger.warning(f"[ORDER] Sem gateway: {side} {symbol} qty={quantity} não enviada.")
+            return None
+        cid = new_client_order_id()
+        if position_id is not None:
+            # registrado antes do envio: o fill pode chegar antes de submit() voltar
+            self._entry_orders[cid] = position_id
+        try:
+            return self.gateway.submit(symbol, side, quantity, client_order_id=cid,
+                                       reduce_only=reduce_only, ref_price=ref_price).client_order_id
+        except Exception as e:
+            self._entry_orders.pop(cid, None)
+            logger.warning(f"[ORDER] Falha ao enviar {side} {symbol}: {e}")
+            return None
+
+    def _on_order_update(self, order: LocalOrder):
+        # chamado na thread do gateway (REST ou user data stream)
+        if order.is_terminal and order.client_order_id in self._entry_orders:
+            self._order_updates.put(order)
+        if order.status == FILLED:
+            logger.info(f"[ORDER] {order.side} {order.symbol} executada: qty={order.executed_qty} "
+                        f"avg={order.avg_price} id={order.client_order_id}")
+        elif order.status in TERMINAL_STATES:
+            logger.warning(f"[ORDER] {order.side} {order.symbol} {order.status}: {order.error or ''} "
+                           f"id={order.client_order_id}")
+            self.notifier.send(f"⚠️ Ordem {order.side} {order.symbol} {order.status}: {order.error or ''}")
+        else:
+            logger.debug(f"[ORDER] {order.client_order_id} → {order.status} ({order.executed_qty})")
+
+    def apply_order_updates(self) -> int:
+        """Aplica (na thread do engine) os resultados finais das ordens de entrada."""
+        applied = 0
+        while True:
+            try:
+                order = self._order_updates.get_nowait()
+            except queue.Empty:
+                return applied
+            pid = self._entry_orders.pop(order.client_order_id, None)
+            pos = self.book.get(pid) if pid else None
+            if pos is None:
+                continue  # posição já fechada
+            if order.executed_qty > 0:
+                self._reconcile_entry(pos, order)
+            else:
+                self._drop_unfilled_entry(pos, order)
+            applied += 1
+
+    def _reconcile_entry(self, pos: Position, order: LocalOrder):
+        """Preço médio e qtd executada do fill; a comissão taker entra no preço como no modelo."""
+        sign = side_sign(pos.side)
+        entry = order.avg_price * (1 + sign * self.exec_price_model.com_taker)
+        self.book.update(pos.position_id, entry_price=entry, quantity=order.executed_qty)
+        logger.info(f"[ORDER] Entrada {pos.position_id} reconciliada: qty={order.executed_qty} "
+                    f"avg={order.avg_price} ({order.status})")
+        try:
+            self.position_journal.record_modify(pos.position_id, entry_price=entry, quantity=order.executed_qty)
+        except Exception as e:
+            logger.warning(f"[PERSIST] Falha ao registrar fill da entrada: {e}")
+
+    def _drop_unfilled_entry(self, pos: Position, order: LocalOrder):
+        """
+        Entrada sem execução (REJECTED/EXPIRED/CANCELED): a posição nunca existiu.
+        Nada de fechamento: apaga a linha de abertura (sem ledger) e o marcador do dashboard.
+        """
+        logger.warning(f"[ORDER] Entrada {pos.position_id} {order.status} sem execução; removendo posição.")
+        pos.is_open = False
+        self._untrack(pos)
+        self._clear_persisted_position(pos)
+        key = self._trade_key(pos)
+        self._safe_db_call("discard_trade", key)
+        if self.dashboard is not None and hasattr(self.dashboard, "remove_trade"):
+            try:
+                self.dashboard.remove_trade(key)
+            except Exception as e:
+                logger.warning(f"[DASHBOARD] Erro ao remover trade {key}: {e}")
+
+    def _book_snapshot(self) -> Optional[OrderBookSnapshot]:
+        if self.order_book is None:
+            return None
+        try:
+            return self.order_book()
+        except Exception as e:
+            logger.warning(f"[ORDERBOOK] Book indisponível para o preço de execução: {e}")
+            return None
+
     # ========== HELPERS ==========
 
     def _fmt_price(self, value: float) -> str:
@@ -100,6 +322,12 @@ class TradeExecutor:
             f"• Hora ⏰: {self._fmt_time(dt)}"
         )
 
+    @staticmethod
+    def _trade_key(position: Position) -> str:
+        # mesma chave na abertura, nos ticks de PnL e no fechamento (sobrevive a restart);
+        # posições gravadas antes do position book não têm trade_key e usam o formato antigo
+        return getattr(position, "trade_key", None) or trade_key(position.symbol, position.opened_at)
+
     def _safe_db_call(self, method_name: str, *args, **kwargs):
         fn = getattr(self.db, method_name, None)
         if callable(fn):
@@ -109,111 +337,105 @@ class TradeExecutor:
                 logger.warning(f"[DB] Erro em {method_name}: {e}")
 
     # ========== PERSISTÊNCIA ==========
-    def _persist_open_position(self):
-        """Salva posição aberta em disco para recuperação após restart."""
-        if self.current_position is None:
-            return
+    def _persist_open_position(self, position: Position):
+        """Registra a abertura no journal de posições (recuperação após restart)."""
         try:
-            data = {
-                "symbol": self.current_position.symbol,
-                "side": self.current_position.side,
-                "quantity": float(self.current_position.quantity),
-                "entry_price": float(self.current_position.entry_price),
-                "stop_loss": float(self.current_position.stop_loss) if self.current_position.stop_loss else None,
-                "take_profit": float(self.current_position.take_profit) if self.current_position.take_profit else None,
-                "opened_at": self.current_position.opened_at,
-                "risk_balance": getattr(self.risk, "current_balance", None),
-            }
-            with open(self._persist_path, "w", encoding="utf-8") as f:
-                json.dump(data, f)
+            record = position_to_record(
+                position,
+                risk_balance=getattr(self.risk, "current_balance", None),
+            )
+            self.position_journal.record_open(position.position_id, record)
         except Exception as e:
             logger.warning(f"[PERSIST] Falha ao salvar posição: {e}")
 
-    def _clear_persisted_position(self):
+    def _clear_persisted_position(self, position: Position):
         try:
-            if os.path.exists(self._persist_path):
-                os.remove(self._persist_path)
+            self.position_journal.record_close(
+                position.position_id,
+                closed_at=position.closed_at,
+                pnl=position.pnl,
+            )
         except Exception as e:
             logger.warning(f"[PERSIST] Falha ao limpar posição salva: {e}")
 
+    def _migrate_legacy_position_file(self):
+        """open_position.json (formato antigo) → evento open no journal, uma única vez."""
+        if not os.path.exists(self._persist_path):
+            return
+        try:
+            with open(self._persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not self.position_journal.open_positions():
+                data["quantity"] = float(data.get("quantity", 0))
+                data["entry_price"] = float(data.get("entry_price", 0))
+                data["opened_at"] = data.get("opened_at") or datetime.utcnow().isoformat()
+                pos = position_from_record(data)
+                self.position_journal.record_open(pos.position_id, position_to_record(
+                    pos, risk_balance=data.get("risk_balance")
+                ))
+                self.position_journal.sync()
+                logger.info("[PERSIST] open_position.json migrado para o journal de posições.")
+            os.remove(self._persist_path)
+        except Exception as e:
+            logger.warning(f"[PERSIST] Falha ao migrar open_position.json: {e}")
+
+    def close(self):
+        """Grava o que está pendente (journal de posições e CSV) no encerramento."""
+        try:
+            self.position_journal.close()
+        except Exception as e:
+            logger.warning(f"[PERSIST] Erro ao fechar journal de posições: {e}")
+        self.trade_logger.close()
+        if self.gateway is not None:
+            self.gateway.close()
+
     def restore_position_from_disk(self, last_price: float = None, last_dt: Optional[datetime] = None):
         """
-        Recupera posição aberta salva em disco. Se já tiver posição, não faz nada.
-        Se last_price for fornecido e SL/TP já tiverem sido atingidos, fecha imediatamente.
+        Recupera as posições abertas do journal (replay feito na construção). Se o livro
+        já tiver posições, não faz nada. Se last_price for fornecido e o SL/TP de alguma
+        posição já tiver sido atingido, ela é fechada imediatamente.
         """
-        if self.current_position is not None:
+        if len(self.book):
             return
-        if not os.path.exists(self._persist_path):
+        self._migrate_legacy_position_file()
+        open_positions = self.position_journal.open_positions()
+        if not open_positions:
             return
         try:
-            with open(self._persist_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            symbol = data.get("symbol")
-            side = data.get("side")
-            qty = float(data.get("quantity", 0))
-            entry = float(data.get("entry_price", 0))
-            sl = data.get("stop_loss")
-            tp = data.get("take_profit")
-            opened_at = data.get("opened_at") or datetime.utcnow().isoformat()
-            risk_balance = data.get("risk_balance")
+            records = sorted(open_positions.values(), key=lambda r: r.get("opened_at") or "")
+            if self.single_position_mode and len(records) > 1:
+                logger.warning(f"[PERSIST] {len(records)} posições abertas no journal com single_position_mode; restaurando todas.")
 
+            # saldo do risk manager é o da abertura mais recente
+            risk_balance = records[-1].get("risk_balance")
             if risk_balance is not None and hasattr(self.risk, "current_balance"):
                 try:
                     self.risk.current_balance = float(risk_balance)
                 except Exception:
                     pass
 
-            pos = Position(
-                symbol=symbol,
-                side=side,
-                quantity=qty,
-                entry_price=entry,
-                stop_loss=sl,
-                take_profit=tp,
-                opened_at=opened_at,
-            )
-            self.current_position = pos
+            for data in records:
+                self._track(position_from_record(data))
 
             # Se já atingiu SL/TP enquanto estava offline, fecha imediatamente
+            recovered = set()
             if last_price is not None:
-                if side == "buy":
-                    if sl and last_price <= sl:
-                        self.close_position(
-                            symbol,
-                            sl,
-                            last_dt or datetime.utcnow(),
-                            reason="Recovered SL/TP"
-                        )
-                        return
-                    if tp and last_price >= tp:
+                for symbol in {p.symbol for p in self.book}:
+                    for trig in self.stops.evaluate(symbol, last_price, last_price):
                         self.close_position(
                             symbol,
-                            tp,
+                            trig.price,
                             last_dt or datetime.utcnow(),
-                            reason="Recovered SL/TP"
+                            reason="Recovered SL/TP",
+                            position_id=trig.position_id,
                         )
-                        return
-                else:
-                    if sl and last_price >= sl:
-                        self.close_position(
-                            symbol,
-                            sl,
-                            last_dt or datetime.utcnow(),
-                            reason="Recovered SL/TP"
-                        )
-                        return
-                    if tp and last_price <= tp:
-                        self.close_position(
-                            symbol,
-                            tp,
-                            last_dt or datetime.utcnow(),
-                            reason="Recovered SL/TP"
-                        )
-                        return
+                        recovered.add(trig.position_id)
 
-            # Reenvia para dashboard como aberta
-            self._push_open_trade_to_dashboard(self.current_position)
-            logger.info("[PERSIST] Posição aberta restaurada do disco.")
+            # Reenvia para dashboard como abertas
+            for pos in self.book:
+                self._push_open_trade_to_dashboard(pos)
+            logger.info(f"[PERSIST] {len(self.book)} posição(ões) aberta(s) restaurada(s) do journal "
+                        f"({len(recovered)} fechada(s) por SL/TP).")
         except Exception as e:
             logger.warning(f"[PERSIST] Falha ao restaurar posição: {e}")
 
@@ -234,6 +456,8 @@ class TradeExecutor:
         side_norm = "buy" if position.side.lower() in ("buy", "long") else "sell"
 
         trade_payload = {
+            # id estável: posições concorrentes abertas no mesmo candle não se sobrescrevem
+            "id": self._trade_key(position),
             "side": side_norm,
             "time_entry": time_entry,
             "time_exit": time_exit,
@@ -266,6 +490,8 @@ class TradeExecutor:
         side_norm = "buy" if position.side.lower() in ("buy", "long") else "sell"
 
         trade_payload = {
+            # id estável: posições concorrentes abertas no mesmo candle não se sobrescrevem
+            "id": self._trade_key(position),
             "side": side_norm,
             "time_entry": time_entry,
             "price_entry": float(position.entry_price),
@@ -282,22 +508,22 @@ class TradeExecutor:
 
     # ========== ABERTURA ==========
 
-    def open_long(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None, sl: float = 0.0, tp: float = 0.0):
+    def open_long(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None, sl: float = 0.0, tp: float = 0.0,
+                  trailing: float = 0.0):
 
-        if self.current_position is not None:
-            logger.warning("Tentativa de abrir LONG com posição já aberta.")
+        if not self._can_open("LONG"):
             return
 
-        size = self.risk.get_position_size(price)
+        size = self._order_size(symbol, price)
         now_iso = candle_dt.isoformat()
 
         mid = price
         bid = bid if bid is not None else mid
         ask = ask if ask is not None else mid
 
-        entry_exec = self.exec_price_model.exec_buy(bid=bid, ask=ask)
+        entry_exec = self.exec_price_model.exec_buy(bid=bid, ask=ask, qty=size, book=self._book_snapshot())
 
-        self.current_position = Position(
+        pos = Position(
             symbol=symbol,
             side="buy",
             quantity=size,
@@ -305,42 +531,48 @@ class TradeExecutor:
             stop_loss=sl,
             take_profit=tp,
             opened_at=now_iso,
+            trailing_distance=float(trailing or 0.0),
         )
 
         # extras pro logger
-        self.current_position.entry_raw = mid
-        self.current_position.entry_bid = bid
-        self.current_position.entry_ask = ask
+        pos.entry_raw = mid
+        pos.entry_bid = bid
+        pos.entry_ask = ask
+        pos.trade_key = trade_key(symbol, now_iso, pos.position_id)
+        self._track(pos)
 
 
         if self.cfg.dry_run:
             logger.info(f"[DRY-RUN] LONG {symbol} @ {entry_exec} size={size} sl={sl} tp={tp}")
         else:
             logger.info(f"[ORDER] Enviando COMPRA REAL {symbol} @ {entry_exec} sl={sl} tp={tp}")
+            pos.entry_order_id = self._submit_order(symbol, "BUY", size, position_id=pos.position_id,
+                                                    ref_price=price)
 
-        self._safe_db_call("log_trade_open", symbol, "long", entry_exec, size)
+        self._safe_db_call("log_trade_open", symbol, "long", entry_exec, size,
+                           opened_at=now_iso, key=self._trade_key(pos))
         
         # Telegram message
         self.notifier.send(self._fmt_msg_open("long", symbol, entry_exec, sl, tp, candle_dt))
         
-        self._push_open_trade_to_dashboard(self.current_position)
-        self._persist_open_position()
+        self._push_open_trade_to_dashboard(pos)
+        self._persist_open_position(pos)
 
-    def open_short(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None, sl: float = 0.0, tp: float = 0.0):
-        if self.current_position is not None:
-            logger.warning("Tentativa de abrir SHORT com posição já aberta.")
+    def open_short(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None, sl: float = 0.0, tp: float = 0.0,
+                   trailing: float = 0.0):
+        if not self._can_open("SHORT"):
             return
 
-        size = self.risk.get_position_size(price)
+        size = self._order_size(symbol, price)
         now_iso = candle_dt.isoformat()
 
         mid = price
         bid = bid if bid is not None else mid
         ask = ask if ask is not None else mid
 
-        entry_exec = self.exec_price_model.exec_sell(bid=bid, ask=ask)
+        entry_exec = self.exec_price_model.exec_sell(bid=bid, ask=ask, qty=size, book=self._book_snapshot())
 
-        self.current_position = Position(
+        pos = Position(
             symbol=symbol,
             side="sell",
             quantity=size,
@@ -348,60 +580,61 @@ class TradeExecutor:
             stop_loss=sl,
             take_profit=tp,
             opened_at=now_iso,
+            trailing_distance=float(trailing or 0.0),
         )
 
-        self.current_position.entry_raw = mid
-        self.current_position.entry_bid = bid
-        self.current_position.entry_ask = ask
+        pos.entry_raw = mid
+        pos.entry_bid = bid
+        pos.entry_ask = ask
+        pos.trade_key = trade_key(symbol, now_iso, pos.position_id)
+        self._track(pos)
 
 
         if self.cfg.dry_run:
             logger.info(f"[DRY-RUN] SHORT {symbol} @ {entry_exec} size={size} sl={sl} tp={tp}")
         else:
             logger.info(f"[ORDER] Enviando VENDA REAL {symbol} @ {entry_exec} sl={sl} tp={tp}")
+            pos.entry_order_id = self._submit_order(symbol, "SELL", size, position_id=pos.position_id,
+                                                    ref_price=price)
 
-        self._safe_db_call("log_trade_open", symbol, "short", entry_exec, size)
+        self._safe_db_call("log_trade_open", symbol, "short", entry_exec, size,
+                           opened_at=now_iso, key=self._trade_key(pos))
 
         # Telegram message
         self.notifier.send(self._fmt_msg_open("short", symbol, entry_exec, sl, tp, candle_dt))
         
-        self._push_open_trade_to_dashboard(self.current_position)
-        self._persist_open_position()
+        self._push_open_trade_to_dashboard(pos)
+        self._persist_open_position(pos)
 
     # ========== ATUALIZAÇÃO E FECHAMENTO ==========
 
     def update_position(self, symbol: str, price: float):
-        if self.current_position is None:
-            return
-
-        pos = self.current_position
-
-        # cálculo informativo (PnL bruto, no mid)
-        if pos.side.lower() in ("buy", "long"):
-            pnl = (price - pos.entry_price) * pos.quantity
-        else:
-            pnl = (pos.entry_price - price) * pos.quantity
-
-        self._safe_db_call("log_pnl", symbol, pnl)
-        logger.debug(f"[PnL] {symbol} = {pnl:.4f}")
-
-    def close_position(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None, reason: str = "Signal"):
+        # cálculo informativo (PnL bruto, no mid) de todas as posições do símbolo
+        for pos, pnl in self.book.pnl_by_position(symbol, price):
+            self._safe_db_call("log_pnl", symbol, pnl, key=self._trade_key(pos))
+            logger.debug(f"[PnL] {symbol} {pos.position_id} = {pnl:.4f}")
+
+    def close_position(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None,
+                       reason: str = "Signal", position_id: Optional[str] = None):
+        """Fecha `position_id` ou, sem ele, a posição mais recente do símbolo."""
         print("🚨 DEBUG: close_position FOI CHAMADO", symbol, price)
 
-        if self.current_position is None:
+        # fill/rejeição da entrada antes de decidir o que fechar (e quanto)
+        self.apply_order_updates()
+        pos = self.book.get(position_id) if position_id else self.book.latest(symbol)
+        if pos is None:
             return
 
-        pos = self.current_position
-
         mid_close = price
         bid = bid if bid is not None else mid_close
         ask = ask if ask is not None else mid_close
 
-        # definir preço REAL de fechamento
+        # definir preço REAL de fechamento (VWAP do tamanho da posição no book)
+        book = self._book_snapshot()
         if pos.side.lower() in ("buy", "long"):
-            close_exec = self.exec_price_model.exec_sell(bid=bid, ask=ask)
+            close_exec = self.exec_price_model.exec_sell(bid=bid, ask=ask, qty=pos.quantity, book=book)
         else:
-            close_exec = self.exec_price_model.exec_buy(bid=bid, ask=ask)
+            close_exec = self.exec_price_model.exec_buy(bid=bid, ask=ask, qty=pos.quantity, book=book)
 
         # cálculo PnL real
         if pos.side.lower() in ("buy", "long"):
@@ -409,6 +642,12 @@ class TradeExecutor:
         else:
             pnl_exec = (pos.entry_price - close_exec) * pos.quantity
 
+        if not self.cfg.dry_run:
+            exit_side = "SELL" if pos.side.lower() in ("buy", "long") else "BUY"
+            logger.info(f"[ORDER] Enviando {exit_side} REAL {symbol} qty={pos.quantity} ({reason})")
+            pos.exit_order_id = self._submit_order(symbol, exit_side, pos.quantity, reduce_only=True)
+            self._entry_orders.pop(pos.entry_order_id or "", None)
+
         pos.closed_at = candle_dt.isoformat()
         pos.pnl = pnl_exec
         pos.is_open = False
@@ -424,7 +663,8 @@ class TradeExecutor:
         except Exception as e:
             logger.warning(f"[RISK] Erro ao atualizar balance: {e}")
 
-        self._safe_db_call("log_trade_close", symbol, pos.side, close_exec, pnl_exec)
+        self._safe_db_call("log_trade_close", symbol, pos.side, close_exec, pnl_exec,
+                           closed_at=pos.closed_at, key=self._trade_key(pos))
 
         # salvar CSV PRO
         try:
@@ -435,5 +675,14 @@ class TradeExecutor:
         self.notifier.send(self._fmt_msg_close(reason, symbol, pos.side, close_exec, pnl_exec, candle_dt))
 
         self._push_closed_trade_to_dashboard(pos, close_exec)
-        self.current_position = None
-        self._clear_persisted_position()
+        self._untrack(pos)
+        self._clear_persisted_position(pos)
+
+    def close_all(self, symbol: str, price: float, candle_dt: datetime, bid: float = None, ask: float = None,
+                  reason: str = "Signal", side: Optional[str] = None) -> int:
+        """Fecha todas as posições do símbolo (só as do `side`, se informado)."""
+        positions = self.book.by_symbol(symbol, side)
+        for pos in positions:
+            self.close_position(symbol, price, candle_dt, bid=bid, ask=ask, reason=reason,
+                                position_id=pos.position_id)
+        return len(positions)
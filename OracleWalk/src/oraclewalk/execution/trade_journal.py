@@ -0,0 +1,295 @@
+# file: oraclewalk/execution/trade_journal.py
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from oraclewalk.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# pyarrow é opcional: sem ele o journal fica desativado e só o CSV é escrito.
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.dataset as ds  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = None
+    ds = None
+    pq = None
+
+PARTITION_KEY = "date"
+
+FLOAT_COLUMNS = (
+    "entry_raw",
+    "entry_exec",
+    "close_raw",
+    "close_exec",
+    "quantity",
+    "notional_entry_exec",
+    "notional_close_exec",
+    "commission_usdt",
+    "pnl_mid",
+    "pnl_exec",
+)
+
+
+def journal_schema():
+    """Colunas tipadas (mesmos nomes do trades.csv); `date` é a partição, fora do arquivo."""
+    fields = [
+        ("id", pa.int64()),
+        ("open_time", pa.timestamp("us")),
+        ("close_time", pa.timestamp("us")),
+        ("symbol", pa.string()),
+        ("side", pa.string()),
+    ]
+    fields += [(name, pa.float64()) for name in FLOAT_COLUMNS]
+    return pa.schema(fields)
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TradeJournal:
+    """
+    Journal colunar (Parquet) de trades fechados, particionado por dia:
+
+        <root>/date=YYYY-MM-DD/part-<epoch_ms>-<seq>.parquet
+
+    - `append(row)` só acumula em memória; a cada `row_group_size` trades
+      (ou `flush_interval` segundos desde o primeiro pendente, vigiado por uma
+      thread própria mesmo sem novos trades) os trades de cada dia viram um
+      arquivo pequeno com um row group. A escrita vai para um .tmp oculto e
+      entra com os.replace, então leitores nunca veem arquivo parcial.
+    - `compact(date)` junta os arquivos pequenos de um dia num só; quando a
+      data dos trades vira, roda na thread do journal, fora do engine.
+    - Sem pyarrow, `enabled=False` e tudo vira no-op.
+    """
+
+    def __init__(self, root_dir: str, row_group_size: int = 16, flush_interval: float = 60.0):
+        self.root_dir = root_dir
+        self.row_group_size = max(1, row_group_size)
+        self.flush_interval = flush_interval
+        self.enabled = pa is not None
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_since: Optional[float] = None
+        self._last_date: Optional[str] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        # compactação usa lock próprio: o engine continua fazendo append/flush
+        self._compact_lock = threading.Lock()
+        self._to_compact: List[str] = []
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        if not self.enabled:
+            logger.warning("[JOURNAL] pyarrow não instalado; journal Parquet desativado (só CSV).")
+            return
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._worker = threading.Thread(target=self._run_worker, daemon=True, name="TradeJournal")
+        self._worker.start()
+
+    # -----------------------------
+    # ESCRITA
+    # -----------------------------
+    def append(self, row: Dict[str, Any]) -> None:
+        """`row` no formato do trades.csv (id, open_time, close_time, symbol, side, preços...)."""
+        if not self.enabled:
+            return
+        record = {
+            "id": int(row["id"]) if row.get("id") not in (None, "") else None,
+            "open_time": _to_datetime(row.get("open_time")),
+            "close_time": _to_datetime(row.get("close_time")),
+            "symbol": str(row.get("symbol") or ""),
+            "side": str(row.get("side") or ""),
+        }
+        for name in FLOAT_COLUMNS:
+            record[name] = _to_float(row.get(name))
+
+        with self._lock:
+            self._pending.append(record)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            due = (
+                len(self._pending) >= self.row_group_size
+                or time.monotonic() - self._pending_since >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    @staticmethod
+    def _partition_of(record: Dict[str, Any]) -> str:
+        ts = record["open_time"] or record["close_time"] or datetime.utcnow()
+        return ts.strftime("%Y-%m-%d")
+
+    def _partition_dir(self, date_str: str) -> str:
+        return os.path.join(self.root_dir, f"{PARTITION_KEY}={date_str}")
+
+    def flush(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._pending_since = None
+            if not pending:
+                return
+            by_date: Dict[str, List[Dict[str, Any]]] = {}
+            for record in pending:
+                by_date.setdefault(self._partition_of(record), []).append(record)
+            for date_str, records in sorted(by_date.items()):
+                try:
+                    self._write_part(date_str, records)
+                except Exception as e:
+                    logger.warning(f"[JOURNAL] Falha ao gravar {len(records)} trade(s) em {date_str}: {e}")
+            newest = max(by_date)
+            previous, self._last_date = self._last_date, newest
+            if previous is not None and previous < newest:
+                self._to_compact.append(previous)
+                self._wake.set()
+
+    # -----------------------------
+    # THREAD DO JOURNAL
+    # -----------------------------
+    def _flush_wait(self) -> float:
+        """Segundos até o pendente mais antigo vencer `flush_interval`."""
+        with self._lock:
+            since = self._pending_since
+        if since is None:
+            return self.flush_interval
+        return max(0.0, since + self.flush_interval - time.monotonic())
+
+    def _run_worker(self) -> None:
+        while True:
+            self._wake.wait(self._flush_wait())
+            self._wake.clear()
+            if self._flush_wait() <= 0:
+                self.flush()
+            self._run_compactions()
+            if self._closed:
+                return
+
+    def _run_compactions(self) -> None:
+        while True:
+            with self._lock:
+                if not self._to_compact:
+                    return
+                date_str = self._to_compact.pop(0)
+            self.compact(date_str)
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        # prefixo "." → ignorado pelo pyarrow.dataset enquanto não é renomeado
+        head, tail = os.path.split(path)
+        return os.path.join(head, f".{tail}.tmp")
+
+    def _write_part(self, date_str: str, records: List[Dict[str, Any]]) -> str:
+        part_dir = self._partition_dir(date_str)
+        os.makedirs(part_dir, exist_ok=True)
+        self._seq += 1
+        name = f"part-{int(time.time() * 1000)}-{self._seq:04d}.parquet"
+        path = os.path.join(part_dir, name)
+        table = pa.Table.from_pylist(records, schema=journal_schema())
+        tmp = self._tmp_path(path)
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+        return path
+
+    def compact(self, date_str: str) -> Optional[str]:
+        """Junta os arquivos de um dia num só (um row group por arquivo antigo)."""
+        if not self.enabled:
+            return None
+        part_dir = self._partition_dir(date_str)
+        with self._compact_lock:
+            try:
+                parts = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+            except FileNotFoundError:
+                return None
+            if len(parts) < 2:
+                return None
+            paths = [os.path.join(part_dir, f) for f in parts]
+            target = os.path.join(part_dir, f"compact-{int(time.time() * 1000)}.parquet")
+            tmp = self._tmp_path(target)
+            try:
+                with pq.ParquetWriter(tmp, journal_schema(), compression="zstd") as writer:
+                    for p in paths:
+                        writer.write_table(pq.read_table(p, schema=journal_schema()))
+                os.replace(tmp, target)
+                for p in paths:
+                    os.remove(p)
+            except Exception as e:
+                logger.warning(f"[JOURNAL] Falha ao compactar {part_dir}: {e}")
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                return None
+        return target
+
+    def close(self) -> None:
+        """Grava os pendentes e espera as compactações em andamento."""
+        self.flush()
+        if self._worker is None or self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._worker.join()
+
+
+def load_journal(
+    root_dir: str,
+    symbols: Optional[Iterable[str]] = None,
+    start: Optional[Any] = None,
+    end: Optional[Any] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Carrega trades do journal com filtros empurrados para o pyarrow:
+    partições fora de [start, end] nem são abertas e `symbol` filtra por
+    estatística de row group. start/end aceitam datetime ou string ISO.
+    """
+    if pa is None:
+        raise ImportError("pyarrow é necessário para ler o journal Parquet (pip install pyarrow)")
+    if not os.path.isdir(root_dir):
+        return pd.DataFrame(columns=columns or journal_schema().names)
+
+    partitioning = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+    dataset = ds.dataset(root_dir, format="parquet", partitioning=partitioning)
+
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    start_dt = _to_datetime(start)
+    end_dt = _to_datetime(end)
+    if start_dt is not None:
+        expr = _and(ds.field(PARTITION_KEY) >= start_dt.strftime("%Y-%m-%d"))
+        expr = _and(ds.field("open_time") >= pa.scalar(start_dt, type=pa.timestamp("us")))
+    if end_dt is not None:
+        expr = _and(ds.field(PARTITION_KEY) <= end_dt.strftime("%Y-%m-%d"))
+        expr = _and(ds.field("open_time") <= pa.scalar(end_dt, type=pa.timestamp("us")))
+    if symbols is not None:
+        expr = _and(ds.field("symbol").isin(list(symbols)))
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    df = table.to_pandas()
+    if "open_time" in df.columns:
+        df = df.sort_values("open_time", kind="stable").reset_index(drop=True)
+    return df
@@ -1,8 +1,31 @@
 # file: oraclewalk/execution/trade_logger.py
 
+import atexit
 import os
 import csv
-from typing import Any
+import threading
+from typing import IO, Any, Optional
+
+from oraclewalk.execution.trade_journal import TradeJournal
+from oraclewalk.utils.file_tail import tail_lines
+
+HEADER = [
+    "id",
+    "open_time",
+    "close_time",
+    "symbol",
+    "side",
+    "entry_raw",
+    "entry_exec",
+    "close_raw",
+    "close_exec",
+    "quantity",
+    "notional_entry_exec",
+    "notional_close_exec",
+    "commission_usdt",
+    "pnl_mid",
+    "pnl_exec",
+]
 
 
 class ProTradeLogger:
@@ -16,86 +39,123 @@ class ProTradeLogger:
       - comissão em USDT
       - PnL no preço bruto (mid) e PnL real (execução)
     Tudo protegido com try/except para nunca quebrar o engine.
+
+    Os arquivos ficam abertos (append) entre trades: o principal durante toda
+    a vida do logger e o diário até a data virar. Cada `flush_every` linhas o
+    buffer é descarregado (padrão 1: o trade já está no disco ao retornar).
+    O contador de id vem da última linha do trades.csv (leitura do fim do
+    arquivo), então a construção não depende do tamanho do histórico.
     """
 
-    def __init__(self, main_filename: str = "trades.csv", log_dir: str = "logs") -> None:
+    def __init__(
+        self,
+        main_filename: str = "trades.csv",
+        log_dir: str = "logs",
+        flush_every: int = 1,
+        journal: Optional[TradeJournal] = None,
+    ) -> None:
         self.main_filename = main_filename
+        # journal Parquet opcional (mesma linha, colunas tipadas)
+        self.journal = journal
         self.log_dir = log_dir
+        self.flush_every = max(1, flush_every)
         os.makedirs(self.log_dir, exist_ok=True)
 
-        self._ensure_main_header()
-        self._counter = self._load_existing_count()
+        self._lock = threading.Lock()
+        self._unflushed = 0
+        self._main: Optional[IO[str]] = None
+        self._main_writer = None
+        self._daily: Optional[IO[str]] = None
+        self._daily_writer = None
+        self._daily_date: Optional[str] = None
+
+        self._counter = self._load_last_id()
+        self._open_main()
+        atexit.register(self.close)
 
     # -----------------------------------------------------
-    def _ensure_main_header(self) -> None:
-        if os.path.exists(self.main_filename):
-            return
+    @staticmethod
+    def _open_append(path: str) -> IO[str]:
+        """Abre em append e escreve o cabeçalho se o arquivo está vazio/novo."""
+        f = open(path, "a", newline="")
+        if f.tell() == 0:
+            csv.writer(f).writerow(HEADER)
+            f.flush()
+        return f
 
+    def _open_main(self) -> None:
         try:
-            with open(self.main_filename, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    [
-                        "id",
-                        "open_time",
-                        "close_time",
-                        "symbol",
-                        "side",
-                        "entry_raw",
-                        "entry_exec",
-                        "close_raw",
-                        "close_exec",
-                        "quantity",
-                        "notional_entry_exec",
-                        "notional_close_exec",
-                        "commission_usdt",
-                        "pnl_mid",
-                        "pnl_exec",
-                    ]
-                )
+            self._main = self._open_append(self.main_filename)
+            self._main_writer = csv.writer(self._main)
         except Exception:
-            pass
+            self._main = None
+            self._main_writer = None
 
     # -----------------------------------------------------
-    def _load_existing_count(self) -> int:
+    def _load_last_id(self) -> int:
+        """Id da última linha do trades.csv (lê só o fim do arquivo)."""
         try:
-            if not os.path.exists(self.main_filename):
-                return 0
-            with open(self.main_filename, "r") as f:
-                total = sum(1 for _ in f) - 1  # header
-                return max(total, 0)
+            for line in reversed(tail_lines(self.main_filename, 5)):
+                first = line.split(",", 1)[0].strip()
+                if first.isdigit():
+                    return int(first)
+            return 0
         except Exception:
             return 0
 
     # -----------------------------------------------------
     def _ensure_daily_file(self, date_str: str) -> str:
+        """Mantém o handle do arquivo diário em cache até a data mudar."""
         path = os.path.join(self.log_dir, f"trades_{date_str}.csv")
-        if not os.path.exists(path):
+        if date_str == self._daily_date and self._daily is not None:
+            return path
+        self._close_daily()
+        try:
+            self._daily = self._open_append(path)
+            self._daily_writer = csv.writer(self._daily)
+            self._daily_date = date_str
+        except Exception:
+            self._daily = None
+            self._daily_writer = None
+            self._daily_date = None
+        return path
+
+    def _close_daily(self) -> None:
+        if self._daily is not None:
             try:
-                with open(path, "w", newline="") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(
-                        [
-                            "id",
-                            "open_time",
-                            "close_time",
-                            "symbol",
-                            "side",
-                            "entry_raw",
-                            "entry_exec",
-                            "close_raw",
-                            "close_exec",
-                            "quantity",
-                            "notional_entry_exec",
-                            "notional_close_exec",
-                            "commission_usdt",
-                            "pnl_mid",
-                            "pnl_exec",
-                        ]
-                    )
+                self._daily.close()
+            except Exception:
+                pass
+        self._daily = None
+        self._daily_writer = None
+        self._daily_date = None
+
+    # -----------------------------------------------------
+    def flush(self) -> None:
+        for f in (self._main, self._daily):
+            if f is not None:
+                try:
+                    f.flush()
+                except Exception:
+                    pass
+        self._unflushed = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._main is not None:
+                try:
+                    self._main.close()
+                except Exception:
+                    pass
+            self._main = None
+            self._main_writer = None
+            self._close_daily()
+        if self.journal is not None:
+            try:
+                self.journal.close()
             except Exception:
                 pass
-        return path
 
     # -----------------------------------------------------
     @staticmethod
@@ -132,6 +192,10 @@ class ProTradeLogger:
           - pos.close_raw
           - pos.close_exec
         """
+        with self._lock:
+            self._log_trade(pos, cfg)
+
+    def _log_trade(self, pos, cfg) -> None:
         try:
             self._counter += 1
 
@@ -172,7 +236,8 @@ class ProTradeLogger:
 
             # arquivo diário
             date_str = self._extract_date(open_time)
-            daily_path = self._ensure_daily_file(date_str) if date_str else None
+            if date_str:
+                self._ensure_daily_file(date_str)
 
             row = [
                 self._counter,
@@ -192,18 +257,29 @@ class ProTradeLogger:
                 pnl_exec,
             ]
 
-            # trades.csv
+            # trades.csv (reabre se o handle foi perdido)
+            if self._main is None:
+                self._open_main()
             try:
-                with open(self.main_filename, "a", newline="") as f:
-                    csv.writer(f).writerow(row)
+                if self._main_writer is not None:
+                    self._main_writer.writerow(row)
             except Exception:
                 pass
 
             # logs/trades_YYYY-MM-DD.csv
-            if daily_path:
+            if date_str and self._daily_writer is not None:
+                try:
+                    self._daily_writer.writerow(row)
+                except Exception:
+                    pass
+
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self.flush()
+
+            if self.journal is not None:
                 try:
-                    with open(daily_path, "a", newline="") as f:
-                        csv.writer(f).writerow(row)
+                    self.journal.append(dict(zip(HEADER, row)))
                 except Exception:
                     pass
 
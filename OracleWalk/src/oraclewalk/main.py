@@ -1,4 +1,5 @@
 # file: oraclewalk/main.py
+import multiprocessing
 import os
 import sys
 from pathlib import Path
@@ -49,4 +50,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # necessário para o dashboard em processo separado no binário PyInstaller
+    multiprocessing.freeze_support()
     main()
@@ -1,8 +1,14 @@
 # file: oraclewalk/notifications/telegram_notifier.py
 
-from typing import Optional
+import asyncio
+import inspect
+import queue
 import sys
+import threading
+import time
 import types
+from datetime import timedelta
+from typing import Any, List, Optional
 from oraclewalk.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -33,18 +39,96 @@ except Exception as e:
         logger.warning(f"Telegram Bot indisponível: {e}. Notificações serão apenas logadas.")
 
 
+# Limites da API do Bot: ~1 msg/s por chat e 4096 caracteres por mensagem.
+MAX_MESSAGE_LEN = 4096
+COALESCE_SEPARATOR = "\n\n"
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Segundos pedidos por um RetryAfter (429) do Telegram, ou None se não for esse erro."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def coalesce(texts: List[str], limit: int = MAX_MESSAGE_LEN) -> List[str]:
+    """
+    Junta mensagens de uma rajada no menor número de mensagens <= `limit`.
+    Uma mensagem sozinha maior que o limite é cortada em pedaços.
+    """
+    out: List[str] = []
+    current = ""
+    for text in texts:
+        while len(text) > limit:
+            if current:
+                out.append(current)
+                current = ""
+            out.append(text[:limit])
+            text = text[limit:]
+        if not current:
+            current = text
+        elif len(current) + len(COALESCE_SEPARATOR) + len(text) <= limit:
+            current += COALESCE_SEPARATOR + text
+        else:
+            out.append(current)
+            current = text
+    if current:
+        out.append(current)
+    return out
+
+
 class TelegramNotifier:
     """
-    Wrapper simples para envio de mensagens Telegram.
-    Se a lib não estiver disponível ou der erro (caso do Python 3.13),
-    apenas registra a mensagem no log e segue o jogo.
+    Envio de mensagens Telegram fora do loop de trading.
+
+    - `send()` só enfileira (fila limitada, nunca bloqueia); se a fila estiver
+      cheia a mensagem é descartada e contada em `dropped`.
+    - Um worker em thread daemon drena a fila: espera `coalesce_window`
+      segundos após a primeira mensagem e junta a rajada numa só,
+      respeita `min_interval` entre envios e refaz com backoff exponencial
+      (ou o tempo pedido pelo RetryAfter do Telegram) até `max_retries`.
+    - `flush()` espera a fila esvaziar; `close()` faz flush e para o worker.
+    - `bot` pode ser injetado (qualquer objeto com send_message); se a lib
+      não estiver disponível ou der erro (caso do Python 3.13), apenas
+      registra a mensagem no log e segue o jogo.
     """
 
-    def __init__(self, token: str, chat_id: str):
+    def __init__(
+        self,
+        token: str,
+        chat_id: str,
+        bot: Any = None,
+        max_queue: int = 200,
+        coalesce_window: float = 1.0,
+        min_interval: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ):
         self.token = token
         self.chat_id = chat_id
-        self.bot: Optional["Bot"] = None  # type: ignore
+        self.bot: Optional["Bot"] = bot  # type: ignore
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
 
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._last_sent = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        if self.bot is not None:
+            return
         if Bot is not None and token and chat_id:
             try:
                 self.bot = Bot(token=self.token)
@@ -57,13 +141,119 @@ class TelegramNotifier:
             else:
                 logger.info("Token ou chat_id vazios. Notificações apenas em log.")
 
+    # -----------------------------
+    # API (chamada pelo engine / executor)
+    # -----------------------------
     def send(self, text: str) -> None:
         if self.bot is None:
             # fallback: só loga
             logger.info(f"[TELEGRAM MOCK] {text}")
             return
+        if self._stop.is_set():
+            logger.warning(f"[TELEGRAM] Notifier encerrado; mensagem descartada: {text[:80]}")
+            return
 
+        self._ensure_worker()
         try:
-            self.bot.send_message(chat_id=self.chat_id, text=text)
-        except Exception as e:
-            logger.error(f"Erro ao enviar mensagem Telegram: {e}")
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"[TELEGRAM] Fila cheia ({self._queue.maxsize}); mensagem descartada (total={self.dropped}).")
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera até tudo que foi enfileirado ser enviado (ou desistido). True se esvaziou."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Envia o que está na fila (até `timeout`) e encerra o worker."""
+        if self._worker is not None and not self.flush(timeout):
+            logger.warning(f"[TELEGRAM] {self.pending()} mensagem(ns) não enviada(s) no encerramento.")
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+
+    # -----------------------------
+    # WORKER
+    # -----------------------------
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True, name="TelegramNotifier")
+                self._worker.start()
+
+    def _collect_burst(self, first: str) -> List[str]:
+        """Primeira mensagem + o que chegar dentro da janela de coalescência."""
+        texts = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stop.is_set():
+                    texts.append(self._queue.get_nowait())
+                else:
+                    texts.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                return texts
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            texts = self._collect_burst(first)
+            try:
+                for message in coalesce(texts):
+                    self._send_with_retry(message)
+            except Exception as e:
+                logger.error(f"[TELEGRAM] Erro inesperado no worker: {e}")
+            finally:
+                for _ in texts:
+                    self._queue.task_done()
+        if self._loop is not None:
+            self._loop.close()
+
+    def _wait_rate_limit(self) -> None:
+        wait = self._last_sent + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _send_with_retry(self, text: str) -> bool:
+        for attempt in range(self.max_retries + 1):
+            self._wait_rate_limit()
+            try:
+                self._deliver(text)
+                self._last_sent = time.monotonic()
+                return True
+            except Exception as e:
+                self._last_sent = time.monotonic()
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Erro ao enviar mensagem Telegram (desistindo após {attempt + 1} tentativas): {e}")
+                    return False
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.backoff * (2 ** attempt)
+                logger.warning(f"[TELEGRAM] Falha no envio ({e}); nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+        return False
+
+    def _deliver(self, text: str) -> None:
+        result = self.bot.send_message(chat_id=self.chat_id, text=text)
+        # python-telegram-bot >= 20 devolve corrotina: roda num loop próprio do worker
+        if inspect.isawaitable(result):
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(result)
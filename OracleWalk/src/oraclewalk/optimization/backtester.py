@@ -1,6 +1,10 @@
 # file: oraclewalk/optimization/backtester.py
 
+from typing import Optional
+
+import numpy as np
 import pandas as pd
+from oraclewalk.execution.execution_price_model import ExecutionPriceModel
 from oraclewalk.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -9,10 +13,16 @@ logger = setup_logger(__name__)
 class Backtester:
     """
     Backtester simples baseado em sinais da estratégia.
+
+    O loop só decide entradas/saídas; o PnL dos trades é calculado depois,
+    de uma vez, em arrays. Com `price_model` os preços viram preços
+    executados (spread via colunas bid/ask se existirem, slippage/impacto e
+    comissão) por `ExecutionPriceModel.trade_costs`.
     """
 
-    def __init__(self, risk_manager):
+    def __init__(self, risk_manager, price_model: Optional[ExecutionPriceModel] = None):
         self.risk_manager = risk_manager
+        self.price_model = price_model
 
     def run(self, df: pd.DataFrame, strategy) -> dict:
         """
@@ -41,43 +51,49 @@ class Backtester:
             if col not in df_iter.columns:
                 raise ValueError(f"DataFrame de entrada para backtest precisa da coluna '{col}'.")
 
-        equity = self.risk_manager.initial_balance
-        balance = equity
-        wins = 0
-        losses = 0
-
-        position = None
-        entry_price = None
+        balance = self.risk_manager.initial_balance
 
-        for i in range(len(signals)):
-            sig = signals["signal"].iloc[i]
-            price = df_iter["close"].iloc[i]
+        sig_values = signals["signal"].to_numpy()
+        entries, exits, sides = [], [], []
+        position = 0
+        entry_i = None
 
-            # entrar comprado
-            if sig == 1 and position is None:
-                position = "long"
-                entry_price = price
+        for i in range(len(sig_values)):
+            sig = sig_values[i]
 
-            # entrar vendido
-            elif sig == -1 and position is None:
-                position = "short"
-                entry_price = price
+            # entrar comprado / vendido
+            if sig in (1, -1) and position == 0:
+                position = int(sig)
+                entry_i = i
 
             # sair (quando sinal oposto surge)
-            elif sig != 0 and position is not None:
-                if position == "long":
-                    pnl = price - entry_price
-                else:
-                    pnl = entry_price - price
-
-                if pnl > 0:
-                    wins += 1
-                else:
-                    losses += 1
+            elif sig != 0 and position != 0:
+                entries.append(entry_i)
+                exits.append(i)
+                sides.append(position)
+                position = 0
+                entry_i = None
+
+        close = df_iter["close"].to_numpy(dtype=np.float64)
+        bid = df_iter["bid"].to_numpy(dtype=np.float64) if "bid" in df_iter.columns else close
+        ask = df_iter["ask"].to_numpy(dtype=np.float64) if "ask" in df_iter.columns else close
+        entries = np.asarray(entries, dtype=np.int64)
+        exits = np.asarray(exits, dtype=np.int64)
+        sides = np.asarray(sides, dtype=np.float64)
+
+        fees = 0.0
+        if self.price_model is not None:
+            costs = self.price_model.trade_costs(
+                sides, bid[entries], ask[entries], bid[exits], ask[exits], qty=1.0
+            )
+            pnl = costs.pnl_net
+            fees = float(costs.fees.sum())
+        else:
+            pnl = sides * (close[exits] - close[entries])
 
-                balance += pnl
-                position = None
-                entry_price = None
+        wins = int(np.count_nonzero(pnl > 0))
+        losses = len(pnl) - wins
+        balance += float(pnl.sum())
 
         total_trades = wins + losses
         win_rate = wins / total_trades if total_trades > 0 else 0.0
@@ -88,5 +104,7 @@ class Backtester:
         return {
             "equity_final": balance,
             "pnl": pnl_total,
-            "win_rate": win_rate
+            "win_rate": win_rate,
+            "trades": total_trades,
+            "fees": fees,
         }
@@ -1,24 +1,112 @@
 # file: oraclewalk/storage/database.py
 
+import atexit
+import queue
 import sqlite3
 import threading
-from typing import Optional
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import pandas as pd
 from oraclewalk.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# SQL fixo por tipo de escrita: o sqlite3 mantém o statement preparado em cache
+# (cached_statements) e o writer agrupa linhas consecutivas num executemany.
+SQL_INSERT_TRADE = """INSERT INTO trades
+    (symbol, side, entry_price, exit_price, quantity, pnl, opened_at, closed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+SQL_INSERT_EQUITY = "INSERT INTO equity_curve (timestamp, equity) VALUES (?, ?)"
+SQL_TRADE_OPEN = """INSERT INTO trades (trade_key, symbol, side, entry_price, quantity, opened_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(trade_key) DO UPDATE SET
+        side = excluded.side, entry_price = excluded.entry_price,
+        quantity = excluded.quantity, opened_at = excluded.opened_at"""
+SQL_TRADE_CLOSE = """INSERT INTO trades (trade_key, symbol, side, exit_price, pnl, closed_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(trade_key) DO UPDATE SET
+        exit_price = excluded.exit_price, pnl = excluded.pnl, closed_at = excluded.closed_at"""
+# sem chave: fecha o trade aberto mais recente do símbolo
+SQL_TRADE_CLOSE_LATEST = """UPDATE trades SET exit_price = ?, pnl = ?, closed_at = ?
+    WHERE id = (SELECT id FROM trades WHERE symbol = ? AND closed_at IS NULL
+                ORDER BY opened_at DESC LIMIT 1)"""
+# entrada que nunca executou (REJECTED/EXPIRED/CANCELED): some sem virar trade fechado
+SQL_DISCARD_TRADE = "DELETE FROM trades WHERE trade_key = ? AND closed_at IS NULL"
+SQL_DISCARD_PNL_TICKS = "DELETE FROM pnl_ticks WHERE trade_key = ?"
+SQL_INSERT_PNL_TICK = "INSERT INTO pnl_ticks (ts, symbol, trade_key, pnl) VALUES (?, ?, ?, ?)"
+# ledger append-only: cada linha carrega o total acumulado, então o saldo realizado
+# é a última linha (O(1) pelo PK). Mesma chave duas vezes é ignorada (idempotente).
+SQL_LEDGER_APPEND = """INSERT OR IGNORE INTO pnl_ledger (trade_key, symbol, closed_at, pnl, running_total)
+    VALUES (?, ?, ?, ?, COALESCE((SELECT running_total FROM pnl_ledger ORDER BY id DESC LIMIT 1), 0) + ?)"""
+SQL_SET_META = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+
+TRADE_COLUMNS = "id, trade_key, symbol, side, entry_price, exit_price, quantity, pnl, opened_at, closed_at"
+
+
+def trade_key(symbol: str, opened_at: str, position_id: Optional[str] = None) -> str:
+    """
+    Identificador estável do trade: símbolo + horário de abertura (ISO), mais o
+    position_id quando há várias posições abertas no mesmo candle.
+    """
+    if position_id:
+        return f"{symbol}:{opened_at}:{position_id}"
+    return f"{symbol}:{opened_at}"
+
+
+_STOP = object()
+
 
 class DatabaseManager:
-    """Persistência básica de trades e equity em SQLite."""
+    """
+    Persistência de trades e equity em SQLite, com escrita em segundo plano.
 
-    def __init__(self, db_path: str = "oraclewalk.db"):
+    - Journal em WAL (leitores não bloqueiam o writer) e synchronous=NORMAL.
+    - `insert_*` só enfileiram (custo de microssegundos para o engine); uma
+      thread writer agrupa as linhas numa transação a cada `flush_interval`
+      segundos ou `batch_size` linhas, o que vier primeiro.
+    - `flush()` espera a fila ser gravada; leituras fazem flush antes.
+    - `close()` grava o que falta, faz checkpoint do WAL e fecha a conexão
+      (também registrado em atexit).
+    - Lote com erro é regravado linha a linha (só a linha problemática se
+      perde); fila cheia espera no máximo `enqueue_timeout` e depois grava
+      a linha de forma síncrona, sem travar o engine indefinidamente.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "oraclewalk.db",
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue: int = 100_000,
+        enqueue_timeout: float = 0.5,
+    ):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
         self.lock = threading.Lock()
+        self._configure()
         self._create_tables()
 
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, daemon=True, name="DatabaseWriter")
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _configure(self) -> None:
+        try:
+            mode = self.conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if str(mode).lower() != "wal":
+                logger.warning(f"[DB] WAL indisponível para {self.db_path} (journal_mode={mode}).")
+            # em WAL, NORMAL só perde as últimas transações numa queda de energia (nunca corrompe)
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            logger.warning(f"[DB] Falha ao configurar PRAGMAs: {e}")
+
     def _create_tables(self) -> None:
         cur = self.conn.cursor()
 
@@ -44,31 +132,287 @@ class DatabaseManager:
         )
         """)
 
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS pnl_ticks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL,
+            symbol TEXT,
+            trade_key TEXT,
+            pnl REAL
+        )
+        """)
+
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS pnl_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trade_key TEXT UNIQUE,
+            symbol TEXT,
+            closed_at TEXT,
+            pnl REAL,
+            running_total REAL
+        )
+        """)
+
+        # checkpoints (ex.: bootstrap do ledger a partir do trades.csv)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """)
+
+        # bancos antigos não têm trade_key: adiciona a coluna (linhas antigas ficam NULL,
+        # e NULLs não colidem no índice único)
+        columns = {row[1] for row in cur.execute("PRAGMA table_info(trades)")}
+        if "trade_key" not in columns:
+            cur.execute("ALTER TABLE trades ADD COLUMN trade_key TEXT")
+
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_trades_key ON trades(trade_key)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_trades_symbol_opened ON trades(symbol, opened_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_trades_closed ON trades(closed_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pnl_ticks_ts ON pnl_ticks(ts)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pnl_ticks_symbol_ts ON pnl_ticks(symbol, ts)")
+
         self.conn.commit()
 
+    # -----------------------------
+    # ESCRITA (enfileirada)
+    # -----------------------------
+    def _enqueue(self, sql: str, params: Tuple[Any, ...]) -> None:
+        if self._closed:
+            logger.warning("[DB] DatabaseManager fechado; gravando de forma síncrona.")
+            self._write_batch([(sql, params)])
+            return
+        try:
+            self._queue.put_nowait((sql, params))
+            return
+        except queue.Full:
+            pass
+        # não perde trade/equity: espera um pouco o writer abrir espaço, senão grava direto
+        try:
+            self._queue.put((sql, params), timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning(f"[DB] Fila de escrita cheia ({self._queue.maxsize}); gravando de forma síncrona.")
+            self._write_batch([(sql, params)])
+
     def insert_trade(self, symbol: str, side: str, entry_price: float,
                      exit_price: float, quantity: float, pnl: float,
                      opened_at: str, closed_at: str) -> None:
-        with self.lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                """INSERT INTO trades
-                (symbol, side, entry_price, exit_price, quantity, pnl, opened_at, closed_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (symbol, side, entry_price, exit_price, quantity, pnl, opened_at, closed_at)
-            )
-            self.conn.commit()
+        self._enqueue(
+            SQL_INSERT_TRADE,
+            (symbol, side, entry_price, exit_price, quantity, pnl, opened_at, closed_at),
+        )
 
     def insert_equity(self, timestamp: str, equity: float) -> None:
+        self._enqueue(SQL_INSERT_EQUITY, (timestamp, equity))
+
+    # ciclo de vida do trade (chamado pelo TradeExecutor via _safe_db_call)
+    def log_trade_open(self, symbol: str, side: str, entry_price: float, quantity: float,
+                       opened_at: Optional[str] = None, key: Optional[str] = None) -> str:
+        """Registra a abertura; devolve a chave usada para o fechamento e os ticks."""
+        opened_at = opened_at or datetime.utcnow().isoformat()
+        key = key or trade_key(symbol, opened_at)
+        self._enqueue(SQL_TRADE_OPEN, (key, symbol, side, entry_price, quantity, opened_at))
+        return key
+
+    def log_trade_close(self, symbol: str, side: str, exit_price: float, pnl: float,
+                        closed_at: Optional[str] = None, key: Optional[str] = None) -> None:
+        """Fecha o trade `key` (ou, sem chave, o aberto mais recente do símbolo)."""
+        closed_at = closed_at or datetime.utcnow().isoformat()
+        if key is None:
+            self._enqueue(SQL_TRADE_CLOSE_LATEST, (exit_price, pnl, closed_at, symbol))
+        else:
+            self._enqueue(SQL_TRADE_CLOSE, (key, symbol, side, exit_price, pnl, closed_at))
+        self.append_ledger(symbol, pnl, closed_at, key)
+
+    def discard_trade(self, key: str) -> None:
+        """Apaga um trade ainda aberto que nunca executou (sem ledger, sem fechamento)."""
+        self._enqueue(SQL_DISCARD_TRADE, (key,))
+        self._enqueue(SQL_DISCARD_PNL_TICKS, (key,))
+
+    def append_ledger(self, symbol: str, pnl: float, closed_at: str, key: Optional[str] = None) -> None:
+        """PnL realizado de um trade fechado (chave repetida é ignorada)."""
+        self._enqueue(SQL_LEDGER_APPEND, (key, symbol, closed_at, pnl, pnl))
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._enqueue(SQL_SET_META, (key, value))
+
+    def log_pnl(self, symbol: str, pnl: float, ts: Optional[float] = None, key: Optional[str] = None) -> None:
+        """PnL em aberto a cada tick (só enfileira; gravado em lote)."""
+        self._enqueue(SQL_INSERT_PNL_TICK, (ts if ts is not None else time.time(), symbol, key, pnl))
+
+    # -----------------------------
+    # WRITER
+    # -----------------------------
+    def _run_writer(self) -> None:
+        while True:
+            try:
+                first = self._queue.get()
+            except Exception:
+                continue
+            if first is _STOP:
+                self._queue.task_done()
+                return
+
+            batch: List[Tuple[str, Tuple[Any, ...]]] = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: Sequence[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """Uma transação por lote; linhas consecutivas com o mesmo SQL vão num executemany."""
         with self.lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                "INSERT INTO equity_curve (timestamp, equity) VALUES (?, ?)",
-                (timestamp, equity)
+            try:
+                with self.conn:
+                    i = 0
+                    while i < len(batch):
+                        sql = batch[i][0]
+                        j = i
+                        while j < len(batch) and batch[j][0] == sql:
+                            j += 1
+                        self.conn.executemany(sql, [params for _, params in batch[i:j]])
+                        i = j
+            except sqlite3.Error as e:
+                logger.warning(f"[DB] Falha ao gravar lote de {len(batch)} linha(s): {e}; regravando linha a linha.")
+                self._write_rows(batch)
+
+    def _write_rows(self, batch: Sequence[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """Fallback do lote: uma transação por linha, só as que falham são perdidas."""
+        lost = 0
+        for sql, params in batch:
+            try:
+                with self.conn:
+                    self.conn.execute(sql, params)
+            except sqlite3.Error as e:
+                lost += 1
+                logger.error(f"[DB] Linha descartada ({e}): {' '.join(sql.split()[:3])} {params}")
+        if lost:
+            logger.error(f"[DB] {lost} de {len(batch)} linha(s) do lote não gravada(s).")
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera a fila de escrita ser gravada. True se esvaziou dentro do timeout."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Grava o que falta, faz checkpoint do WAL e fecha a conexão (idempotente)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=timeout)
+        if self._writer.is_alive():
+            logger.warning(f"[DB] Writer não terminou em {timeout}s; {self.pending()} escrita(s) pendente(s).")
+            return
+        with self.lock:
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"[DB] Erro ao fechar banco: {e}")
+        atexit.unregister(self.close)
+
+    # -----------------------------
+    # LEITURA
+    # -----------------------------
+    def query_df(self, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+        """Lê depois de gravar o que está na fila (read-your-writes)."""
+        self.flush()
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=tuple(params))
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        self.flush()
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, tuple(params))]
+
+    def open_trades(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        if symbol is None:
+            sql = f"SELECT {TRADE_COLUMNS} FROM trades WHERE closed_at IS NULL ORDER BY opened_at"
+            return self._query(sql)
+        sql = f"SELECT {TRADE_COLUMNS} FROM trades WHERE symbol = ? AND closed_at IS NULL ORDER BY opened_at"
+        return self._query(sql, (symbol,))
+
+    def recent_trades(self, limit: int = 10, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Últimos `limit` trades por horário de abertura (mais antigo primeiro)."""
+        where, params = ("WHERE symbol = ?", [symbol]) if symbol else ("", [])
+        sql = f"SELECT {TRADE_COLUMNS} FROM trades {where} ORDER BY opened_at DESC LIMIT ?"
+        return list(reversed(self._query(sql, params + [limit])))
+
+    def trades_between(self, start: str, end: str, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Trades abertos em [start, end] (ISO), usando o índice (symbol, opened_at)."""
+        if symbol is None:
+            sql = f"SELECT {TRADE_COLUMNS} FROM trades WHERE opened_at BETWEEN ? AND ? ORDER BY opened_at"
+            return self._query(sql, (start, end))
+        sql = (f"SELECT {TRADE_COLUMNS} FROM trades "
+               "WHERE symbol = ? AND opened_at BETWEEN ? AND ? ORDER BY opened_at")
+        return self._query(sql, (symbol, start, end))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def realized_total(self) -> float:
+        """PnL realizado acumulado: última linha do ledger (O(1), sem varrer trades)."""
+        rows = self._query("SELECT running_total FROM pnl_ledger ORDER BY id DESC LIMIT 1")
+        return float(rows[0]["running_total"]) if rows else 0.0
+
+    def realized_pnl(self, symbol: Optional[str] = None) -> float:
+        if symbol is None:
+            rows = self._query("SELECT COALESCE(SUM(pnl), 0) AS total FROM trades WHERE closed_at IS NOT NULL")
+        else:
+            rows = self._query(
+                "SELECT COALESCE(SUM(pnl), 0) AS total FROM trades WHERE symbol = ? AND closed_at IS NOT NULL",
+                (symbol,),
             )
-            self.conn.commit()
+        return float(rows[0]["total"])
+
+    def pnl_ticks(self, symbol: Optional[str] = None, start: Optional[float] = None,
+                  end: Optional[float] = None, key: Optional[str] = None) -> pd.DataFrame:
+        """Ticks de PnL (ts em epoch s) filtrados por símbolo, faixa de tempo e/ou trade."""
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(end)
+        if key is not None:
+            clauses.append("trade_key = ?")
+            params.append(key)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query_df(f"SELECT ts, symbol, trade_key, pnl FROM pnl_ticks {where} ORDER BY ts", params)
 
     def export_equity_csv(self, path: str = "equity_curve.csv") -> None:
-        df = pd.read_sql_query("SELECT * FROM equity_curve", self.conn)
+        df = self.query_df("SELECT * FROM equity_curve")
         df.to_csv(path, index=False)
         logger.info(f"Equity curve exportada para {path}")
@@ -250,6 +250,12 @@ class InnerCircleTrader(StrategyBase):
             fvg_df["end_time"] = fvg_df["end_bar"].apply(
                 lambda idx: int(df["datetime"].iloc[int(idx)].timestamp()) if idx < len(df) else None
             )
+            # ID estável entre recálculos: timestamp do C2 (candle de confirmação) + tipo.
+            # O "index" posicional muda quando o buffer desliza; o tempo do C2 não.
+            fvg_df["c2_time"] = fvg_df["index"].apply(
+                lambda idx: int(df["datetime"].iloc[int(idx)].timestamp()) if idx < len(df) else None
+            )
+            fvg_df["id"] = fvg_df["c2_time"].astype(str) + ":" + fvg_df["type"].astype(str)
             self.last_fvgs = fvg_df
         else:
             self.last_fvgs = pd.DataFrame()
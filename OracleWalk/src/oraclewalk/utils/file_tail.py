@@ -0,0 +1,48 @@
+# file: oraclewalk/utils/file_tail.py
+
+import csv
+import os
+from typing import Dict, List, Optional
+
+
+def tail_lines(path: str, n: int, block_size: int = 8192) -> List[str]:
+    """
+    Últimas `n` linhas de um arquivo texto, lendo blocos a partir do fim
+    (custo proporcional ao trecho lido, não ao tamanho do arquivo).
+    """
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # n+1 quebras garantem n linhas completas (a última pode não ter \n)
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if pos > 0:
+        lines = lines[1:]  # primeira linha pode estar cortada no meio
+    return lines[-n:]
+
+
+def read_first_line(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        line = f.readline()
+    return line.rstrip("\r\n") or None
+
+
+def tail_csv(path: str, n: int) -> List[Dict[str, str]]:
+    """Últimas `n` linhas de um CSV com cabeçalho, como dicts (igual ao DictReader)."""
+    header = read_first_line(path)
+    if header is None:
+        return []
+    lines = tail_lines(path, n + 1)
+    if lines and lines[0] == header:
+        lines = lines[1:]
+    fields = next(csv.reader([header]))
+    return [dict(zip(fields, row)) for row in csv.reader(lines[-n:]) if row]
@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 
+from oraclewalk.execution.execution_price_model import ExecutionPriceModel
 from oraclewalk.optimization.backtester import Backtester
 from oraclewalk.execution.risk_manager import RiskManager
 
@@ -15,10 +16,13 @@ class _DummyDB:
 
 
 class _DummyStrategy:
-    def __init__(self, signal_value=0):
+    def __init__(self, signal_value=0, signals=None):
         self.signal_value = signal_value
+        self.signals = signals
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.signals is not None:
+            return pd.DataFrame({"signal": self.signals})
         return pd.DataFrame({"signal": [self.signal_value] * len(df)})
 
 
@@ -48,6 +52,25 @@ class BacktesterTest(unittest.TestCase):
         self.assertIn("equity_final", result)
         self.assertGreater(result["equity_final"], 0)
 
+    def test_price_model_applies_costs(self):
+        idx = pd.date_range("2024-01-01", periods=4, freq="h")
+        data = pd.DataFrame({"close": [100.0, 110.0, 110.0, 100.0]}, index=idx)
+        strat = _DummyStrategy(signals=[1, 1, -1, 1])  # long 100→110, short 110→100
+
+        gross = Backtester(self.risk).run(data, strat)
+        self.assertAlmostEqual(gross["pnl"], 20.0)
+        self.assertEqual((gross["trades"], gross["fees"]), (2, 0.0))
+
+        model = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.0, commission_taker=0.1)
+        net = Backtester(self.risk, price_model=model).run(data, strat)
+        expected = (
+            (model.exec_sell(110.0, 110.0) - model.exec_buy(100.0, 100.0))
+            + (model.exec_sell(110.0, 110.0) - model.exec_buy(100.0, 100.0))
+        )
+        self.assertAlmostEqual(net["pnl"], expected)
+        self.assertGreater(net["fees"], 0.0)
+        self.assertEqual(net["win_rate"], 1.0)
+
 
 if __name__ == "__main__":
     unittest.main()
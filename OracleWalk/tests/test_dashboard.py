@@ -0,0 +1,558 @@
+import gzip
+import json
+import socket
+import struct
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import unittest
+
+from oraclewalk.dashboard.candle_store import CandleStore
+from oraclewalk.dashboard.downsample import CandlePyramid, lttb_indices
+from oraclewalk.dashboard.ipc import DashboardPublisher, dispatch
+from oraclewalk.dashboard import serialization
+from oraclewalk.dashboard.server import DashboardServer
+from oraclewalk.dashboard.stores import VersionedStore
+from oraclewalk.dashboard.serving import choose_encoding, resolve_backend
+from oraclewalk.dashboard.stream import RESYNC, EventHub
+
+
+def _candle(ts, close, closed=True):
+    return {
+        "time": ts,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": 1.0,
+        "rsi": float("nan"),
+        "is_closed": closed,
+    }
+
+
+def _decode_owc1(data):
+    assert data[:4] == b"OWC1"
+    (header_len,) = struct.unpack("<I", data[4:8])
+    header = json.loads(data[8:8 + header_len])
+    assert all(f["offset"] % 8 == 0 for f in header["fields"])
+    return {
+        f["name"]: np.frombuffer(data, dtype="<" + f["dtype"], count=header["count"], offset=f["offset"])
+        for f in header["fields"]
+    }
+
+
+def _read_event(chunks):
+    raw = next(chunks)
+    text = raw.decode() if isinstance(raw, bytes) else raw
+    event, data = text.strip().split("\n", 1)
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+class EventHubTest(unittest.TestCase):
+    def test_publish_without_subscribers_is_noop(self):
+        hub = EventHub()
+        hub.publish("candle", {"x": 1})
+        self.assertFalse(hub.has_subscribers)
+
+    def test_slow_subscriber_gets_resync(self):
+        hub = EventHub(max_queue=2)
+        sub = hub.subscribe()
+        for i in range(5):
+            hub.publish("candle", {"i": i})
+
+        self.assertTrue(sub.overflowed)
+        self.assertIs(sub.get(timeout=0.1), RESYNC)
+        self.assertIsNone(sub.get(timeout=0.01))
+
+    def test_subscriber_cap(self):
+        hub = EventHub(max_subscribers=1)
+        sub = hub.subscribe()
+        self.assertIsNone(hub.subscribe())
+        hub.unsubscribe(sub)
+        self.assertIsNotNone(hub.subscribe())
+
+
+class CandleStoreTest(unittest.TestCase):
+    def test_all_and_since_with_live_candle(self):
+        store = CandleStore(max_points=1000)
+        for i in range(1, 601):
+            store.append_closed(_candle(i * 60, float(i)))
+        store.set_live(_candle(601 * 60, 601.0, closed=False))
+
+        everything = json.loads(store.json_all())
+        self.assertEqual(len(everything), 601)
+        self.assertEqual([c["time"] for c in everything], [i * 60 for i in range(1, 602)])
+        self.assertIsNone(everything[0]["rsi"])
+
+        tail = json.loads(store.json_since(600 * 60))
+        self.assertEqual([c["time"] for c in tail], [600 * 60, 601 * 60])
+
+    def test_overwrites_last_closed_and_evicts_whole_chunks(self):
+        store = CandleStore(max_points=64)
+        for i in range(1, 201):
+            store.append_closed(_candle(i, float(i)))
+        store.append_closed(_candle(200, 999.0))
+
+        self.assertLessEqual(len(store), 64)
+        candles = json.loads(store.json_all())
+        self.assertEqual(candles[-1]["close"], 999.0)
+        self.assertEqual(len(candles), len(store))
+        times = [c["time"] for c in candles]
+        self.assertEqual(times, sorted(set(times)))
+
+        # candle fechado mais antigo que o último é descartado
+        self.assertIsNone(store.append_closed(_candle(5, 1.0)))
+
+    def test_binary_columns_match_json(self):
+        store = CandleStore(max_points=64)
+        for i in range(1, 101):
+            candle = _candle(i * 60, 100.0 + i)
+            if i > 90:
+                candle["ma_short"] = float(i)
+            store.append_closed(candle)
+        store.set_live(_candle(101 * 60, 250.5, closed=False))
+
+        cols = _decode_owc1(store.binary_all())
+        candles = json.loads(store.json_all())
+        self.assertEqual(cols["time"].tolist(), [c["time"] for c in candles])
+        self.assertEqual(cols["close"].tolist(), [c["close"] for c in candles])
+        self.assertTrue(np.isnan(cols["rsi"]).all())
+        self.assertEqual(cols["ma_short"][-2], 100.0)
+        self.assertTrue(np.isnan(cols["ma_short"][0]))
+        self.assertIs(store.binary_all(), store.binary_all())
+
+    def test_bulk_load_serializes_like_single_appends(self):
+        frame = pd.DataFrame(
+            {
+                "time": [60, 120],
+                "close": [65000.123456789012, 1 / 3],
+                "rsi": [np.nan, 55.5],
+                "note": ["a},{b", '{"x": 1}'],
+            }
+        )
+        bulk = CandleStore()
+        bulk.extend_closed(frame)
+        single = CandleStore()
+        for row in frame.to_dict("records"):
+            single.append_closed(row)
+
+        self.assertEqual(bulk.json_all(), single.json_all())
+        self.assertEqual([c["note"] for c in json.loads(bulk.json_all())], ["a},{b", '{"x": 1}'])
+
+
+class SerializationTest(unittest.TestCase):
+    def test_dumps_writes_null_for_nan_with_and_without_orjson(self):
+        payload = {"a": float("nan"), "b": [1.5, float("inf")], "c": np.float64(2.0)}
+        fast = serialization.dumps(payload)
+
+        original = serialization.orjson
+        serialization.orjson = None
+        try:
+            slow = serialization.dumps(payload)
+        finally:
+            serialization.orjson = original
+
+        expected = {"a": None, "b": [1.5, None], "c": 2.0}
+        self.assertEqual(json.loads(fast), expected)
+        self.assertEqual(json.loads(slow), expected)
+
+    def test_stdlib_fallback_serializes_numpy_types(self):
+        payload = {"i": np.int64(3), "f": np.float32(1.5), "nan": np.float32("nan"), "b": np.bool_(True),
+                   "arr": np.array([1.0, np.nan])}
+        original = serialization.orjson
+        serialization.orjson = None
+        try:
+            out = json.loads(serialization.dumps(payload))
+        finally:
+            serialization.orjson = original
+        self.assertEqual(out, {"i": 3, "f": 1.5, "nan": None, "b": True, "arr": [1.0, None]})
+
+    def test_encoded_cache_reuses_bytes_per_version(self):
+        cache = serialization.EncodedCache()
+        calls = []
+        build = lambda: calls.append(1) or {"x": 1}
+        first = cache.get("fvg", 1, build)
+        self.assertIs(cache.get("fvg", 1, build), first)
+        cache.get("fvg", 2, build)
+        self.assertEqual(len(calls), 2)
+
+
+class VersionedStoreTest(unittest.TestCase):
+    def test_changes_since_and_eviction(self):
+        store = VersionedStore(maxlen=3)
+        for i in range(3):
+            store.upsert(i, {"id": i})
+        v = store.version
+
+        store.upsert(1, {"id": 1, "closed": True})
+        store.upsert(3, {"id": 3})  # despeja o 0
+
+        delta = store.changes_since(v)
+        self.assertFalse(delta["full"])
+        self.assertEqual([t["id"] for t in delta["items"]], [1, 3])
+        self.assertEqual(delta["removed"], [0])
+        self.assertEqual([t["id"] for t in store.values()], [1, 2, 3])
+        self.assertEqual(store.changes_since(store.version)["items"], [])
+
+    def test_too_old_cursor_gets_full_reload(self):
+        store = VersionedStore(maxlen=2, max_tombstones=2)
+        for i in range(10):
+            store.upsert(i, {"id": i})
+        delta = store.changes_since(1)
+        self.assertTrue(delta["full"])
+        self.assertEqual([t["id"] for t in delta["items"]], [8, 9])
+        self.assertTrue(store.changes_since(-1)["full"])
+
+
+    def test_sync_writes_only_the_difference(self):
+        store = VersionedStore(maxlen=10)
+        store.sync({"a": {"id": "a"}, "b": {"id": "b"}})
+        v = store.version
+        changed, removed = store.sync({"b": {"id": "b"}, "c": {"id": "c"}})
+        self.assertEqual(changed, [{"id": "c"}])
+        self.assertEqual(removed, ["a"])
+        self.assertEqual(store.version, v + 2)
+        self.assertEqual(store.sync({"b": {"id": "b"}, "c": {"id": "c"}}), ([], []))
+
+
+class CandlePyramidTest(unittest.TestCase):
+    def test_levels_aggregate_ohlc_incrementally(self):
+        pyramid = CandlePyramid(capacity=100, factors=(4,))
+        for i in range(8):
+            c = _candle((i + 4) * 60, 100.0 + i)
+            c["volume"] = 2.0
+            pyramid.add(c)
+
+        self.assertEqual(pyramid.interval, 60)
+        level = pyramid.levels[0]
+        bars = level.between(0, 10 ** 9)
+        self.assertEqual([b["time"] for b in bars], [240, 480])
+        first = bars[0]
+        self.assertEqual((first["open"], first["high"], first["low"], first["close"]), (100.0, 104.0, 99.0, 103.0))
+        self.assertEqual(first["volume"], 8.0)
+
+    def test_same_time_candle_replaces_last_base_bar(self):
+        pyramid = CandlePyramid(capacity=100, factors=(4, 16))
+        for i in range(6):
+            pyramid.add(_candle((i + 4) * 60, 100.0 + i))
+        # candle 540 reenviado corrigido: máxima menor, fechamento e volume novos
+        fixed = _candle(540, 100.0)
+        fixed.update(high=101.0, close=90.5, low=89.0, volume=7.0)
+        pyramid.add(fixed)
+
+        for level in pyramid.levels:
+            partial = level.between(0, 10 ** 9)[-1]
+            self.assertEqual(partial["close"], 90.5)
+            self.assertEqual(partial["low"], 89.0)
+        coarse4 = pyramid.levels[0].between(480, 480)[0]
+        # 480 e 540: a máxima 106 do candle antigo some, volume não soma duas vezes
+        self.assertEqual((coarse4["open"], coarse4["high"]), (104.0, 105.0))
+        self.assertEqual(coarse4["volume"], 8.0)
+        self.assertEqual(len(pyramid.levels[0]), 2)
+
+    def test_lttb_keeps_endpoints_and_extremes(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[500] = 50.0
+        idx = lttb_indices(x, y, 20)
+        self.assertEqual(len(idx), 20)
+        self.assertEqual((idx[0], idx[-1]), (0, 999))
+        self.assertIn(500, idx)
+        self.assertTrue((np.diff(idx) > 0).all())
+
+
+class DashboardStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.server = DashboardServer(max_points=100)
+        self.client = self.server.app.test_client()
+
+    def test_stream_sends_snapshot_then_deltas(self):
+        self.server.push_candle(_candle(60, 100.0))
+
+        resp = self.client.get("/api/stream", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            event, snap = _read_event(chunks)
+            self.assertEqual(event, "snapshot")
+            self.assertEqual([c["time"] for c in snap["candles"]], [60])
+            self.assertIsNone(snap["candles"][0]["rsi"])
+
+            self.server.push_candle(_candle(120, 101.0, closed=False))
+            event, delta = _read_event(chunks)
+            self.assertEqual(event, "candle")
+            self.assertEqual(delta["time"], 120)
+
+            self.server.push_trade({"side": "buy", "time_entry": 60, "price_entry": 100.0})
+            event, delta = _read_event(chunks)
+            self.assertEqual(event, "trade")
+            self.assertEqual(delta["time_entry"], 60)
+        finally:
+            resp.close()
+
+        self.assertFalse(self.server._hub.has_subscribers)
+
+    def test_candles_since_cursor(self):
+        for ts in (60, 120, 180):
+            self.server.push_candle(_candle(ts, 100.0))
+        self.server.push_candle(_candle(240, 101.0, closed=False))
+
+        full = self.client.get("/api/candles").get_json()
+        self.assertEqual([c["time"] for c in full], [60, 120, 180, 240])
+
+        delta = self.client.get("/api/candles?since=180").get_json()
+        self.assertEqual([c["time"] for c in delta], [180, 240])
+
+        binary = self.client.get("/api/candles.bin")
+        self.assertEqual(binary.mimetype, "application/octet-stream")
+        self.assertEqual(_decode_owc1(binary.data)["time"].tolist(), [60, 120, 180, 240])
+
+    def test_candles_range_picks_coarser_resolution(self):
+        server = DashboardServer(max_points=200)
+        client = server.app.test_client()
+        for i in range(1, 1001):
+            server.push_candle(_candle(i * 60, 100.0 + (i % 7)))
+
+        recent = client.get("/api/candles?from=59000&max_points=50").get_json()
+        self.assertEqual(recent["resolution"], 60)
+        self.assertEqual(recent["candles"][0]["time"], 59040)
+
+        # o buffer bruto só tem 200 candles: a faixa inteira vem da pirâmide
+        wide = client.get("/api/candles?from=0&to=60000&max_points=100").get_json()
+        self.assertEqual(wide["resolution"], 60 * 16)
+        self.assertLessEqual(len(wide["candles"]), 100)
+        self.assertFalse(wide["downsampled"])
+
+        tiny = client.get("/api/candles?from=0&max_points=3").get_json()
+        self.assertTrue(tiny["downsampled"])
+        self.assertEqual(len(tiny["candles"]), 3)
+
+    def test_candles_range_without_from_uses_finest_level(self):
+        server = DashboardServer(max_points=1000)
+        client = server.app.test_client()
+        for i in range(1, 601):
+            server.push_candle(_candle(i * 60, 100.0))
+
+        full = client.get("/api/candles?max_points=5000").get_json()
+        self.assertEqual(full["resolution"], 60)
+        self.assertFalse(full["downsampled"])
+        self.assertEqual(len(full["candles"]), 600)
+
+        coarse = client.get("/api/candles?max_points=200").get_json()
+        self.assertEqual(coarse["resolution"], 60 * 4)
+        self.assertEqual(coarse["candles"][0]["time"], 0)
+
+    def test_load_history_bulk_matches_push_candle(self):
+        idx = pd.date_range("2024-01-01", periods=300, freq="1min", tz="UTC")
+        df = pd.DataFrame(
+            {
+                "open": np.arange(300, dtype=float),
+                "high": np.arange(300, dtype=float) + 1,
+                "low": np.arange(300, dtype=float) - 1,
+                "close": np.arange(300, dtype=float) + 0.5,
+                "volume": 1.0,
+                "rsi": np.nan,
+            },
+            index=idx,
+        )
+        bulk = DashboardServer(max_points=1000)
+        self.assertEqual(bulk.load_history(df), 300)
+
+        single = DashboardServer(max_points=1000)
+        for ts, row in df.iterrows():
+            candle = {"time": int(ts.timestamp()), **row.to_dict(), "is_closed": True}
+            single.push_candle(candle)
+
+        self.assertEqual(bulk._candles.json_all(), single._candles.json_all())
+        self.assertEqual(bulk.last_candle_ts, int(idx[-1].timestamp()))
+        self.assertEqual(len(bulk._pyramid.levels[0]), 75)
+
+        # recarregar o mesmo trecho não duplica; live posterior continua funcionando
+        self.assertEqual(bulk.load_history(df.iloc[-10:]), 0)
+        bulk.push_candle(_candle(int(idx[-1].timestamp()) + 60, 1.0, closed=False))
+        self.assertEqual(len(json.loads(bulk._candles.json_all())), 301)
+
+    def test_trades_upsert_by_id_and_since_version(self):
+        self.server.push_trade({"side": "buy", "time_entry": 60, "price_entry": 100.0})
+        self.server.push_trade({"side": "sell", "time_entry": 120, "price_entry": float("nan")})
+        version = self.client.get("/api/trades?since_version=-1").get_json()["version"]
+
+        self.server.push_trade({"side": "buy", "time_entry": 60, "time_exit": 180, "price_exit": 101.0})
+
+        trades = self.client.get("/api/trades").get_json()
+        self.assertEqual([t["time_entry"] for t in trades], [60, 120])
+        self.assertIsNone(trades[1]["price_entry"])
+
+        delta = self.client.get(f"/api/trades?since_version={version}").get_json()
+        self.assertEqual([t["time_exit"] for t in delta["items"]], [180])
+        self.assertEqual(delta["removed"], [])
+
+    def test_fvg_and_equity_are_cleaned_on_ingestion(self):
+        fvgs = pd.DataFrame([{"start_time": 60, "top": 2.0, "bottom": float("nan"), "type": "bullish"}])
+        self.server.set_fvg(fvgs)
+        self.server.set_equity(100.0, float("nan"), 0.0, ts=1.0)
+
+        self.assertIsNone(self.server.fvg_buffer[0]["bottom"])
+        self.assertIsNone(json.loads(self.client.get("/api/fvg").data)[0]["bottom"])
+        self.assertIsNone(json.loads(self.client.get("/api/equity").data)["equity"])
+
+    def test_equity_fallback_does_not_mutate_server_state(self):
+        self.server.set_equity(None, None, None, ts=1.0)
+        self.server.push_trade({"id": "t1", "side": "buy", "time_entry": 60, "time_exit": 120,
+                                "price_entry": 100.0, "price_exit": 110.0, "quantity": 1.0})
+        before = self.server._equity
+        version = self.server._versions["equity"]
+
+        body = self.client.get("/api/equity").get_json()
+        self.assertAlmostEqual(body["balance"], self.server.initial_balance + 10.0)
+        # a requisição só lê: o snapshot da thread do engine continua o mesmo
+        self.assertIs(self.server._equity, before)
+        self.assertEqual(self.server._versions["equity"], version)
+
+    def test_fvg_recompute_only_diffs_by_stable_id(self):
+        def gaps(*rows):
+            return pd.DataFrame([{"id": f"{t}:{kind}", "start_time": t - 120, "top": top, "bottom": 1.0, "type": kind}
+                                 for t, kind, top in rows])
+
+        self.server.set_fvg(gaps((180, "bullish", 2.0), (240, "bearish", 3.0)))
+        version = self.client.get("/api/fvg?since_version=-1").get_json()["version"]
+
+        # recálculo com o mesmo conjunto (DataFrame novo) não gera versão nova
+        self.server.set_fvg(gaps((180, "bullish", 2.0), (240, "bearish", 3.0)))
+        self.assertEqual(self.server._fvgs.version, version)
+
+        self.server.set_fvg(gaps((240, "bearish", 2.5), (300, "bullish", 4.0)))
+        delta = self.client.get(f"/api/fvg?since_version={version}").get_json()
+        self.assertFalse(delta["full"])
+        self.assertEqual([f["id"] for f in delta["items"]], ["240:bearish", "300:bullish"])
+        self.assertEqual(delta["removed"], ["180:bullish"])
+        self.assertEqual([f["id"] for f in self.client.get("/api/fvg").get_json()], ["240:bearish", "300:bullish"])
+
+    def test_stream_rejects_clients_above_cap(self):
+        server = DashboardServer(max_points=100, max_stream_clients=1)
+        client = server.app.test_client()
+        first = client.get("/api/stream?candles=0", buffered=False)
+        try:
+            _read_event(iter(first.response))
+            second = client.get("/api/stream?candles=0")
+            self.assertEqual(second.status_code, 503)
+            self.assertEqual(second.headers["Retry-After"], str(server.STREAM_RETRY_AFTER))
+        finally:
+            first.close()
+        self.assertFalse(server._hub.has_subscribers)
+
+    def test_stream_closes_after_max_age(self):
+        self.server.STREAM_MAX_AGE = 0.0
+        resp = self.client.get("/api/stream?candles=0", buffered=False)
+        try:
+            # só o snapshot: o gerador termina e devolve a thread ao pool
+            chunks = list(resp.response)
+        finally:
+            resp.close()
+        self.assertEqual(len(chunks), 1)
+        self.assertFalse(self.server._hub.has_subscribers)
+
+    def test_stream_snapshot_without_candles(self):
+        self.server.push_candle(_candle(60, 100.0))
+        resp = self.client.get("/api/stream?candles=0", buffered=False)
+        try:
+            event, snap = _read_event(iter(resp.response))
+        finally:
+            resp.close()
+        self.assertEqual(event, "snapshot")
+        self.assertNotIn("candles", snap)
+        self.assertIn("trades", snap)
+
+
+class DashboardHttpTest(unittest.TestCase):
+    def setUp(self):
+        self.server = DashboardServer(max_points=1000)
+        self.client = self.server.app.test_client()
+        for i in range(1, 101):
+            self.server.push_candle(_candle(i * 60, 100.0 + i))
+
+    def test_etag_returns_304_until_data_changes(self):
+        first = self.client.get("/api/candles")
+        etag = first.headers["ETag"]
+        self.assertEqual(first.status_code, 200)
+
+        again = self.client.get("/api/candles", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+
+        self.server.push_candle(_candle(101 * 60, 1.0, closed=False))
+        changed = self.client.get("/api/candles", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_large_payload_is_gzipped(self):
+        resp = self.client.get("/api/candles", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers.get("Content-Encoding"), "gzip")
+        self.assertIn("Accept-Encoding", resp.headers.get("Vary", ""))
+        self.assertEqual(len(json.loads(gzip.decompress(resp.data))), 100)
+
+        plain = self.client.get("/api/candles")
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+    def test_encoding_and_backend_selection(self):
+        self.assertEqual(choose_encoding("deflate, gzip;q=0.8"), "gzip")
+        self.assertIsNone(choose_encoding("identity"))
+        self.assertEqual(choose_encoding("br;q=0.0, gzip"), "gzip")
+        self.assertIsNone(choose_encoding("gzip; q=0.000"))
+        self.assertEqual(choose_encoding("gzip; Q=0.5"), "gzip")
+        self.assertIn(resolve_backend("auto"), ("waitress", "werkzeug"))
+        with self.assertRaises(ValueError):
+            resolve_backend("uvicorn")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class DashboardPublisherTest(unittest.TestCase):
+    def test_dispatch_applies_whitelisted_methods_only(self):
+        server = DashboardServer(max_points=100)
+        dispatch(server, ("push_candle", (_candle(60, 1.0),)))
+        dispatch(server, ("serve", ()))
+        self.assertEqual(len(server._candles), 1)
+
+    def test_full_queue_drops_without_blocking(self):
+        pub = DashboardPublisher(max_queue=1, open_browser=False)
+        pub.set_equity(1.0, 1.0, 0.0)
+        time.sleep(0.2)  # feeder thread do mp.Queue
+        start = time.time()
+        for _ in range(5):
+            pub.set_equity(1.0, 1.0, 0.0)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertGreater(pub.dropped, 0)
+
+    def test_child_process_serves_published_candles(self):
+        port = _free_port()
+        pub = DashboardPublisher(max_points=100, port=port, backend="werkzeug", open_browser=False)
+        pub.start()
+        try:
+            pub.push_candle(_candle(60, 100.0))
+            pub.push_candle(_candle(120, 101.0, closed=False))
+
+            candles = None
+            deadline = time.time() + 20
+            while time.time() < deadline:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/candles", timeout=1) as resp:
+                        candles = json.loads(resp.read())
+                    if len(candles) == 2:
+                        break
+                except OSError:
+                    pass
+                time.sleep(0.2)
+            self.assertEqual([c["time"] for c in candles], [60, 120])
+        finally:
+            pub.stop()
+        self.assertFalse(pub.is_alive)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import queue
+import sqlite3
+import time
+import unittest
+from tempfile import TemporaryDirectory
+
+from oraclewalk.storage.database import SQL_INSERT_EQUITY, DatabaseManager
+
+
+class DatabaseManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.db")
+        self.db = DatabaseManager(self.path, flush_interval=0.05)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_uses_wal_journal(self):
+        mode = self.db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_inserts_are_queued_and_batched(self):
+        started = time.perf_counter()
+        for i in range(2000):
+            self.db.insert_equity(f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}", 1000.0 + i)
+        elapsed = time.perf_counter() - started
+        # só enfileira: bem abaixo do custo de 2000 commits
+        self.assertLess(elapsed, 0.5)
+
+        self.assertTrue(self.db.flush(timeout=5.0))
+        df = self.db.query_df("SELECT COUNT(*) AS n, MAX(equity) AS top FROM equity_curve")
+        self.assertEqual(int(df["n"][0]), 2000)
+        self.assertEqual(float(df["top"][0]), 2999.0)
+
+    def test_close_persists_pending_rows(self):
+        self.db.insert_trade("BTCUSDT", "long", 100.0, 101.0, 1.0, 1.0, "t0", "t1")
+        self.db.close()
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute("SELECT symbol, pnl FROM trades").fetchall()
+        self.assertEqual(rows, [("BTCUSDT", 1.0)])
+
+    def test_failed_batch_only_loses_the_bad_row(self):
+        self.db.insert_equity("2024-01-01T00:00:00", 1000.0)
+        self.db._enqueue(SQL_INSERT_EQUITY, ("sem equity",))  # número errado de parâmetros
+        self.db.insert_equity("2024-01-01T00:00:01", 1001.0)
+        df = self.db.query_df("SELECT equity FROM equity_curve ORDER BY id")
+        self.assertEqual(df["equity"].tolist(), [1000.0, 1001.0])
+
+    def test_full_queue_spills_to_synchronous_write(self):
+        db = DatabaseManager(os.path.join(self.tmp.name, "full.db"), max_queue=1, enqueue_timeout=0.05)
+        # fila que o writer não consome: simula writer travado com a fila cheia
+        stuck = queue.Queue(maxsize=1)
+        stuck.put((SQL_INSERT_EQUITY, ("2024-01-01T00:00:00", 0.0)))
+        original, db._queue = db._queue, stuck
+
+        started = time.perf_counter()
+        db.insert_equity("2024-01-01T00:00:01", 1001.0)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        db._queue = original
+        self.assertEqual(db.query_df("SELECT equity FROM equity_curve")["equity"].tolist(), [1001.0])
+        db.close()
+
+    def test_export_reads_its_own_writes(self):
+        self.db.insert_equity("2024-01-01T00:00:00", 1000.0)
+        out = os.path.join(self.tmp.name, "equity.csv")
+        self.db.export_equity_csv(out)
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().strip().splitlines()), 2)
+
+    def test_trade_lifecycle_by_key(self):
+        key = self.db.log_trade_open("BTCUSDT", "long", 100.0, 2.0, opened_at="2024-01-01T00:00:00")
+        self.db.log_trade_open("ETHUSDT", "short", 50.0, 1.0, opened_at="2024-01-01T01:00:00")
+        self.db.log_pnl("BTCUSDT", 1.5, ts=10.0, key=key)
+        self.db.log_pnl("BTCUSDT", 2.5, ts=20.0, key=key)
+
+        self.assertEqual([t["symbol"] for t in self.db.open_trades()], ["BTCUSDT", "ETHUSDT"])
+
+        self.db.log_trade_close("BTCUSDT", "buy", 103.0, 6.0, closed_at="2024-01-01T02:00:00", key=key)
+        # sem chave: fecha o aberto mais recente do símbolo
+        self.db.log_trade_close("ETHUSDT", "sell", 51.0, -1.0, closed_at="2024-01-01T03:00:00")
+
+        self.assertEqual(self.db.open_trades(), [])
+        self.assertEqual(self.db.realized_pnl(), 5.0)
+        self.assertEqual(self.db.realized_pnl("BTCUSDT"), 6.0)
+
+        trade = self.db.trades_between("2024-01-01T00:00:00", "2024-01-01T00:30:00", symbol="BTCUSDT")[0]
+        self.assertEqual((trade["side"], trade["entry_price"], trade["exit_price"]), ("long", 100.0, 103.0))
+        self.assertEqual([t["symbol"] for t in self.db.recent_trades(limit=1)], ["ETHUSDT"])
+
+        ticks = self.db.pnl_ticks("BTCUSDT", start=15.0)
+        self.assertEqual(ticks["pnl"].tolist(), [2.5])
+        self.assertEqual(ticks["trade_key"].tolist(), [key])
+
+    def test_migrates_legacy_trades_table(self):
+        legacy = os.path.join(self.tmp.name, "legacy.db")
+        with sqlite3.connect(legacy) as conn:
+            conn.execute(
+                "CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT, side TEXT, "
+                "entry_price REAL, exit_price REAL, quantity REAL, pnl REAL, opened_at TEXT, closed_at TEXT)"
+            )
+            conn.execute("INSERT INTO trades (symbol, pnl, opened_at, closed_at) VALUES ('BTCUSDT', 3.0, 'a', 'b')")
+        db = DatabaseManager(legacy)
+        try:
+            db.log_trade_open("BTCUSDT", "long", 1.0, 1.0, opened_at="c")
+            self.assertEqual(db.realized_pnl(), 3.0)
+            plan = " ".join(r[-1] for r in db.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE symbol = 'X' AND opened_at > 'a'"))
+            self.assertIn("idx_trades_symbol_opened", plan)
+        finally:
+            db.close()
+
+    def test_ledger_running_total_is_idempotent(self):
+        self.db.log_trade_close("BTCUSDT", "buy", 101.0, 4.0, closed_at="t1", key="BTCUSDT:t0")
+        self.db.append_ledger("BTCUSDT", 4.0, "t1", "BTCUSDT:t0")  # repetido: ignorado
+        self.db.append_ledger("ETHUSDT", -1.5, "t2", "ETHUSDT:t0")
+        self.assertEqual(self.db.realized_total(), 2.5)
+
+    def test_csv_bootstrap_runs_once(self):
+        from oraclewalk.core.engine import LEDGER_CSV_CHECKPOINT, _bootstrap_ledger_from_csv
+
+        csv_path = os.path.join(self.tmp.name, "trades.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("id,open_time,close_time,symbol,side,entry_exec,close_exec,quantity,pnl_exec\n")
+            f.write("1,2024-01-01T00:00:00,2024-01-01T01:00:00,BTCUSDT,buy,100,102,1,2.0\n")
+            f.write("2,2024-01-02T00:00:00,2024-01-02T01:00:00,BTCUSDT,sell,100,101,2,\n")
+        # trade já fechado pelo executor antes da migração: não conta duas vezes
+        self.db.log_trade_close("BTCUSDT", "buy", 102.0, 2.0, key="BTCUSDT:2024-01-01T00:00:00")
+
+        self.assertEqual(_bootstrap_ledger_from_csv(self.db, csv_path), 2)
+        self.assertEqual(self.db.realized_total(), 0.0)
+        self.assertIsNotNone(self.db.get_meta(LEDGER_CSV_CHECKPOINT))
+
+        with open(csv_path, "a", encoding="utf-8") as f:
+            f.write("3,2024-01-03T00:00:00,2024-01-03T01:00:00,BTCUSDT,buy,100,110,1,10.0\n")
+        self.assertEqual(_bootstrap_ledger_from_csv(self.db, csv_path), 0)
+        self.assertEqual(self.db.realized_total(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import time
+import unittest
+
+import numpy as np
+
+from oraclewalk.data.order_book import OrderBookSnapshot
+from oraclewalk.execution.execution_price_model import ExecutionPriceModel, SyntheticDepth
+
+
+def _book():
+    return OrderBookSnapshot.from_levels(
+        1,
+        bids=[(99.0, 1.0), (98.0, 2.0)],
+        asks=[(101.0, 1.0), (102.0, 2.0), (104.0, 1.0)],
+    )
+
+
+class ExecutionPriceModelTest(unittest.TestCase):
+    def test_flat_slippage_without_size(self):
+        model = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.0, commission_taker=0.04)
+        self.assertAlmostEqual(model.exec_buy(99.0, 101.0), 101.0 * 1.001 * 1.0004)
+        self.assertAlmostEqual(model.exec_sell(99.0, 101.0, taker=False), 99.0 * 0.999)
+
+    def test_walks_the_book_for_the_order_size(self):
+        model = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.0, commission_taker=0.0)
+        book = _book()
+        self.assertAlmostEqual(model.exec_buy(99.0, 101.0, qty=0.5, book=book), 101.0)
+        self.assertAlmostEqual(model.exec_buy(99.0, 101.0, qty=2.0, book=book), (101.0 + 102.0) / 2)
+        self.assertAlmostEqual(model.exec_sell(99.0, 101.0, qty=3.0, book=book), (99.0 + 2 * 98.0) / 3)
+
+        # além da profundidade visível: o resto sai no pior nível + slippage
+        expected = (101.0 + 2 * 102.0 + 104.0 + 104.0 * 1.001) / 5
+        self.assertAlmostEqual(model.exec_buy(99.0, 101.0, qty=5.0, book=book), expected)
+
+    def test_empty_book_falls_back(self):
+        flat = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.0, commission_taker=0.0)
+        self.assertAlmostEqual(flat.exec_buy(99.0, 101.0, qty=1.0, book=OrderBookSnapshot.empty()), 101.0 * 1.001)
+
+        depth = SyntheticDepth(level_notional=1000.0, step_pct=0.1, levels=10)
+        synthetic = ExecutionPriceModel(0.1, 0.0, 0.0, depth=depth)
+        self.assertAlmostEqual(synthetic.exec_buy(99.0, 100.0, qty=5.0, book=OrderBookSnapshot.empty()), 100.0)
+
+    def test_synthetic_depth_matches_level_walk(self):
+        depth = SyntheticDepth(level_notional=1000.0, step_pct=0.1, levels=5, growth=2.0)
+        notional = np.array([0.0, 500.0, 1000.0, 2500.0, 31000.0, 50000.0])
+
+        expected = []
+        for n in notional:
+            left, cost = n, 0.0
+            for i in range(5):
+                take = left if i == 4 else min(left, 1000.0 * 2 ** i)
+                cost += take * i * 0.001
+                left -= take
+            expected.append(cost / n if n else 0.0)
+        np.testing.assert_allclose(depth.impact(notional), expected)
+
+        self.assertAlmostEqual(depth.vwap("buy", 100.0, 25.0), 100.0 * (1 + depth.impact(2500.0)))
+        self.assertAlmostEqual(depth.vwap("sell", 100.0, 25.0), 100.0 * (1 - depth.impact(2500.0)))
+
+
+class VectorizedCostModelTest(unittest.TestCase):
+    def test_arrays_match_scalar_calls(self):
+        for depth in (None, SyntheticDepth(level_notional=500.0, step_pct=0.05, levels=20)):
+            model = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.02, commission_taker=0.04, depth=depth)
+            sides = np.array(["buy", "sell", "long", "short"])
+            bid = np.array([99.0, 99.5, 100.0, 98.0])
+            ask = bid + 0.5
+            qty = np.array([1.0, 2.0, 30.0, 0.5])
+
+            got = model.exec_prices(sides, bid, ask, qty=qty)
+            expected = [
+                model.exec_buy(b, a, qty=q) if s in ("buy", "long") else model.exec_sell(b, a, qty=q)
+                for s, b, a, q in zip(sides, bid, ask, qty)
+            ]
+            np.testing.assert_allclose(got, expected)
+
+    def test_trade_costs_match_executor_pnl(self):
+        model = ExecutionPriceModel(slippage_pct=0.1, commission_maker=0.02, commission_taker=0.04)
+        costs = model.trade_costs([1, -1], [99.0, 99.0], [101.0, 101.0], [109.0, 89.0], [111.0, 91.0], qty=2.0)
+
+        long_pnl = (model.exec_sell(109.0, 111.0) - model.exec_buy(99.0, 101.0)) * 2.0
+        short_pnl = (model.exec_sell(99.0, 101.0) - model.exec_buy(89.0, 91.0)) * 2.0
+        np.testing.assert_allclose(costs.pnl_net, [long_pnl, short_pnl])
+        np.testing.assert_allclose(costs.pnl_gross, [20.0, 20.0])
+        fees = (101.0 * 1.001 + 109.0 * 0.999) * 2.0 * 0.0004
+        self.assertAlmostEqual(costs.fees[0], fees)
+        # gross - net = spread + slippage + comissão
+        self.assertTrue(np.all(costs.pnl_gross - costs.pnl_net > costs.fees))
+
+    def _million_trades(self):
+        rng = np.random.default_rng(1)
+        n = 1_000_000
+        entry = rng.uniform(90, 110, n)
+        exit_ = entry * rng.uniform(0.95, 1.05, n)
+        sides = rng.choice([-1, 1], n)
+        qty = rng.uniform(0.1, 50, n)
+        model = ExecutionPriceModel(0.05, 0.02, 0.04, depth=SyntheticDepth(10_000.0, levels=50))
+        return model, sides, entry, exit_, qty
+
+    def test_million_trades_in_one_call(self):
+        model, sides, entry, exit_, qty = self._million_trades()
+        costs = model.trade_costs(sides, entry, entry, exit_, exit_, qty=qty)
+        self.assertEqual(costs.pnl_net.shape, (1_000_000,))
+
+        for i in (0, 1, 499_999, 999_999):
+            buy, sell = (model.exec_buy, model.exec_sell) if sides[i] > 0 else (model.exec_sell, model.exec_buy)
+            expected = sides[i] * (sell(exit_[i], exit_[i], qty=qty[i]) - buy(entry[i], entry[i], qty=qty[i])) * qty[i]
+            self.assertAlmostEqual(costs.pnl_net[i], expected)
+
+    @unittest.skipUnless(os.environ.get("ORACLEWALK_BENCHMARK"), "benchmark: defina ORACLEWALK_BENCHMARK=1")
+    def test_benchmark_million_trades(self):
+        model, sides, entry, exit_, qty = self._million_trades()
+        started = time.perf_counter()
+        model.trade_costs(sides, entry, entry, exit_, exit_, qty=qty)
+        elapsed = time.perf_counter() - started
+        print(f"trade_costs: 1e6 trades em {elapsed * 1000:.0f} ms")
+        self.assertLess(elapsed, 2.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from oraclewalk.utils.file_tail import tail_csv, tail_lines
+
+
+class FileTailTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "trades.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tail_lines_across_blocks(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("".join(f"line {i}\n" for i in range(1000)))
+        self.assertEqual(tail_lines(self.path, 3, block_size=16), ["line 997", "line 998", "line 999"])
+        self.assertEqual(len(tail_lines(self.path, 5000)), 1000)
+        self.assertEqual(tail_lines(os.path.join(self.tmp.name, "missing.csv"), 3), [])
+
+    def test_tail_csv_matches_dictreader(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("id,side,pnl_exec\n")
+            for i in range(50):
+                f.write(f"{i},buy,{i * 0.5}\n")
+        rows = tail_csv(self.path, 10)
+        self.assertEqual([r["id"] for r in rows], [str(i) for i in range(40, 50)])
+        self.assertEqual(rows[-1], {"id": "49", "side": "buy", "pnl_exec": "24.5"})
+        # arquivo com menos linhas que o pedido não devolve o cabeçalho como dado
+        self.assertEqual(len(tail_csv(self.path, 500)), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
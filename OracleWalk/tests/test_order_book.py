@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+import threading
+import time
+import unittest
+
+from oraclewalk.data.order_book import LocalOrderBook, OrderBookSnapshot, replay_diffs
+
+FIXTURE = Path(__file__).parent / "fixtures" / "depth_btcusdt.json"
+
+
+class LocalOrderBookTest(unittest.TestCase):
+    def setUp(self):
+        self.data = json.loads(FIXTURE.read_text(encoding="utf-8"))
+
+    def test_replays_recorded_diffs(self):
+        book = replay_diffs(LocalOrderBook("BTCUSDT"), self.data["snapshot"], self.data["diffs"])
+
+        self.assertTrue(book.synced)
+        self.assertEqual(book.last_update_id, 1007)
+        top = book.top(3)
+        self.assertEqual(top["bids"], [[65000.0, 0.1], [64999.9, 1.5], [64999.7, 0.3]])
+        self.assertEqual(top["asks"], [[65000.3, 0.75], [65000.5, 1.1], [65001.0, 2.5]])
+        # nível com qty 0 foi removido
+        self.assertEqual(book.depth(), (4, 3))
+
+    def test_buffers_diffs_until_snapshot(self):
+        book = LocalOrderBook("BTCUSDT")
+        for msg in self.data["diffs"]:
+            self.assertFalse(book.apply_diff(msg))
+
+        book.load_snapshot(self.data["snapshot"])
+
+        self.assertTrue(book.synced)
+        self.assertEqual(book.last_update_id, 1007)
+        self.assertEqual(book.best_ask(), (65000.3, 0.75))
+
+    def test_gap_marks_book_out_of_sync(self):
+        book = replay_diffs(LocalOrderBook("BTCUSDT"), self.data["snapshot"], self.data["diffs"])
+
+        self.assertFalse(book.apply_diff(self.data["gap_diff"]))
+        self.assertFalse(book.synced)
+
+        book.reset()
+        self.assertIsNone(book.last_update_id)
+        self.assertEqual(book.top(5), {"bids": [], "asks": []})
+
+
+class OrderBookSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        data = json.loads(FIXTURE.read_text(encoding="utf-8"))
+        self.book = replay_diffs(LocalOrderBook("BTCUSDT"), data["snapshot"], data["diffs"])
+
+    def test_snapshot_is_cached_per_version_and_read_only(self):
+        snap = self.book.snapshot(10)
+        self.assertIs(snap, self.book.snapshot(10))
+        self.assertFalse(snap.ask_px.flags.writeable)
+
+        self.book.apply_diff({"U": 1008, "u": 1008, "b": [], "a": [["65000.30", "0"]]})
+        newer = self.book.snapshot(10)
+        self.assertGreater(newer.version, snap.version)
+        # a visão antiga continua intacta
+        self.assertAlmostEqual(snap.best_ask, 65000.3)
+        self.assertAlmostEqual(newer.best_ask, 65000.5)
+
+    def test_aggregates(self):
+        snap = self.book.snapshot(10)
+
+        self.assertAlmostEqual(snap.bid_total, 0.1 + 1.5 + 0.3 + 0.8)
+        self.assertAlmostEqual(snap.ask_total, 0.75 + 1.1 + 2.5)
+        self.assertEqual(list(snap.ask_cum), [0.75, 0.75 + 1.1, 0.75 + 1.1 + 2.5])
+        bid, ask = 0.1 + 1.5, 0.75 + 1.1
+        self.assertAlmostEqual(snap.imbalance(2), (bid - ask) / (bid + ask))
+
+    def test_vwap_to_size(self):
+        snap = self.book.snapshot(10)
+
+        vwap, filled = snap.vwap_to_size("buy", 1.0)
+        self.assertAlmostEqual(vwap, (0.75 * 65000.3 + 0.25 * 65000.5) / 1.0)
+        self.assertEqual(filled, 1.0)
+
+        vwap, filled = snap.vwap_to_size("sell", 100.0)
+        self.assertAlmostEqual(filled, snap.bid_total)
+
+        self.assertEqual(OrderBookSnapshot.empty().vwap_to_size("buy", 1.0), (None, 0.0))
+
+
+class OrderBookResyncTest(unittest.TestCase):
+    def test_failed_snapshots_back_off_in_one_thread(self):
+        from oraclewalk.data.orderbook_data import OrderBookHandler
+
+        data = json.loads(FIXTURE.read_text(encoding="utf-8"))
+        handler = OrderBookHandler("k", "s", "BTCUSDT", resync_backoff=0.02, resync_max_backoff=0.08)
+        calls, done = [], threading.Event()
+
+        def fetch():
+            calls.append((time.monotonic(), threading.get_ident()))
+            if len(calls) < 5:
+                raise RuntimeError("APIError(code=-1003): Too many requests")  # 429
+            done.set()
+            return data["snapshot"]
+
+        handler._fetch_snapshot = fetch
+        handler._schedule_resync()
+        self.assertTrue(done.wait(5.0))
+        deadline = time.monotonic() + 2.0
+        while handler._resyncing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(handler._book.synced)
+        self.assertEqual(len({tid for _, tid in calls}), 1)
+        gaps = [b[0] - a[0] for a, b in zip(calls, calls[1:])]
+        for gap, expected in zip(gaps, (0.02, 0.04, 0.08, 0.08)):
+            self.assertGreaterEqual(gap, expected * 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,336 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from urllib.parse import parse_qsl
+
+from oraclewalk.execution import order_gateway
+from oraclewalk.execution.order_gateway import FILLED, NEW, PENDING_NEW, REJECTED, UNKNOWN, OrderGateway
+
+API_KEY = "test-key"
+API_SECRET = "test-secret"
+
+
+class MockExchange:
+    """
+    Binance spot mínima: /api/v3/order assinado (POST e GET), listenKey e user
+    data stream. FLAKYUSDT executa mas responde 503; LOSTUSDT responde 503
+    sem registrar a ordem.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.orders = []
+        self.by_cid = {}
+        self.peers = set()
+        self.sockets = []
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait(5.0)
+
+    def _run(self, started):
+        from aiohttp import web
+
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/api/v3/order", self.place)
+        app.router.add_get("/api/v3/order", self.query)
+        app.router.add_get("/api/v3/exchangeInfo", self.exchange_info)
+        app.router.add_post("/api/v3/userDataStream", self.listen_key)
+        app.router.add_put("/api/v3/userDataStream", self.listen_key)
+        app.router.add_get("/ws/{key}", self.stream)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def exchange_info(self, request):
+        from aiohttp import web
+
+        return web.json_response({"symbols": [{"symbol": "BTCUSDT", "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01", "maxPrice": "1000000.00", "tickSize": "0.01"},
+            {"filterType": "LOT_SIZE", "minQty": "0.00001", "maxQty": "9000.0", "stepSize": "0.00001"},
+            {"filterType": "NOTIONAL", "minNotional": "5.00000000", "applyMinToMarket": True},
+        ]}]})
+
+    async def listen_key(self, request):
+        from aiohttp import web
+
+        return web.json_response({"listenKey": "lk-1"})
+
+    async def stream(self, request):
+        from aiohttp import web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        async for _ in ws:
+            pass
+        return ws
+
+    @staticmethod
+    def _verify(request, signed):
+        query, _, signature = signed.rpartition("&signature=")
+        expected = hmac.new(API_SECRET.encode(), query.encode(), hashlib.sha256).hexdigest()
+        if request.headers.get("X-MBX-APIKEY") != API_KEY or signature != expected:
+            return None
+        return dict(parse_qsl(query))
+
+    async def place(self, request):
+        from aiohttp import web
+
+        self.peers.add(request.transport.get_extra_info("peername"))
+        params = self._verify(request, await request.text())
+        if params is None:
+            return web.json_response({"code": -1022, "msg": "Signature for this request is not valid."}, status=400)
+        if params["symbol"] == "BADUSDT":
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        if params["symbol"] == "LOSTUSDT":
+            return web.Response(status=503, text="Service Unavailable")
+        self.orders.append(params)
+        await asyncio.sleep(self.latency)
+
+        cid, qty = params["newClientOrderId"], float(params["quantity"])
+        self.by_cid[cid] = {"symbol": params["symbol"], "orderId": len(self.orders), "clientOrderId": cid,
+                            "status": "FILLED", "executedQty": str(qty), "cummulativeQuoteQty": str(qty * 100.0)}
+        if params["symbol"] == "FLAKYUSDT":
+            # executou, mas a resposta se perdeu (e sem evento no stream)
+            return web.json_response({"code": -1001, "msg": "Internal error."}, status=503)
+        # o stream chega antes da resposta REST: o estado local não pode regredir
+        report = {"e": "executionReport", "c": cid, "C": "", "X": "FILLED", "i": len(self.orders),
+                  "z": str(qty), "Z": str(qty * 100.0), "r": "NONE"}
+        for ws in self.sockets:
+            await ws.send_str(json.dumps(report))
+        await asyncio.sleep(0.01)
+        return web.json_response({"symbol": params["symbol"], "orderId": len(self.orders), "clientOrderId": cid,
+                                  "status": "NEW", "executedQty": "0", "cummulativeQuoteQty": "0"})
+
+    async def query(self, request):
+        from aiohttp import web
+
+        params = self._verify(request, request.query_string)
+        if params is None:
+            return web.json_response({"code": -1022, "msg": "Signature for this request is not valid."}, status=400)
+        order = self.by_cid.get(params["origClientOrderId"])
+        if order is None:
+            return web.json_response({"code": -2013, "msg": "Order does not exist."}, status=400)
+        return web.json_response(order)
+
+
+@unittest.skipIf(order_gateway.aiohttp is None, "aiohttp não instalado")
+class OrderGatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.exchange = MockExchange(latency=0.2)
+        ws_url = self.exchange.url.replace("http", "ws")
+        self.gateway = OrderGateway(API_KEY, API_SECRET, base_url=self.exchange.url, stream_url=ws_url,
+                                    max_connections=4, confirm_attempts=3, confirm_delay=0.02).start()
+        deadline = time.monotonic() + 5.0
+        while not self.exchange.sockets and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.gateway.close()
+        self.exchange.stop()
+
+    def test_submit_returns_immediately_and_stream_fills(self):
+        updates = []
+        self.gateway.on_update(lambda o: updates.append(o.status))
+
+        started = time.perf_counter()
+        order = self.gateway.submit("BTCUSDT", "buy", 0.5)
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(order.status, PENDING_NEW)
+
+        done = self.gateway.wait(order.client_order_id, timeout=5.0)
+        self.assertEqual(done.status, FILLED)
+        self.assertEqual(done.avg_price, 100.0)
+        self.assertEqual(done.exchange_order_id, 1)
+        time.sleep(0.1)  # resposta REST (NEW) chega depois e é ignorada
+        self.assertEqual(self.gateway.get(order.client_order_id).status, FILLED)
+        self.assertEqual(updates, [FILLED])
+        self.assertEqual(self.exchange.orders[0]["side"], "BUY")
+        self.assertEqual(self.exchange.orders[0]["quantity"], "0.5")
+
+    def test_quantity_and_price_follow_symbol_filters(self):
+        order = self.gateway.submit("BTCUSDT", "BUY", 0.123456789, ref_price=100.0)
+        self.assertEqual(self.gateway.wait(order.client_order_id, timeout=5.0).status, FILLED)
+        self.assertEqual(self.exchange.orders[0]["quantity"], "0.12345")
+        self.assertEqual(order.quantity, 0.12345)
+        self.assertEqual(self.gateway.round_qty("BTCUSDT", 0.123456789), 0.12345)
+
+        limit = self.gateway.submit("BTCUSDT", "SELL", 1.0, order_type="LIMIT", price=101.23789)
+        self.gateway.wait(limit.client_order_id, timeout=5.0)
+        self.assertEqual(self.exchange.orders[1]["price"], "101.23")
+
+        # abaixo do minNotional / minQty: rejeitada sem ir à corretora
+        tiny = self.gateway.submit("BTCUSDT", "BUY", 0.0004, ref_price=100.0)
+        dust = self.gateway.submit("BTCUSDT", "BUY", 0.000004)
+        self.assertEqual((tiny.status, dust.status), (REJECTED, REJECTED))
+        self.assertIn("MIN_NOTIONAL", tiny.error)
+        self.assertIn("LOT_SIZE", dust.error)
+        self.assertEqual(len(self.exchange.orders), 2)
+
+    def test_concurrent_orders_share_pooled_connections(self):
+        started = time.perf_counter()
+        orders = [self.gateway.submit("BTCUSDT", "SELL", 1.0) for _ in range(12)]
+        for order in orders:
+            self.assertEqual(self.gateway.wait(order.client_order_id, timeout=5.0).status, FILLED)
+        # 12 ordens de 200 ms em 4 conexões: ~3 rodadas, não 12
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertLessEqual(len(self.exchange.peers), 4)
+        self.assertEqual(len({o.client_order_id for o in orders}), 12)
+        self.assertEqual(self.gateway.open_orders(), [])
+
+    def test_rejection_is_terminal(self):
+        order = self.gateway.submit("BADUSDT", "BUY", 1.0)
+        done = self.gateway.wait(order.client_order_id, timeout=5.0)
+        self.assertEqual(done.status, REJECTED)
+        self.assertIn("Invalid symbol", done.error)
+        # evento tardio não ressuscita a ordem
+        self.assertFalse(self.gateway.handle_stream_event(
+            {"e": "executionReport", "c": order.client_order_id, "X": NEW, "z": "0", "Z": "0"}))
+
+    def test_transport_error_is_confirmed_by_query(self):
+        order = self.gateway.submit("FLAKYUSDT", "BUY", 2.0)
+        done = self.gateway.wait(order.client_order_id, timeout=5.0)
+        self.assertEqual(done.status, FILLED)  # o 503 não virou REJECTED
+        self.assertEqual(done.avg_price, 100.0)
+
+        lost = self.gateway.submit("LOSTUSDT", "BUY", 1.0)
+        done = self.gateway.wait(lost.client_order_id, timeout=5.0)
+        self.assertEqual(done.status, REJECTED)
+        self.assertIn("does not exist", done.error)
+
+    def test_unknown_order_accepts_late_fill(self):
+        cid = "ow-unknown"
+        self.gateway.orders[cid] = order_gateway.LocalOrder(cid, "BTCUSDT", "BUY", "MARKET", 1.0)
+        self.assertTrue(self.gateway._apply(cid, UNKNOWN, error="timeout"))
+        self.assertTrue(self.gateway.handle_stream_event(
+            {"e": "executionReport", "c": cid, "X": FILLED, "z": "1", "Z": "100"}))
+        self.assertEqual(self.gateway.get(cid).status, FILLED)
+
+    def _executor(self, size=0.25, db=None, dashboard=None, **overrides):
+        from oraclewalk.execution.trade_executor import TradeExecutor
+
+        cfg = SimpleNamespace(
+            get_client=lambda: None, slippage=0.0, commission_maker=0.0, commission_taker=0.0,
+            trade_journal_dir="", dry_run=False, use_futures=False,
+            binance_api_key=API_KEY, binance_api_secret=API_SECRET,
+            binance_rest_url=self.exchange.url, binance_stream_url=self.gateway.stream_url,
+        )
+        for key, value in overrides.items():
+            setattr(cfg, key, value)
+        risk = SimpleNamespace(current_balance=1000.0, get_position_size=lambda price: size,
+                               update_balance=lambda pnl: None)
+        return TradeExecutor(cfg, risk, db or SimpleNamespace(), SimpleNamespace(send=lambda text: None),
+                             dashboard=dashboard)
+
+    def _in_tmp(self):
+        tmp = TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+
+        def _restore():
+            os.chdir(cwd)
+            tmp.cleanup()
+
+        self.addCleanup(_restore)
+
+    def test_executor_sends_entry_and_exit_orders(self):
+        self._in_tmp()
+        executor = self._executor()
+        executor.open_long("BTCUSDT", 100.0, datetime(2024, 1, 1))
+        entry_id = executor.current_position.entry_order_id
+        executor.close_position("BTCUSDT", 101.0, datetime(2024, 1, 1, 1))
+        self.assertEqual(executor.gateway.wait(entry_id, timeout=5.0).status, FILLED)
+        deadline = time.monotonic() + 5.0
+        while len(self.exchange.orders) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        executor.close()
+        self.assertEqual([(o["side"], o["quantity"]) for o in self.exchange.orders], [("BUY", "0.25"), ("SELL", "0.25")])
+
+    def test_executor_reconciles_entry_with_fill(self):
+        self._in_tmp()
+        executor = self._executor(commission_taker=0.1)
+        executor.open_long("BTCUSDT", 99.0, datetime(2024, 1, 1))
+        pos = executor.current_position
+        self.assertEqual(executor.gateway.wait(pos.entry_order_id, timeout=5.0).status, FILLED)
+        self.assertEqual(executor.apply_order_updates(), 1)
+
+        self.assertAlmostEqual(pos.entry_price, 100.0 * 1.001)  # avg do fill + taker
+        self.assertAlmostEqual(executor.book.open_pnl("BTCUSDT", 110.0), (110.0 - 100.1) * 0.25)
+        self.assertAlmostEqual(executor.position_journal.open_positions()[pos.position_id]["entry_price"], 100.1)
+        executor.close()
+
+    def test_executor_tracks_the_rounded_quantity(self):
+        self._in_tmp()
+        executor = self._executor(size=0.123456789)
+        executor.open_long("BTCUSDT", 100.0, datetime(2024, 1, 1))
+        pos = executor.current_position
+        self.assertEqual(pos.quantity, 0.12345)
+        executor.gateway.wait(pos.entry_order_id, timeout=5.0)
+        executor.close()
+        self.assertEqual(self.exchange.orders[0]["quantity"], "0.12345")
+
+    def test_executor_drops_rejected_entry(self):
+        self._in_tmp()
+        executor = self._executor()
+        executor.open_short("BADUSDT", 100.0, datetime(2024, 1, 1))
+        pos = executor.current_position
+        self.assertEqual(executor.gateway.wait(pos.entry_order_id, timeout=5.0).status, REJECTED)
+
+        # a saída não manda ordem para uma posição que nunca existiu
+        executor.close_position("BADUSDT", 101.0, datetime(2024, 1, 1, 1))
+        self.assertEqual(len(executor.book), 0)
+        self.assertEqual(executor.position_journal.open_positions(), {})
+        self.assertEqual(executor.stops.evaluate("BADUSDT", 0.0, 1e9), [])
+        executor.close()
+        self.assertEqual(self.exchange.orders, [])
+
+    def test_rejected_entry_leaves_no_trade_or_ledger_row(self):
+        from oraclewalk.dashboard.server import DashboardServer
+        from oraclewalk.storage.database import DatabaseManager
+
+        self._in_tmp()
+        db = DatabaseManager("trades.db")
+        dashboard = DashboardServer(max_points=100)
+        executor = self._executor(db=db, dashboard=dashboard)
+        executor.open_short("BADUSDT", 100.0, datetime(2024, 1, 1))
+        pos = executor.current_position
+        self.assertEqual(len(dashboard._trades), 1)
+        self.assertEqual(executor.gateway.wait(pos.entry_order_id, timeout=5.0).status, REJECTED)
+        self.assertEqual(executor.apply_order_updates(), 1)
+        executor.close()
+        self.assertTrue(db.flush())
+
+        # nada de trade fechado com pnl 0: a entrada simplesmente não existiu
+        self.assertTrue(db.query_df("SELECT * FROM trades").empty)
+        self.assertTrue(db.query_df("SELECT * FROM pnl_ledger").empty)
+        self.assertEqual(db.realized_total(), 0.0)
+        self.assertEqual(len(dashboard._trades), 0)
+        # o front que já viu a abertura recebe a remoção no próximo delta
+        self.assertEqual(dashboard._trades.changes_since(1)["removed"], [executor._trade_key(pos)])
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from oraclewalk.execution.order_model import Position
+from oraclewalk.execution.position_book import PositionBook
+
+
+def _pos(side, entry=100.0, sl=0.0, tp=0.0, symbol="BTCUSDT", qty=1.0):
+    return Position(symbol=symbol, side=side, quantity=qty, entry_price=entry,
+                    stop_loss=sl, take_profit=tp, opened_at="2024-01-01T00:00:00")
+
+
+class PositionBookTest(unittest.TestCase):
+    def test_lookup_by_id_and_symbol(self):
+        book = PositionBook()
+        a, b, c = _pos("buy"), _pos("sell"), _pos("buy", symbol="ETHUSDT")
+        for p in (a, b, c):
+            book.add(p)
+
+        self.assertEqual(len(book), 3)
+        self.assertIs(book.get(b.position_id), b)
+        self.assertEqual(book.by_symbol("BTCUSDT"), [a, b])
+        self.assertEqual(book.by_symbol("BTCUSDT", side="long"), [a])
+        self.assertIs(book.latest(), c)
+        self.assertIs(book.latest("BTCUSDT"), b)
+
+        book.remove(b.position_id)
+        self.assertEqual(book.by_symbol("BTCUSDT"), [a])
+        self.assertIsNone(book.remove(b.position_id))
+
+    def test_open_pnl_sums_all_positions(self):
+        book = PositionBook()
+        book.add(_pos("buy", entry=100.0, qty=2.0))
+        book.add(_pos("sell", entry=110.0, qty=1.0))
+        self.assertAlmostEqual(book.open_pnl("BTCUSDT", 105.0), 2 * 5.0 + 5.0)
+        self.assertEqual(book.open_pnl("ETHUSDT", 105.0), 0.0)
+
+
+class ExecutorMultiPositionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _executor(self, dashboard=None, **cfg_overrides):
+        from oraclewalk.execution.trade_executor import TradeExecutor
+
+        cfg = SimpleNamespace(
+            get_client=lambda: None, slippage=0.0, commission_maker=0.0, commission_taker=0.0,
+            trade_journal_dir="", dry_run=True, single_position_mode=False, max_open_positions=0,
+        )
+        vars(cfg).update(cfg_overrides)
+        risk = SimpleNamespace(current_balance=1000.0, get_position_size=lambda price: 1.0,
+                               update_balance=lambda pnl: None)
+        notifier = SimpleNamespace(send=lambda text: None)
+        return TradeExecutor(cfg, risk, SimpleNamespace(), notifier, dashboard=dashboard)
+
+    def test_concurrent_entries_close_independently_and_survive_restart(self):
+        dt = datetime(2024, 1, 1)
+        executor = self._executor()
+        executor.open_long("BTCUSDT", 100.0, dt, sl=95.0, tp=110.0)
+        executor.open_long("BTCUSDT", 102.0, dt, sl=98.0, tp=120.0)
+        executor.open_short("BTCUSDT", 101.0, dt, sl=105.0, tp=90.0)
+        self.assertEqual(len(executor.book), 3)
+        keys = {executor._trade_key(p) for p in executor.book}
+        self.assertEqual(len(keys), 3)  # mesmo candle, chaves distintas
+
+        # só o segundo long foi estopado
+        for trig in executor.stops.evaluate("BTCUSDT", 97.0, 103.0):
+            executor.close_position("BTCUSDT", trig.price, dt, position_id=trig.position_id)
+        self.assertEqual(sorted(p.entry_price for p in executor.book), [100.0, 101.0])
+        executor.close()
+
+        restarted = self._executor()
+        restarted.restore_position_from_disk()
+        self.assertEqual(sorted(p.entry_price for p in restarted.book), [100.0, 101.0])
+        self.assertEqual(restarted.close_all("BTCUSDT", 104.0, dt, side="sell"), 1)
+        self.assertEqual([p.side for p in restarted.positions()], ["buy"])
+        restarted.close()
+
+    def test_single_position_mode_and_limit_refuse_entries(self):
+        dt = datetime(2024, 1, 1)
+        single = self._executor(single_position_mode=True)
+        single.open_long("BTCUSDT", 100.0, dt)
+        single.open_long("BTCUSDT", 101.0, dt)
+        self.assertEqual(len(single.book), 1)
+        single.close()
+
+        capped = self._executor(max_open_positions=2)
+        for price in (100.0, 101.0, 102.0):
+            capped.open_long("ETHUSDT", price, dt)
+        self.assertEqual(len(capped.book), 2)
+        capped.close()
+
+    def test_same_candle_entries_stay_separate_on_dashboard(self):
+        from oraclewalk.dashboard.server import DashboardServer
+
+        dt = datetime(2024, 1, 1)
+        dashboard = DashboardServer()
+        executor = self._executor(dashboard=dashboard)
+        executor.open_long("BTCUSDT", 100.0, dt)
+        executor.open_long("BTCUSDT", 102.0, dt)
+        first = executor.positions()[0]
+        executor.close_position("BTCUSDT", 105.0, dt, position_id=first.position_id)
+
+        trades = sorted(dashboard._trades.values(), key=lambda t: t["price_entry"])
+        self.assertEqual([(t["price_entry"], t.get("price_exit")) for t in trades], [(100.0, 105.0), (102.0, None)])
+        executor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
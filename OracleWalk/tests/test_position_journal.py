@@ -0,0 +1,122 @@
+import json
+import os
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from oraclewalk.execution.position_journal import PositionJournal
+
+
+def _record(symbol, side="buy", opened_at="2024-01-01T00:00:00"):
+    return {
+        "symbol": symbol,
+        "side": side,
+        "quantity": 1.0,
+        "entry_price": 100.0,
+        "stop_loss": 90.0,
+        "take_profit": 120.0,
+        "opened_at": opened_at,
+    }
+
+
+class PositionJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_restores_many_positions(self):
+        journal = PositionJournal(self.dir, fsync_interval=0.0)
+        journal.record_open("a", _record("BTCUSDT"))
+        journal.record_open("b", _record("ETHUSDT", side="sell"))
+        journal.record_open("c", _record("BTCUSDT", opened_at="2024-01-01T01:00:00"))
+        journal.record_modify("a", stop_loss=95.0)
+        journal.record_close("b", pnl=-1.0)
+        journal.close()
+
+        positions = PositionJournal(self.dir).open_positions()
+        self.assertEqual(sorted(positions), ["a", "c"])
+        self.assertEqual(positions["a"]["stop_loss"], 95.0)
+
+    def test_compaction_snapshots_and_truncates(self):
+        journal = PositionJournal(self.dir, compact_every=10)
+        for i in range(25):
+            journal.record_open(str(i), _record("BTCUSDT"))
+            if i % 2:
+                journal.record_close(str(i))
+        journal.close()
+
+        with open(journal.snapshot_path, encoding="utf-8") as f:
+            snap = json.load(f)
+        self.assertEqual(snap["seq"], 30)
+        with open(journal.journal_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 7)  # só os eventos depois do snapshot
+
+        reopened = PositionJournal(self.dir)
+        self.assertEqual(sorted(reopened.open_positions(), key=int), [str(i) for i in range(0, 25, 2)])
+        self.assertEqual(reopened._events_since_snapshot, 7)
+
+    def test_torn_tail_is_discarded(self):
+        journal = PositionJournal(self.dir)
+        journal.record_open("a", _record("BTCUSDT"))
+        journal.close()
+        with open(journal.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"seq":2,"type":"clo')  # crash no meio da escrita
+
+        reopened = PositionJournal(self.dir)
+        self.assertEqual(list(reopened.open_positions()), ["a"])
+        reopened.record_close("a")
+        reopened.close()
+        self.assertEqual(PositionJournal(self.dir).open_positions(), {})
+
+
+class ExecutorRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _executor(self):
+        from oraclewalk.execution.trade_executor import TradeExecutor
+
+        cfg = SimpleNamespace(
+            get_client=lambda: None, slippage=0.0, commission_maker=0.0, commission_taker=0.0,
+            trade_journal_dir="", dry_run=True,
+        )
+        risk = SimpleNamespace(current_balance=1000.0, get_position_size=lambda price: 1.0,
+                               update_balance=lambda pnl: None)
+        notifier = SimpleNamespace(send=lambda text: None)
+        return TradeExecutor(cfg, risk, SimpleNamespace(), notifier)
+
+    def test_open_position_survives_restart_and_legacy_file_is_migrated(self):
+        with open("open_position.json", "w", encoding="utf-8") as f:
+            json.dump(_record("BTCUSDT", opened_at="2024-01-01T00:00:00"), f)
+
+        executor = self._executor()
+        executor.restore_position_from_disk()
+        self.assertFalse(os.path.exists("open_position.json"))
+        self.assertEqual(executor.current_position.entry_price, 100.0)
+        pid = executor.current_position.position_id
+        executor.close()
+
+        restarted = self._executor()
+        restarted.restore_position_from_disk()
+        self.assertEqual(restarted.current_position.position_id, pid)
+        restarted.close_position("BTCUSDT", 110.0, datetime(2024, 1, 1, 2))
+        restarted.close()
+
+        again = self._executor()
+        again.restore_position_from_disk()
+        self.assertIsNone(again.current_position)
+        again.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import unittest
+
+import pandas as pd
+
+from oraclewalk.data.resampler import (
+    CandleResampler,
+    bucket_start,
+    resample_ohlcv,
+    timeframe_to_seconds,
+)
+
+T0 = datetime(2024, 1, 1, 0, 0)  # segunda-feira
+
+
+def _kline(minute, close, closed=True, volume=1.0):
+    return {
+        "datetime": T0 + timedelta(minutes=minute),
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": volume,
+        "is_closed": closed,
+    }
+
+
+class TimeframeTest(unittest.TestCase):
+    def test_seconds_and_alignment(self):
+        self.assertEqual(timeframe_to_seconds("15m"), 900)
+        self.assertEqual(timeframe_to_seconds("4h"), 14400)
+        with self.assertRaises(ValueError):
+            timeframe_to_seconds("1M")
+
+        ts = int(pd.Timestamp("2024-01-03 13:47", tz="UTC").timestamp())
+        self.assertEqual(bucket_start(ts, 3600), ts - 47 * 60)
+        week = bucket_start(ts, timeframe_to_seconds("1w"))
+        self.assertEqual(pd.Timestamp(week, unit="s"), pd.Timestamp("2024-01-01"))
+
+
+class CandleResamplerTest(unittest.TestCase):
+    def test_builds_closed_and_partial_bars(self):
+        rs = CandleResampler("1m", ["5m"])
+        seen = []
+        rs.subscribe("5m", lambda tf, bar: seen.append(bar))
+
+        closed = rs.update_many(_kline(m, 100.0 + m) for m in range(4))
+        self.assertEqual(closed, [])
+        self.assertEqual(rs.partial("5m")["close"], 103.0)
+
+        rs.update(_kline(4, 90.0, closed=False))
+        self.assertEqual(seen[-1]["low"], 89.0)
+        self.assertFalse(seen[-1]["is_closed"])
+
+        closed = rs.update(_kline(4, 104.0))
+        self.assertEqual(len(closed), 1)
+        bar = closed[0]
+        self.assertEqual(bar["datetime"], T0)
+        self.assertEqual((bar["open"], bar["high"], bar["low"], bar["close"]), (99.5, 105.0, 99.0, 104.0))
+        self.assertEqual(bar["volume"], 5.0)
+        self.assertIsNone(rs.partial("5m"))
+
+    def test_gap_forces_close(self):
+        rs = CandleResampler("1m", ["5m"])
+        rs.update_many(_kline(m, 100.0) for m in range(3))
+        closed = rs.update(_kline(7, 101.0))
+        self.assertEqual(len(closed), 1)
+        self.assertTrue(closed[0]["forced"])
+        self.assertEqual(rs.partial("5m")["datetime"], T0 + timedelta(minutes=5))
+
+    def test_matches_vectorized_resample(self):
+        klines = [_kline(m, 100.0 + (m * 7) % 11, volume=float(m % 3)) for m in range(62)]
+        rs = CandleResampler("1m", ["15m"])
+        live_bars = rs.update_many(klines)
+
+        df = pd.DataFrame(klines).set_index("datetime").drop(columns="is_closed")
+        batch = resample_ohlcv(df, "15m")
+
+        self.assertEqual(len(batch), 4)  # último bucket (2 candles) é parcial
+        self.assertEqual([b["datetime"] for b in live_bars], list(batch.index.to_pydatetime()))
+        for bar, (_, row) in zip(live_bars, batch.iterrows()):
+            for col in ("open", "high", "low", "close", "volume"):
+                self.assertAlmostEqual(bar[col], row[col])
+
+
+if __name__ == "__main__":
+    unittest.main()
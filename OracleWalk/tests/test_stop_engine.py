@@ -0,0 +1,137 @@
+import os
+import random
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from oraclewalk.execution.stop_engine import StopEngine
+
+
+class StopEngineTest(unittest.TestCase):
+    def test_triggers_by_side_with_sl_priority(self):
+        stops = StopEngine()
+        stops.add("long_sl", "BTCUSDT", "buy", 95.0, 110.0)
+        stops.add("long_tp", "BTCUSDT", "buy", 90.0, 104.0)
+        stops.add("long_both", "BTCUSDT", "buy", 99.0, 101.0)  # SL e TP no mesmo candle: SL vence
+        stops.add("short_sl", "BTCUSDT", "sell", 104.0, 90.0)
+        stops.add("short_tp", "BTCUSDT", "sell", 130.0, 96.0)
+        stops.add("untouched", "BTCUSDT", "sell", 120.0, 80.0)
+        stops.add("no_stops", "BTCUSDT", "buy")
+        stops.add("other", "ETHUSDT", "buy", 99.0, 101.0)
+
+        triggers = {t.position_id: (t.price, t.kind) for t in stops.evaluate("BTCUSDT", low=94.0, high=105.0)}
+        self.assertEqual(triggers, {
+            "long_sl": (95.0, "sl"),
+            "long_tp": (104.0, "tp"),
+            "long_both": (99.0, "sl"),
+            "short_sl": (104.0, "sl"),
+            "short_tp": (96.0, "tp"),
+        })
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        stops = StopEngine()
+        levels = {}
+        for i in range(500):
+            side = rng.choice(["buy", "sell"])
+            sl = round(rng.uniform(80, 120), 1) if rng.random() > 0.1 else 0.0
+            tp = round(rng.uniform(80, 120), 1) if rng.random() > 0.1 else 0.0
+            stops.add(str(i), "BTCUSDT", side, sl, tp)
+            levels[str(i)] = (side, sl, tp)
+        for pid in rng.sample(sorted(levels), 100):
+            stops.remove(pid)
+            del levels[pid]
+
+        low, high = 97.0, 103.0
+        expected = {}
+        for pid, (side, sl, tp) in levels.items():
+            if side == "buy":
+                if sl and low <= sl:
+                    expected[pid] = (sl, "sl")
+                elif tp and high >= tp:
+                    expected[pid] = (tp, "tp")
+            else:
+                if sl and high >= sl:
+                    expected[pid] = (sl, "sl")
+                elif tp and low <= tp:
+                    expected[pid] = (tp, "tp")
+        got = {t.position_id: (t.price, t.kind) for t in stops.evaluate("BTCUSDT", low, high)}
+        self.assertEqual(got, expected)
+
+    def test_trailing_only_tightens(self):
+        stops = StopEngine()
+        stops.add("long", "BTCUSDT", "buy", 95.0, 0.0, trailing=3.0)
+        stops.add("short", "BTCUSDT", "sell", 0.0, 0.0, trailing=2.0)  # sem SL: nasce no primeiro trail
+        stops.add("fixed", "BTCUSDT", "buy", 90.0)
+
+        self.assertEqual(stops.trail("BTCUSDT", 100.0), {"long": 97.0, "short": 102.0})
+        self.assertEqual(stops.trail("BTCUSDT", 99.0), {"short": 101.0})  # long não afrouxa
+        self.assertEqual(stops.levels("long"), (97.0, 0.0))
+        self.assertEqual(stops.levels("fixed"), (90.0, 0.0))
+
+        kinds = {t.position_id: t.price for t in stops.evaluate("BTCUSDT", 96.5, 101.5)}
+        self.assertEqual(kinds, {"long": 97.0, "short": 101.0})
+
+    def test_update_keeps_trailing(self):
+        stops = StopEngine()
+        stops.add("a", "BTCUSDT", "buy", 95.0, 110.0, trailing=5.0)
+        stops.update("a", stop_loss=98.0, take_profit=0.0)
+        self.assertEqual(stops.levels("a"), (98.0, 0.0))
+        self.assertEqual(stops.trail("BTCUSDT", 105.0), {"a": 100.0})
+        stops.remove("a")
+        self.assertEqual(stops.evaluate("BTCUSDT", 0.0, 1e9), [])
+
+
+class ExecutorTrailingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _executor(self):
+        from oraclewalk.execution.trade_executor import TradeExecutor
+
+        cfg = SimpleNamespace(
+            get_client=lambda: None, slippage=0.0, commission_maker=0.0, commission_taker=0.0,
+            trade_journal_dir="", dry_run=True,
+        )
+        risk = SimpleNamespace(current_balance=1000.0, get_position_size=lambda price: 1.0,
+                               update_balance=lambda pnl: None)
+        notifier = SimpleNamespace(send=lambda text: None)
+        return TradeExecutor(cfg, risk, SimpleNamespace(), notifier)
+
+    def test_trailed_stop_is_journaled_and_restored(self):
+        executor = self._executor()
+        executor.open_long("BTCUSDT", 100.0, datetime(2024, 1, 1), sl=95.0, trailing=4.0)
+        self.assertEqual(list(executor.trail_stops("BTCUSDT", 110.0).values()), [106.0])
+        self.assertEqual(executor.current_position.stop_loss, 106.0)
+        executor.close()
+
+        restarted = self._executor()
+        restarted.restore_position_from_disk(last_price=105.0, last_dt=datetime(2024, 1, 1, 1))
+        self.assertEqual(len(restarted.book), 0)  # 105 <= stop de 106 → fechada na recuperação
+        restarted.close()
+
+    def test_candle_evaluates_before_trailing(self):
+        executor = self._executor()
+        executor.open_long("BTCUSDT", 100.0, datetime(2024, 1, 1), sl=90.0, trailing=2.0)
+        candle = {"low": 95.0, "high": 104.0, "close": 104.0, "datetime": datetime(2024, 1, 1, 1)}
+
+        # o trailing para 102 vem do close: o low de 95 não atingiu o SL vigente (90)
+        self.assertEqual(executor.check_stops("BTCUSDT", candle), [])
+        self.assertEqual(executor.current_position.stop_loss, 102.0)
+
+        candle = {"low": 101.0, "high": 103.0, "close": 102.5, "datetime": datetime(2024, 1, 1, 2)}
+        triggers = executor.check_stops("BTCUSDT", candle)
+        self.assertEqual([(t.price, t.kind) for t in triggers], [(102.0, "sl")])
+        self.assertEqual(len(executor.book), 0)
+        executor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+
+from oraclewalk.notifications.telegram_notifier import MAX_MESSAGE_LEN, TelegramNotifier, coalesce
+
+
+class RetryAfter(Exception):
+    """Imita telegram.error.RetryAfter (só o atributo retry_after importa)."""
+
+    def __init__(self, seconds):
+        super().__init__(f"Flood control exceeded. Retry in {seconds} seconds")
+        self.retry_after = seconds
+
+
+class StubBot:
+    def __init__(self, delay=0.0, failures=()):
+        self.delay = delay
+        self.failures = list(failures)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id, text):
+        time.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+        with self.lock:
+            self.sent.append((chat_id, text, time.monotonic()))
+
+
+def _notifier(bot, **kwargs):
+    opts = {"coalesce_window": 0.05, "min_interval": 0.0, "backoff": 0.01}
+    opts.update(kwargs)
+    return TelegramNotifier("token", "42", bot=bot, **opts)
+
+
+class TelegramNotifierTest(unittest.TestCase):
+    def test_send_does_not_wait_for_network(self):
+        bot = StubBot(delay=0.3)
+        notifier = _notifier(bot)
+        started = time.perf_counter()
+        notifier.send("📈 Sinal de COMPRA detectado")
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertTrue(notifier.flush(timeout=2.0))
+        self.assertEqual([t for _, t, _ in bot.sent], ["📈 Sinal de COMPRA detectado"])
+        notifier.close()
+
+    def test_burst_is_coalesced_into_one_message(self):
+        bot = StubBot()
+        notifier = _notifier(bot, coalesce_window=0.2)
+        for i in range(5):
+            notifier.send(f"msg {i}")
+        notifier.close(timeout=2.0)
+        self.assertEqual(len(bot.sent), 1)
+        self.assertEqual(bot.sent[0][1], "msg 0\n\nmsg 1\n\nmsg 2\n\nmsg 3\n\nmsg 4")
+
+    def test_retry_after_and_backoff(self):
+        bot = StubBot(failures=[RetryAfter(0.05), ConnectionError("timeout")])
+        notifier = _notifier(bot)
+        notifier.send("abriu")
+        self.assertTrue(notifier.flush(timeout=2.0))
+        self.assertEqual([t for _, t, _ in bot.sent], ["abriu"])
+        self.assertEqual(notifier.failed, 0)
+
+        bot.failures = [ConnectionError("down")] * 5
+        notifier.max_retries = 1
+        notifier.send("fechou")
+        self.assertTrue(notifier.flush(timeout=2.0))
+        self.assertEqual(notifier.failed, 1)
+        notifier.close()
+
+    def test_rate_limit_spaces_messages(self):
+        bot = StubBot()
+        notifier = _notifier(bot, coalesce_window=0.0, min_interval=0.1)
+        notifier.send("a" * MAX_MESSAGE_LEN)
+        notifier.send("b" * MAX_MESSAGE_LEN)
+        notifier.close(timeout=2.0)
+        self.assertEqual(len(bot.sent), 2)
+        self.assertGreaterEqual(bot.sent[1][2] - bot.sent[0][2], 0.09)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        bot = StubBot(delay=0.2)
+        notifier = _notifier(bot, max_queue=2, coalesce_window=0.0)
+        for i in range(10):
+            notifier.send(str(i))
+        self.assertGreater(notifier.dropped, 0)
+        notifier.close(timeout=3.0)
+
+    def test_coalesce_respects_message_limit(self):
+        parts = coalesce(["x" * 3000, "y" * 3000, "z" * 9000], limit=MAX_MESSAGE_LEN)
+        self.assertTrue(all(len(p) <= MAX_MESSAGE_LEN for p in parts))
+        self.assertEqual("".join(parts).replace("\n", ""), "x" * 3000 + "y" * 3000 + "z" * 9000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+
+from oraclewalk.execution import trade_journal
+from oraclewalk.execution.trade_journal import TradeJournal, load_journal
+
+
+def _row(i, open_time, symbol="BTCUSDT", pnl=1.0):
+    return {
+        "id": i,
+        "open_time": open_time,
+        "close_time": open_time,
+        "symbol": symbol,
+        "side": "buy",
+        "entry_exec": "100.0",
+        "close_exec": 101.0,
+        "quantity": 1.0,
+        "pnl_exec": pnl,
+    }
+
+
+@unittest.skipIf(trade_journal.pa is None, "pyarrow não instalado")
+class TradeJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partitions_by_day_and_filters_on_load(self):
+        journal = TradeJournal(self.root, row_group_size=2)
+        journal.append(_row(1, "2024-01-01T10:00:00"))
+        journal.append(_row(2, "2024-01-01T11:00:00", symbol="ETHUSDT"))
+        journal.append(_row(3, "2024-01-02T09:00:00", pnl=-2.0))
+        journal.close()
+
+        self.assertEqual(sorted(os.listdir(self.root)), ["date=2024-01-01", "date=2024-01-02"])
+
+        df = load_journal(self.root)
+        self.assertEqual(df["id"].tolist(), [1, 2, 3])
+        self.assertEqual(str(df["entry_exec"].dtype), "float64")
+        self.assertEqual(str(df["open_time"].dtype), "datetime64[us]")
+
+        btc = load_journal(self.root, symbols=["BTCUSDT"], start="2024-01-02")
+        self.assertEqual(btc["id"].tolist(), [3])
+        self.assertEqual(btc["pnl_exec"].tolist(), [-2.0])
+
+    def test_day_rollover_compacts_previous_partition(self):
+        journal = TradeJournal(self.root, row_group_size=1)
+        for i in range(3):
+            journal.append(_row(i, f"2024-01-01T1{i}:00:00"))
+        day = os.path.join(self.root, "date=2024-01-01")
+        self.assertEqual(len(os.listdir(day)), 3)
+
+        journal.append(_row(9, "2024-01-02T00:00:00"))
+        journal.close()  # compactação roda na thread do journal
+        files = os.listdir(day)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].startswith("compact-"))
+        self.assertEqual(load_journal(self.root, end="2024-01-01T23:59:59")["id"].tolist(), [0, 1, 2])
+
+    def test_pending_trades_flush_without_new_appends(self):
+        journal = TradeJournal(self.root, row_group_size=100, flush_interval=0.05)
+        journal.append(_row(1, "2024-01-01T10:00:00"))
+        day = os.path.join(self.root, "date=2024-01-01")
+        deadline = time.monotonic() + 5.0
+        while not (os.path.isdir(day) and any(f.endswith(".parquet") for f in os.listdir(day))) \
+                and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(load_journal(self.root)["id"].tolist(), [1])
+        journal.close()
+
+
+class TradeJournalDisabledTest(unittest.TestCase):
+    def test_without_pyarrow_is_a_noop(self):
+        with TemporaryDirectory() as tmp:
+            saved = trade_journal.pa
+            trade_journal.pa = None
+            try:
+                journal = TradeJournal(os.path.join(tmp, "journal"))
+                journal.append(_row(1, "2024-01-01T10:00:00"))
+                journal.close()
+            finally:
+                trade_journal.pa = saved
+            self.assertFalse(journal.enabled)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "journal")))
+
+
+if __name__ == "__main__":
+    unittest.main()
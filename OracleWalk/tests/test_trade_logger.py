@@ -0,0 +1,67 @@
+import csv
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from oraclewalk.execution.trade_logger import ProTradeLogger
+
+
+def _pos(opened_at, pnl=1.0):
+    return SimpleNamespace(
+        opened_at=opened_at,
+        closed_at=opened_at,
+        symbol="BTCUSDT",
+        side="buy",
+        entry_price=100.0,
+        close_exec=101.0,
+        quantity=1.0,
+        pnl=pnl,
+    )
+
+
+class ProTradeLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.main = os.path.join(self.tmp.name, "trades.csv")
+        self.logs = os.path.join(self.tmp.name, "logs")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _rows(self, path):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_rows_are_visible_without_close_and_daily_file_rolls(self):
+        trade_logger = ProTradeLogger(self.main, self.logs)
+        trade_logger.log_trade(_pos("2024-01-01T10:00:00"), cfg=None)
+        trade_logger.log_trade(_pos("2024-01-01T11:00:00"), cfg=None)
+        daily_handle = trade_logger._daily
+        trade_logger.log_trade(_pos("2024-01-02T09:00:00"), cfg=None)
+
+        self.assertIsNot(trade_logger._daily, daily_handle)
+        self.assertTrue(daily_handle.closed)
+        self.assertEqual([r["id"] for r in self._rows(self.main)], ["1", "2", "3"])
+        self.assertEqual(len(self._rows(os.path.join(self.logs, "trades_2024-01-01.csv"))), 2)
+        self.assertEqual(len(self._rows(os.path.join(self.logs, "trades_2024-01-02.csv"))), 1)
+        trade_logger.close()
+
+    def test_counter_resumes_from_file_tail(self):
+        first = ProTradeLogger(self.main, self.logs)
+        for _ in range(3):
+            first.log_trade(_pos("2024-01-01T10:00:00"), cfg=None)
+        first.close()
+
+        second = ProTradeLogger(self.main, self.logs, flush_every=10)
+        second.log_trade(_pos("2024-01-01T12:00:00"), cfg=None)
+        second.close()  # descarrega o que ficou no buffer
+
+        rows = self._rows(self.main)
+        self.assertEqual([r["id"] for r in rows], ["1", "2", "3", "4"])
+        with open(self.main) as f:
+            self.assertEqual(f.read().count("id,open_time"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()